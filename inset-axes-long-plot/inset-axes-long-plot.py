@@ -16,37 +16,33 @@ Credit: 	Taylor Hutchison
 
 _author_ = 'Taylor Hutchison'
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import matplotlib.cm as cm
 from matplotlib.patches import Polygon
 import matplotlib.patheffects as PathEffects
-from mpl_toolkits.axes_grid.inset_locator import inset_axes
+from mpl_toolkits.axes_grid1.inset_locator import inset_axes
+
+# the Cloudy models are shared by all of the figures
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import data, export, layout, linemarks, resolution
+
+# relevant lines, sorted by wavelength
+line_list = linemarks.line_catalog([('lya',1215.67,r'Ly$\alpha$'),('nv',1240,'NV $\lambda$1240'),
+		('civ',1548.48,'CIV $\lambda$1549'),('heii1',1640.4,'HeII $\lambda$1640'),
+		('ciii]',1906.8,'CIII] $\lambda$1907\n  & $\lambda$1909'),('mgii',2798,'MgII $\lambda$2798'),
+		('[oii]',3727,'[OII] $\lambda$3727\n    & $\lambda$3729'),('heii2',4686,'HeII $\lambda$4686'),
+		('hbeta',4862.68,r'H$\beta$ $\lambda$4863'),('[oiii]1',4959,''),
+		('[oiii]2',5007,'[OIII] $\lambda$4959\n    & $\lambda$5007')])
 
 def lines(ax,y0):
 	# plotting relevant lines
+	# (the labels are placed automatically, so they don't overlap)
 	z = 7.5027 # systemic redshift from Hutchison et al. (2019)
-	lines = [1215.67,1240,1548.48,1640.4,1906.8,2798,3727,4686,4862.68,4959,5007]
-	lnames = [r'Ly$\alpha$','NV $\lambda$1240','CIV $\lambda$1549','HeII $\lambda$1640',\
-			'CIII] $\lambda$1907\n  & $\lambda$1909','MgII $\lambda$2798',\
-			'[OII] $\lambda$3727\n    & $\lambda$3729', 'HeII $\lambda$4686',\
-			r'H$\beta$ $\lambda$4863','','[OIII] $\lambda$4959\n    & $\lambda$5007']
-			
-	shiftme = [0,2,7,8]
-	for i in range(len(lines)):
-		# quick way to see if i is in the shiftme list
-		# this will just allow you to move the text labels around
-		if np.isin([i],shiftme)[0] == True: shift = -120
-		else: shift = 50
-		# now for the y values
-		# you can add more `elif` lines if you want to shift other around
-		if i == 0: y = y0*5.2 # to raise Lya up a lot
-		else: y = y0
-		
-		ax.axvline(lines[i]/1e4*(1+z),ls='--',color='k',alpha=.5)
-		ax.text((lines[i]+shift)/1e4*(1+z),y,'%s'%(lnames[i]),\
-			fontsize=16,verticalalignment='bottom',rotation='vertical')
+	return linemarks.LineMarkers(ax,line_list,z,y=y0,fontsize=16)
 	
 	
 # names of JWST/NIRSpec dispersers/gratings
@@ -60,14 +56,23 @@ colors = ['#962A13','k','#1F618D','#D1A90A']
 # Z(stellar)=Z(nebular)=0.2 Zsolar, ionization parameter log_10(U)=-2.1, n_H=300 cm^(-3)	
 z,zneb,u = 0.2,0.2,-2.1
 model = 'age7z%szneb%su%s_100.con'%(z,zneb,u)
-data = '' # if you place it somewhere else, you can put the path here
-con = np.loadtxt(data+model,usecols=[0,6]) # the Cloudy model, using only these columns
+con = data.load(model,usecols=[0,6]) # the Cloudy model, using only these columns
 wave,vfv = con[:,0],con[:,1] # wavelength [microns], and SED [nu*F_nu]
 nu = 2.998e+14 / wave # making frequency
 spec = vfv / nu # now just F_nu
 spec[spec == 0] = np.min(spec[spec>0]) # replacing any zeros with min (so log-space doesn't fail)
 zwave = wave * 8.5032 # redshifted wavelength [microns]
 
+# the four (staggered) spectra shown in every panel, made once -- the rows
+# are views, so the panels don't each need their own copies
+lya = np.where(zwave < 0.1215*8.5027,0,spec) # no flux bluewards of Lya
+sup_fluxes = lya * (1 + np.arange(4,dtype=lya.dtype)[:,None]*0.1) # just to stagger them
+
+# the "medium res" insets, as NIRSpec's G140M grating would see them (all four
+# spectra are broadened at once) -- F070LP covers NV, and F100LP covers CIII]
+nv_wave,nv_fluxes = resolution.broaden(zwave,sup_fluxes,'G140M','F070LP')
+ciii_wave,ciii_fluxes = resolution.broaden(zwave,sup_fluxes,'G140M','F100LP')
+
 
 # ----------------------- #
 # -- making the figure -- #
@@ -130,9 +135,7 @@ ax.set_xticklabels([])
 ax1 = plt.subplot(gs00[1])
 
 for j in range(4):
-	sup_flux = spec.copy()
-	sup_flux *= 1 + j*0.1 # just to stagger them
-	sup_flux[zwave < 0.1215*8.5027] = 0 # no flux bluewards of Lya
+	sup_flux = sup_fluxes[j]
 	
 	if j == 0: lab = '(%s)'%(j+1)
 	else: lab = '(%s)'%(j+1)
@@ -161,11 +164,7 @@ inset = inset_axes(ax, width="8.1%", height=2.1,loc=3,\
 ax_01 = plt.gca()
 
 for j in range(4):
-	sup_flux = spec.copy()
-	sup_flux *= 1 + j*0.1 # just to stagger them
-	sup_flux[zwave < 0.1215*8.5027] = 0 # no flux bluewards
-	
-	ax_01.plot(zwave,sup_flux,color=colors[j],zorder=3-j)	
+	ax_01.plot(nv_wave,nv_fluxes[j],color=colors[j],zorder=3-j)	
 
 # adding the NV line by hand
 ax_01.axvline(1240*8.5027/1e4,ls='--',color='k',alpha=.5)
@@ -177,6 +176,7 @@ ax_01.yaxis.set_ticks_position('none')
 
 ax_01.set_yscale('log')
 ax_01.set_yticklabels([])
+ax_01.yaxis.set_minor_formatter(plt.NullFormatter()) # (mpl 3 labels the minor ticks of a short log axis)
 ax_01.set_xticklabels([])
 ax_01.set_xlabel('medium res',fontsize=15)
 ax_01.set_xlim(1.045,1.06)
@@ -191,11 +191,7 @@ inset = inset_axes(ax, width="8.4%", height=2.2,loc=8,\
 ax_02 = plt.gca()
 
 for j in range(4):
-	sup_flux = spec.copy()
-	sup_flux *= 1 + j*0.1 # just to stagger them
-	sup_flux[zwave < 0.1215*8.5027] = 0 # no flux bluewards
-
-	ax_02.plot(zwave,sup_flux,color=colors[j],lw=0.8,zorder=3-j)	
+	ax_02.plot(ciii_wave,ciii_fluxes[j],color=colors[j],lw=0.8,zorder=3-j)	
 
 zlines = [1883,1894,1907,1909]
 znames = ['SiIII] $\lambda$1883','SiIII] $\lambda$1892','[CIII]+CIII]','']
@@ -209,6 +205,7 @@ ax_02.yaxis.set_ticks_position('none')
 
 ax_02.set_yscale('log')
 ax_02.set_yticklabels([])
+ax_02.yaxis.set_minor_formatter(plt.NullFormatter()) # (mpl 3 labels the minor ticks of a short log axis)
 ax_02.set_xticklabels([])
 ax_02.set_xlabel('medium res',fontsize=15)
 ax_02.xaxis.set_label_position('top') 
@@ -216,8 +213,9 @@ ax_02.set_xlim(1.59,1.63)
 ax_02.set_ylim(1.5e-15,4e-14)
 # ------------ #
 
-plt.tight_layout()
-plt.savefig('figure.pdf')
+layout.tight(plt.gcf(),'inset-axes-long-plot') # (tight_layout, solved once & reused)
+# the figure as a PDF -- add 'png' and/or 'svg' to get those too, from the same layout
+export.save(plt.gcf(),'figure',['pdf'])
 plt.close('all')
 
 
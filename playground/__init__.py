@@ -0,0 +1,10 @@
+'''
+Shared code and data for the figures in this repository.
+
+Each figure folder still has its own stand-alone script, but anything that
+used to be copied between folders (filter curves, Cloudy models, the IGM
+absorption module) now lives here so there is only one copy of it.
+
+The scripts add the top of the repository to their path, so running them
+from their own folder (or via an alias from anywhere) still works.
+'''
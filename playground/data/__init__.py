@@ -0,0 +1,139 @@
+'''
+One place for the filter curves, Cloudy models, and kernels used by the figures.
+
+The text files in `filters/`, `models/`, and `kernels/` are the canonical
+copies -- they are the files as downloaded (SVO Filter Profile Service,
+MOSFIRE pages, the gaussian kernel calculator) or as written out by Cloudy.  The first time a file is loaded it is converted to
+a binary `.npy` copy in the cache directory, and every load after that (in
+any process) just reads the binary copy.
+
+Loaded arrays are kept around for the rest of the process, so asking for
+the same curve twice doesn't touch the disk twice.  With `mmap=True` the
+binary copy is memory-mapped read-only instead, which lets several render
+workers on the same machine share the same pages.
+
+	>>> from playground import data
+	>>> irac1 = data.load('Spitzer_IRAC.I1.dat')
+	>>> con = data.load('age7z0.2zneb0.2u-2.1_100.con',usecols=[0,6])
+
+Note that the arrays handed back are read-only (they're shared!) -- if you
+want to change one in place, make a copy first.  Better yet, slice it (a
+view costs nothing) and do the math on the way out, e.g. curve[:,0]*1e4.
+
+Everything is stored as float32 by default, which is plenty for plotting and
+halves the memory of every model & curve (which adds up once there are a few
+thousand models around).  Set PLAYGROUND_DTYPE=float64 (or call set_dtype)
+to change that everywhere, or pass dtype= to one load.  The few places where
+float32 isn't enough -- like the IGM optical depths -- promote to float64
+themselves.
+
+Files that aren't part of the package (like the IRAC color tables next to
+their script) can be loaded by path, and get the same binary copy & dtype.
+'''
+
+import os
+import hashlib
+import threading
+import numpy as np
+
+root = os.path.dirname(os.path.abspath(__file__))
+folders = ['filters','models','kernels']
+
+# where the binary copies go -- set PLAYGROUND_CACHE to put them elsewhere
+# (for example somewhere on a RAM disk shared by render workers)
+cache_dir = os.environ.get('PLAYGROUND_CACHE',os.path.join(root,'cache'))
+
+# how arrays are stored & handed back
+default_dtype = np.dtype(os.environ.get('PLAYGROUND_DTYPE','float32'))
+
+_loaded = {} # (name, usecols, mmap, dtype) --> array, for the life of the process
+_lock = threading.Lock()
+
+
+def set_dtype(new):
+	'''Changes the dtype of everything loaded from now on (e.g. 'float64').'''
+	global default_dtype
+	default_dtype = np.dtype(new)
+
+
+def available():
+	'''Lists the names of every dataset in the package.'''
+	names = []
+	for folder in folders:
+		names += sorted(os.listdir(os.path.join(root,folder)))
+	return names
+
+
+def resolve(name):
+	'''
+	Returns the full path to the canonical (text) copy of a dataset.
+	The name is just the file name, e.g. 'mosfire_hband_throughput.txt',
+	or a path to a file somewhere else.
+	'''
+	if os.path.dirname(name) and os.path.exists(name):
+		return os.path.abspath(name)
+	for folder in folders:
+		filename = os.path.join(root,folder,name)
+		if os.path.exists(filename):
+			return filename
+	raise FileNotFoundError(f"no dataset named '{name}' in {root}")
+
+
+def _binary_path(name,usecols,dtype):
+	stem = os.path.splitext(os.path.basename(name))[0]
+	if os.path.dirname(name): # (files outside the package could share a name)
+		stem += '.' + hashlib.sha1(os.path.abspath(name).encode()).hexdigest()[:8]
+	if usecols is not None:
+		stem += '.cols' + '-'.join(str(c) for c in usecols)
+	return os.path.join(cache_dir,f'{stem}.{dtype.name}.npy')
+
+
+def _build_binary(name,usecols,dtype):
+	'''Writes the binary copy if it's missing or older than the text file.'''
+	source = resolve(name)
+	binary = _binary_path(name,usecols,dtype)
+	if os.path.exists(binary) and os.path.getmtime(binary) >= os.path.getmtime(source):
+		return binary
+
+	os.makedirs(cache_dir,exist_ok=True)
+	table = np.loadtxt(source,usecols=usecols).astype(dtype)
+
+	# writing to a temporary file first, so that another worker never
+	# ends up memory-mapping half of a file
+	tmp = f'{binary}.{os.getpid()}.{threading.get_ident()}.tmp'
+	with open(tmp,'wb') as f:
+		np.save(f,table)
+	os.replace(tmp,binary)
+	return binary
+
+
+def load(name,usecols=None,mmap=False,dtype=None):
+	'''
+	Loads a dataset as a (read-only) numpy array.
+
+	name		the file name of the dataset, e.g. 'Spitzer_IRAC.I1.dat'
+	usecols		columns to keep, same as for np.loadtxt
+	mmap		if True, memory-maps the binary copy instead of reading it in
+	dtype		defaults to `default_dtype` (float32)
+	'''
+	if usecols is not None:
+		usecols = tuple(usecols)
+	dtype = np.dtype(dtype or default_dtype)
+	key = (name,usecols,mmap,dtype)
+
+	with _lock:
+		if key not in _loaded:
+			binary = _build_binary(name,usecols,dtype)
+			if mmap:
+				table = np.load(binary,mmap_mode='r')
+			else:
+				table = np.load(binary)
+				table.setflags(write=False)
+			_loaded[key] = table
+		return _loaded[key]
+
+
+def clear():
+	'''Forgets everything loaded so far (the binary copies stay on disk).'''
+	with _lock:
+		_loaded.clear()
@@ -0,0 +1,185 @@
+'''
+Plotting millions of points (e.g. the IRAC colors & redshifts of a whole
+catalog of observed galaxies) as one image of how many land in each pixel,
+instead of one marker each.
+
+ax.scatter with 10^6-10^7 points draws every marker, and writes every one of
+them into a PDF -- hundreds of MB, and minutes to open.  Here the points are
+counted into a 2D histogram with one bin per pixel of the axes (at the dpi
+the figure will be saved at), and the histogram is drawn with a single
+imshow underneath everything else, so the model tracks stay on top.  The
+file holds one image, however many points went into it.
+
+The points are added a chunk at a time (each chunk is one np.bincount), so
+the only thing kept in memory is the grid of counts -- the catalog itself
+can be streamed from disk (`stream_table` reads a .npy or FITS table a block
+of rows at a time, memory-mapped).
+
+With `classes`, each point also has a class (say 0 for star-forming & 1 for
+quiescent, or a bin of stellar mass), and every class is counted in its own
+channel.  The image then gets its color from the mix of classes in each
+pixel, and its opacity from how many points there are in total.
+
+	>>> grid = for_axes(ax,classes=2)
+	>>> for z,color,kind in stream_table('catalog.npy',[0,1,2]):
+	... 	grid.add(z,color,kind)
+	>>> grid.draw(ax,colors=['#1F618D','#C14219'])
+
+(the grid is linear in x & y, so it's for axes with linear scales)
+'''
+
+import numpy as np
+import matplotlib
+import matplotlib.colors as mcolors
+from playground.streamhist import iter_blocks
+
+
+class DensityGrid:
+	'''
+	Running 2D histogram of points over xlim & ylim.
+
+	shape		(ny,nx), the number of bins -- use for_axes to get one
+			bin per pixel
+	classes		how many classes of points to count separately
+	'''
+	def __init__(self,xlim,ylim,shape,classes=1):
+		self.xlim = (float(xlim[0]),float(xlim[1]))
+		self.ylim = (float(ylim[0]),float(ylim[1]))
+		self.shape = tuple(int(n) for n in shape)
+		self.classes = classes
+		self.counts = np.zeros((classes,)+self.shape,dtype=np.int64)
+		self.outside = 0 # points outside of the limits (or not finite)
+
+	def add(self,x,y,cls=None,weights=None):
+		'''
+		Adds a chunk of points.  cls is each point's class (0 to
+		classes-1), and weights (integers) count a point more than once.
+		'''
+		x,y = np.asarray(x,dtype=float).ravel(),np.asarray(y,dtype=float).ravel()
+		ny,nx = self.shape
+		ix = np.floor((x - self.xlim[0]) * (nx / (self.xlim[1] - self.xlim[0])))
+		iy = np.floor((y - self.ylim[0]) * (ny / (self.ylim[1] - self.ylim[0])))
+		inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny) # (NaNs are never inside)
+		self.outside += len(x) - np.count_nonzero(inside)
+
+		indx = iy[inside].astype(np.int64) * nx + ix[inside].astype(np.int64)
+		if cls is not None:
+			cls = np.broadcast_to(np.asarray(cls,dtype=np.int64),x.shape)[inside]
+			if len(cls) and (cls.min() < 0 or cls.max() >= self.classes):
+				raise ValueError(f'classes go from 0 to {self.classes-1}, got {cls.min()} to {cls.max()}')
+			indx = indx + cls * (ny * nx)
+		if weights is not None:
+			weights = np.broadcast_to(np.asarray(weights),x.shape)[inside]
+		counts = np.bincount(indx,weights=weights,minlength=self.counts.size)
+		self.counts += counts.astype(np.int64).reshape(self.counts.shape)
+
+	@property
+	def total(self):
+		'''The counts summed over the classes, (ny,nx).'''
+		return self.counts.sum(axis=0)
+
+	@property
+	def extent(self):
+		return (*self.xlim,*self.ylim)
+
+	def image(self,colors=None,cmap='Greys',vmax=None,floor=0.2):
+		'''
+		The grid as an (ny,nx,4) RGBA image, log-scaled in the counts up to
+		vmax (defaults to the fullest pixel).  Empty pixels are transparent.
+
+		colors		one color per class: each pixel is the mix of the
+				classes in it, with an opacity (from `floor` up to 1)
+				that grows with the total count
+		cmap		with one class & no colors, the colormap the
+				log-scaled counts are shown with instead
+		'''
+		total = self.total
+		vmax = vmax or max(total.max(),1)
+		level = np.log1p(np.minimum(total,vmax)) / np.log1p(vmax)
+		empty = total == 0
+
+		if colors is None and self.classes == 1:
+			rgba = matplotlib.colormaps.get_cmap(cmap)(level)
+		else:
+			if colors is None:
+				colors = [f'C{i}' for i in range(self.classes)]
+			rgb = mcolors.to_rgba_array(colors)[:,:3] # (classes,3)
+			with np.errstate(invalid='ignore',divide='ignore'):
+				fractions = self.counts / total # (classes,ny,nx)
+			rgba = np.ones(self.shape+(4,))
+			rgba[...,:3] = np.einsum('cyx,ck->yxk',np.nan_to_num(fractions),rgb)
+			rgba[...,3] = floor + (1 - floor) * level
+		rgba[empty,3] = 0
+		return rgba
+
+	def draw(self,ax,colors=None,cmap='Greys',vmax=None,floor=0.2,zorder=0,**kwargs):
+		'''
+		Draws the grid on ax as one image, underneath everything else
+		(zorder 0) -- the axes limits are left as they are.
+		'''
+		xlim,ylim = ax.get_xlim(),ax.get_ylim()
+		im = ax.imshow(self.image(colors,cmap,vmax,floor),extent=self.extent,origin='lower',
+					   aspect='auto',interpolation='nearest',zorder=zorder,**kwargs)
+		ax.set_xlim(xlim)
+		ax.set_ylim(ylim)
+		return im
+
+
+def for_axes(ax,xlim=None,ylim=None,classes=1,dpi=None):
+	'''
+	A DensityGrid with one bin per pixel of ax, when the figure is saved
+	at `dpi` (defaults to savefig.dpi), over xlim & ylim (defaults to the
+	current limits of ax).  Set the layout first, so the axes is the size
+	it's going to be.
+	'''
+	fig = ax.figure
+	dpi = dpi or matplotlib.rcParams['savefig.dpi']
+	dpi = fig.dpi if dpi == 'figure' else dpi
+	box = ax.get_position()
+	nx = max(1,round(box.width * fig.get_figwidth() * dpi))
+	ny = max(1,round(box.height * fig.get_figheight() * dpi))
+	return DensityGrid(xlim or ax.get_xlim(),ylim or ax.get_ylim(),(ny,nx),classes=classes)
+
+
+def iter_columns(table,columns,block_size=2**24):
+	'''
+	Yields the columns of a 2D table (rows of points) a block of rows at a
+	time, as lists of 1D arrays -- the same blocks as streamhist.iter_blocks.
+	'''
+	for block in iter_blocks(table,block_size):
+		yield [np.asarray(block[:,c]) for c in columns]
+
+
+def stream_table(filename,columns,hdu=1,block_size=2**24):
+	'''
+	Reads the columns of a table on disk a block of rows at a time.
+
+	filename	a .npy file of shape (npoints,ncolumns), memory-mapped,
+			or a FITS binary table (columns can be names, then)
+	columns		which columns to hand back, e.g. [0,1] or ['Z','CH1_CH2']
+	block_size	roughly how many bytes of the table to read at a time
+			(counting a block takes a few times that, for a moment)
+	'''
+	if filename.endswith('.npy'):
+		table = np.load(filename,mmap_mode='r')
+		yield from iter_columns(table,columns,block_size)
+		return
+
+	import astropy.io.fits as fits
+	with fits.open(filename,memmap=True) as hdul:
+		table = hdul[hdu].data
+		rows = max(1,block_size // max(table.dtype.itemsize,1))
+		for start in range(0,len(table),rows):
+			block = table[start:start+rows]
+			yield [np.asarray(block.field(c)) for c in columns]
+
+
+def density(chunks,xlim,ylim,shape,classes=1):
+	'''
+	A DensityGrid from an iterable of chunks, each (x,y) or (x,y,cls) --
+	e.g. stream_table(...) -- only ever holding one chunk at a time.
+	'''
+	grid = DensityGrid(xlim,ylim,shape,classes=classes)
+	for chunk in chunks:
+		grid.add(*chunk)
+	return grid
@@ -0,0 +1,317 @@
+'''
+A dither-pattern simulator for slit spectroscopy (MOSFIRE-style nodding),
+generalizing the hand-placed ABAB frames of `dither-patterns-MOSFIRE`.
+
+Give it a slit length, a nod amplitude, and a pattern -- 'ABAB', 'ABBA',
+or a list of custom offsets (arcsec along the slit) -- and it works out:
+
+	- where the object lands in the slit in each exposure
+	- the part of the slit covered by sky that's in every exposure, for
+	  each nod position (the green "Dither A/B" regions)
+	- the overlap of all of those, i.e. where it's safe to put the object
+	  (the blue region), and where the object ends up in the final stack
+
+The geometry is all numpy, broadcast over any number of setups at once
+(see `geometry`), so sweeping through lots of slit lengths & amplitudes is
+cheap.  `frames` turns one setup into the same storyboard as the original
+figure, and DitherFigure draws every frame on one figure, just moving and
+hiding its artists between frames.  `animate` strings the frames together
+into a (blitted, tweened) animation.
+
+	>>> setup = geometry(13.5,1.5,'ABAB',position=0.75)
+	>>> fig = DitherFigure(13.5)
+	>>> for i,spec in enumerate(frames(setup)):
+	... 	fig.show(spec)
+	... 	fig.save(f'frame_{i}.png')
+
+All positions are arcsec from the center of the slit.
+'''
+
+import numpy as np
+import matplotlib.patheffects as PathEffects
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle, Circle, FancyArrowPatch
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from playground import textcache
+
+# colors from the original figure
+colors = {'star':'#F4D03F','nod':'#9C8218','stack':'#F4DC7F','bad':'#9C3918',
+		  'fill':'#ADCBAD','safe':'#C1DCEE','nod_text':'#71976F','safe_text':'#5DADE2'}
+
+
+def pattern_offsets(pattern,amplitude):
+	'''
+	Nod offsets (arcsec) for a named pattern, e.g. 'ABAB' or 'ABBA' -- A is
+	+amplitude and B is -amplitude -- or a list of custom offsets.
+	'''
+	if isinstance(pattern,str):
+		sign = {'A':1.,'B':-1.}
+		return np.array([sign[p] for p in pattern.upper()]) * amplitude
+	return np.asarray(pattern,dtype=float)
+
+
+def geometry(slit_length,amplitude,pattern='ABAB',position=0.,margin=0.):
+	'''
+	The dither geometry for one setup, or many at once: slit_length,
+	amplitude, position (the object's nominal position), and margin (how
+	far to stay from the slit ends, e.g. for seeing) can all be arrays.
+	Custom offsets can be an (nsetups,nexposures) array.
+
+	Returns a dictionary of arrays, with a last axis of nexposures where
+	it's per exposure:
+
+		offsets		nod offset of each exposure
+		objects		where the object is in the slit in each exposure
+		fills		(...,nexp,2) slit region covered in every exposure,
+				as seen in each exposure
+		safe		(...,2) the overlap of all the fills
+		stack		where the object is in the final (shifted) stack
+		ok		whether the object stays in the safe region
+	'''
+	offsets = pattern_offsets(pattern,np.asarray(amplitude,dtype=float)[...,None])
+	half = np.asarray(slit_length,dtype=float)[...,None]/2 - np.asarray(margin,dtype=float)[...,None]
+	position = np.asarray(position,dtype=float)
+
+	lo,hi = offsets.min(axis=-1,keepdims=True),offsets.max(axis=-1,keepdims=True)
+	# sky that's in the slit for every exposure, in each exposure's slit frame
+	fills = np.stack([-half + (offsets - lo),half - (hi - offsets)],axis=-1)
+	safe = np.stack([fills[...,0].max(axis=-1),fills[...,1].min(axis=-1)],axis=-1)
+
+	objects = position[...,None] + offsets
+	stack = objects.mean(axis=-1)
+	ok = (objects.min(axis=-1) >= safe[...,0]) & (objects.max(axis=-1) <= safe[...,1])
+	return {'slit_length':np.asarray(slit_length,dtype=float),'offsets':offsets,
+			'objects':objects,'fills':fills,'safe':safe,'stack':stack,'ok':ok}
+
+
+def frames(setup,names=None):
+	'''
+	The storyboard of the original figure for one setup: the object in the
+	slit, each exposure, the safe overlap, the final stack, the dither
+	amplitudes, and a spot where the object should *not* go.
+	Returns a list of frame specs for DitherFigure.show.
+	'''
+	offsets,objects = setup['offsets'],setup['objects']
+	safe,stack = setup['safe'],float(setup['stack'])
+	if names is None: # A, B, C, ... for each distinct offset
+		distinct = list(dict.fromkeys(np.round(offsets,6)))
+		names = ['Dither %s'%('ABCDEFGH'[distinct.index(o)]) for o in np.round(offsets,6)]
+	first = float(objects[0]) # (where it's put, for the first exposure)
+
+	specs = [{'stars':[(first,colors['star'])]},
+			 {'stars':[(first,colors['star'])],'label':('object in slit',colors['star'],19),
+			  'pointers':[first]}]
+
+	for i in range(len(offsets)):
+		specs.append({'fill':(*setup['fills'][i],colors['fill']),
+					  'stars':[(float(objects[i]),colors['star'])],
+					  'label':(names[i],colors['nod_text'],19),'pointers':[float(objects[i])]})
+
+	# the space lost at either end of the slit, & the nod positions
+	half = float(setup['slit_length'])/2
+	lost = [(float(safe[1]),half,'%.1f" dither\nspace'%(half-safe[1])),
+			(-half,float(safe[0]),'%.1f" dither\nspace'%(safe[0]+half))]
+	positions = sorted(set(np.round(objects,6)))
+	nods = [(p,colors['nod']) for p in positions]
+	both = {'fill':(*safe,colors['safe']),'spans':lost}
+
+	specs.append({**both,'stars':nods,'label':('safe space in both dithers\n      for object location',
+					colors['safe_text'],20),'pointers':positions})
+	specs.append({**both,'stars':nods+[(stack,colors['stack'])],
+				  'label':('location of object\n   in final stack',colors['safe_text'],20),
+				  'pointers':[stack]})
+	amplitudes = [(stack,p,('%+.1f" dither'%(p-stack)).replace('-','$-$')) for p in positions if p != stack]
+	specs.append({**both,'stars':nods+[(stack,colors['stack'])],'spans':lost,'ticks':amplitudes})
+
+	# on the edge of the safe region (half of the object's light is lost)
+	bad = float(safe[1])
+	specs.append({'fill':(*safe,colors['safe']),'stars':[(bad,colors['bad'])],
+				  'label':('DO NOT PUT\nOBJECT HERE',colors['bad'],20),'label_at':stack})
+	return specs
+
+
+class DitherFigure:
+	'''
+	One figure for every frame: the slit, the fill region, the stars, the
+	labels & the dimension markers are all made once, and `show` moves,
+	restyles, or hides them for each frame.
+
+	max_stars, max_spans	how many of each to keep ready
+	'''
+	def __init__(self,slit_length,figsize=(9,6),max_stars=4,max_spans=4):
+		self.fig = Figure(figsize=figsize)
+		FigureCanvasAgg(self.fig)
+		ax = self.fig.add_axes([0.02,0.02,0.96,0.96],xlim=(-0.6,1.75),ylim=(-0.4,1.2))
+		ax.axis('off')
+		self.ax = ax
+		self.scale = 1.35 / slit_length # plot units per arcsec, as in the original
+
+		self.slit = ax.add_patch(Rectangle((-0.2,-0.3),0.35,1.35,facecolor='none',edgecolor='k',lw=2.7))
+		self.fill = ax.add_patch(Rectangle((-0.2,0),0.35,1,zorder=0,edgecolor='k',lw=2.5,ls='--'))
+
+		self.stars = [ax.add_patch(Circle((-0.02,0),0.03,edgecolor='k',lw=2.2,zorder=10))
+						for i in range(max_stars)]
+		self.pointers = [ax.plot([],[],color='k',lw=2)[0] for i in range(max_stars)]
+		self.label = ax.text(0.34,0,'',zorder=11)
+		self.label.set_path_effects([PathEffects.withStroke(linewidth=2,foreground='k')])
+
+		self.spans,self.span_text = [],[]
+		for i in range(max_spans):
+			arrow = FancyArrowPatch((0,0),(0,1),arrowstyle='|-|',mutation_scale=6,lw=2,color='k')
+			self.spans.append(ax.add_patch(arrow))
+			self.span_text.append(ax.text(0,0,'',fontsize=17,va='center'))
+
+	def _y(self,arcsec):
+		return 0.375 + arcsec*self.scale
+
+	def show(self,spec):
+		'''Updates the artists for one frame spec (see `frames`).'''
+		fill = spec.get('fill')
+		self.fill.set_visible(fill is not None)
+		if fill is not None:
+			y0,y1,color = fill
+			self.fill.set_y(self._y(y0))
+			self.fill.set_height((y1-y0)*self.scale)
+			self.fill.set_facecolor(color)
+
+		stars = spec.get('stars',[])
+		for i,star in enumerate(self.stars):
+			star.set_visible(i < len(stars))
+			if i < len(stars):
+				star.set_center((-0.02,self._y(stars[i][0])))
+				star.set_facecolor(stars[i][1])
+
+		label = spec.get('label')
+		self.label.set_visible(label is not None)
+		pointers = spec.get('pointers',[])
+		if label is not None:
+			text,color,size = label
+			where = np.mean(pointers) if pointers else spec.get('label_at',0)
+			ytext = self._y(where) + 0.1
+			self.label.set_text(text)
+			self.label.set_color(color)
+			self.label.set_fontsize(size)
+			self.label.set_y(ytext)
+		for i,line in enumerate(self.pointers): # lines from the objects to the label
+			line.set_visible(label is not None and i < len(pointers))
+			if line.get_visible():
+				line.set_data([0.04,0.31],[self._y(pointers[i]),ytext+0.02])
+
+		# dimension markers, on the left side for the slit & inside it for the
+		# ticks (their labels out past the slit's edge, as in the original)
+		spans = [(y0,y1,text,-0.26,-0.29) for y0,y1,text in spec.get('spans',[])]
+		spans += [(y0,y1,text,0.07,0.187) for y0,y1,text in spec.get('ticks',[])]
+		for i,(arrow,txt) in enumerate(zip(self.spans,self.span_text)):
+			arrow.set_visible(i < len(spans))
+			txt.set_visible(i < len(spans))
+			if i < len(spans):
+				y0,y1,text,x,xtext = spans[i]
+				arrow.set_positions((x,self._y(y0)),(x,self._y(y1)))
+				txt.set_text(text)
+				txt.set_ha('right' if xtext < x else 'left')
+				txt.set_position((xtext,self._y((y0+y1)/2)))
+
+	def save(self,filename,**kwargs):
+		self.fig.savefig(filename,**kwargs)
+
+	def scene(self):
+		'''
+		A playground.scene.Scene with every artist registered by name (the
+		slit is the only static one), for blitted animations.
+		'''
+		from playground.scene import Scene
+		scene = Scene(self.fig)
+		scene.add('slit',self.slit,static=True)
+		scene.add('fill',self.fill)
+		scene.add('label',self.label)
+		for i,(star,line) in enumerate(zip(self.stars,self.pointers)):
+			scene.add(f'star{i}',star)
+			scene.add(f'pointer{i}',line)
+		for i,(arrow,txt) in enumerate(zip(self.spans,self.span_text)):
+			scene.add(f'span{i}',arrow)
+			scene.add(f'span_text{i}',txt)
+		return scene
+
+
+def render(setup,filename='frame_{i}.png',fig=None,**kwargs):
+	'''
+	Renders all of the frames of one setup, reusing `fig` (a DitherFigure)
+	if given -- pass the same one in for every setup of a parameter sweep.
+	Returns the file names written.
+	'''
+	fig = fig or DitherFigure(float(setup['slit_length']))
+	fig.scale = 1.35 / float(setup['slit_length'])
+	names = []
+	with textcache.installed(): # the outlined labels are the same in every frame
+		for i,spec in enumerate(frames(setup)):
+			fig.show(spec)
+			names.append(filename.format(i=i))
+			fig.save(names[-1],**kwargs)
+	return names
+
+
+def timeline(n_keyframes,tween=10,held=30):
+	'''
+	(keyframe,t) for every frame of an animation: t=1 is the keyframe itself
+	(held for `held` frames), and t<1 is partway there from the one before.
+	'''
+	steps = []
+	for k in range(n_keyframes):
+		if k > 0:
+			steps += [(k,step/(tween+1)) for step in range(1,tween+1)]
+		steps += [(k,1.)] * held
+	return steps
+
+
+def frame_range(setup,start=0,stop=None,fps=30,tween=10,hold=1.0,fig=None,blit=True):
+	'''
+	Yields the RGBA frames start to stop-1 of the animation of one setup
+	(see `animate`), so that a chunk of it can be rendered on its own.
+	'''
+	from playground import scene as sc
+	fig = fig or DitherFigure(float(setup['slit_length']))
+	fig.scale = 1.35 / float(setup['slit_length'])
+	scene = fig.scene()
+	specs = frames(setup)
+	steps = timeline(len(specs),tween,max(int(round(hold*fps)),1))
+
+	shots,shown,last,image = {},None,None,None
+	for k,t in steps[start:stop]:
+		if (k,t) == last: # (a held frame)
+			yield image
+			continue
+		for j in ([k-1,k] if t < 1 and k > 0 else [k]):
+			if j not in shots:
+				fig.show(specs[j])
+				shots[j],shown = scene.snapshot(),j
+		if shown != k:
+			fig.show(specs[k])
+			shown = k
+		deltas = shots[k] if t >= 1 else sc.tween(shots[k-1],shots[k],t)
+		image = scene.render(deltas,blit=blit)
+		last = (k,t)
+		yield image
+
+
+def animate(setup,filename='dither.gif',fps=30,tween=10,hold=1.0,fig=None,blit=True,workers=1):
+	'''
+	The frames of one setup as an animation, with `tween` in-between frames
+	for each change (stars slide to their new spots, & things fade in & out)
+	and each frame held for `hold` seconds.  Only the parts of the figure
+	that change are redrawn each frame (see playground.scene).
+
+	filename	a .gif or .mp4 -- or None, to get the list of RGBA frames
+	workers		render & encode in this many processes, a chunk of the
+			frames each (see playground.encode)
+
+	Returns the file name, or the frames.
+	'''
+	from functools import partial
+	from playground import encode
+	kwargs = dict(fps=fps,tween=tween,hold=hold,blit=blit)
+	if filename is None:
+		return list(frame_range(setup,fig=fig,**kwargs))
+
+	n_frames = len(timeline(len(frames(setup)),tween,max(int(round(hold*fps)),1)))
+	render = partial(frame_range,setup,fig=fig if workers <= 1 else None,**kwargs)
+	return encode.save(render,n_frames,filename,fps=fps,workers=workers)
@@ -0,0 +1,210 @@
+'''
+Rendering & encoding long animations in chunks, one process per chunk, and
+then stitching the chunks together -- instead of one `anim.save` rendering
+and encoding every frame in a row.
+
+The frames come from a function, frames(start,stop), that yields RGBA
+arrays (e.g. from playground.scene.Scene.render, or a canvas' buffer_rgba)
+for frames start to stop-1.  Each process calls it for its own chunk --
+building its own figure the first time it's called -- and encodes that
+chunk into a segment file.  The segments are then joined without being
+re-encoded:
+
+	GIF	the segments' image blocks are copied into one file, each
+		segment's palette riding along as a local color table
+	MP4	ffmpeg's concat demuxer, with `-c copy`
+
+	>>> save(render_frames,480,'figure.gif',fps=60,workers=8)
+
+The frame function has to be picklable (defined at the top level of a
+module or script).  If it's in a script, put the call to `save` under
+`if __name__ == '__main__':`, so the workers don't start saving too.
+'''
+
+import os
+import shutil
+import subprocess
+import numpy as np
+
+
+def segments(n_frames,workers,chunk=None):
+	'''(start,stop) of each chunk -- an even split by default.'''
+	chunk = chunk or -(-n_frames // max(workers,1))
+	return [(start,min(start+chunk,n_frames)) for start in range(0,n_frames,chunk)]
+
+
+# -- GIF
+
+def write_gif(frames,filename,fps=30,loop=0):
+	'''Encodes RGBA (or RGB) frames into a GIF, with Pillow.'''
+	from PIL import Image
+	images = (Image.fromarray(np.ascontiguousarray(frame[...,:3])) for frame in frames)
+	first = next(images)
+	first.save(filename,save_all=True,append_images=images,
+				duration=int(round(1000/fps)),loop=loop)
+	return filename
+
+
+def _sub_blocks(data,i):
+	# skips over a run of data sub-blocks, returning where the next block starts
+	while data[i]:
+		i += data[i] + 1
+	return i + 1
+
+
+def _gif_parts(data):
+	'''
+	Splits a GIF into its header (signature & logical screen descriptor),
+	its global color table, its application extensions (e.g. looping), and
+	its frames (each one's graphic control extension + image).
+	'''
+	if data[:3] != b'GIF':
+		raise ValueError('not a GIF')
+	packed = data[10]
+	i = 13
+	table = b''
+	if packed & 0x80:
+		table = data[i:i + 3*2**((packed & 7)+1)]
+		i += len(table)
+	header = data[:10] + bytes([packed]) + data[11:13]
+
+	extensions,frames,pending = [],[],b''
+	while i < len(data) and data[i] != 0x3B: # 0x3B ends the file
+		start = i
+		if data[i] == 0x21: # extension
+			i = _sub_blocks(data,i+2)
+			if data[start+1] == 0xF9: # graphic control, belongs to the next image
+				pending += data[start:i]
+			elif data[start+1] == 0xFF and not frames:
+				extensions.append(data[start:i])
+		elif data[i] == 0x2C: # image descriptor
+			local = data[i+9]
+			i += 10
+			if local & 0x80:
+				i += 3*2**((local & 7)+1)
+			i = _sub_blocks(data,i+1) # (skipping the LZW code size first)
+			frames.append(pending + data[start:i])
+			pending = b''
+		else:
+			raise ValueError(f'unexpected GIF block {data[i]:#x} at byte {i}')
+	return header,table,extensions,frames
+
+
+def _with_local_table(frame,table):
+	'''Gives a frame that uses the global color table its own copy of it.'''
+	i = 0
+	while frame[i] != 0x2C: # skipping past the graphic control extension
+		i = _sub_blocks(frame,i+2)
+	local = frame[i+9]
+	if local & 0x80 or not table:
+		return frame
+	size = len(table).bit_length() - 3 # 3*2**(size+1) bytes
+	local = (local & 0x78) | 0x80 | size
+	return frame[:i+9] + bytes([local]) + table + frame[i+10:]
+
+
+def join_gifs(parts,filename):
+	'''Joins GIF segments (of the same size) into one, without re-encoding.'''
+	pieces = []
+	for n,part in enumerate(parts):
+		with open(part,'rb') as f:
+			header,table,extensions,frames = _gif_parts(f.read())
+		if n == 0:
+			pieces += [header,table] + extensions + frames
+			first = header
+		else:
+			if header[6:10] != first[6:10]:
+				raise ValueError(f'{part} is not the same size as {parts[0]}')
+			pieces += [_with_local_table(frame,table) for frame in frames]
+	with open(filename,'wb') as f:
+		f.write(b''.join(pieces) + b'\x3b')
+	return filename
+
+
+# -- MP4
+
+def ffmpeg_path():
+	import matplotlib
+	path = shutil.which(matplotlib.rcParams['animation.ffmpeg_path'])
+	if path is None:
+		raise RuntimeError('ffmpeg was not found (see rcParams["animation.ffmpeg_path"])')
+	return path
+
+
+def write_mp4(frames,filename,fps=30,crf=18):
+	'''Encodes RGBA frames into an H.264 MP4, piping them to ffmpeg.'''
+	frames = iter(frames)
+	first = next(frames)
+	ny,nx = first.shape[:2]
+	command = [ffmpeg_path(),'-y','-loglevel','error',
+				'-f','rawvideo','-pix_fmt','rgba','-s',f'{nx}x{ny}','-r',str(fps),'-i','-',
+				'-vf','pad=ceil(iw/2)*2:ceil(ih/2)*2', # yuv420p needs even sizes
+				'-c:v','libx264','-pix_fmt','yuv420p','-crf',str(crf),filename]
+	process = subprocess.Popen(command,stdin=subprocess.PIPE)
+	try:
+		process.stdin.write(np.ascontiguousarray(first[...,:4]).tobytes())
+		for frame in frames:
+			process.stdin.write(np.ascontiguousarray(frame[...,:4]).tobytes())
+	finally:
+		process.stdin.close()
+		if process.wait():
+			raise RuntimeError(f'ffmpeg failed writing {filename}')
+	return filename
+
+
+def join_mp4s(parts,filename):
+	'''Joins MP4 segments with ffmpeg's concat demuxer (no re-encoding).'''
+	listing = filename + '.segments.txt'
+	with open(listing,'w') as f:
+		for part in parts:
+			f.write("file '%s'\n"%(os.path.abspath(part).replace("'","'\\''")))
+	try:
+		subprocess.run([ffmpeg_path(),'-y','-loglevel','error','-f','concat','-safe','0',
+						'-i',listing,'-c','copy',filename],check=True)
+	finally:
+		os.remove(listing)
+	return filename
+
+
+writers = {'.gif':(write_gif,join_gifs),'.mp4':(write_mp4,join_mp4s)}
+
+
+def _encode_segment(job):
+	frames,start,stop,filename,fps = job
+	write,_ = writers[os.path.splitext(filename)[1].lower()]
+	return write(frames(start,stop),filename,fps=fps)
+
+
+def save(frames,n_frames,filename,fps=30,workers=1,chunk=None,keep_segments=False):
+	'''
+	Renders & encodes an animation of n_frames, split into chunks.
+
+	frames		frames(start,stop) yields the RGBA frames start to stop-1
+	filename	a .gif or .mp4
+	workers		number of processes, each rendering & encoding its own chunks
+	chunk		frames per chunk, defaults to one chunk per worker
+
+	Returns the file name.
+	'''
+	ext = os.path.splitext(filename)[1].lower()
+	if ext not in writers:
+		raise ValueError(f"can't write '{ext}' animations, only {', '.join(writers)}")
+	write,join = writers[ext]
+	if workers <= 1 and chunk is None:
+		return write(frames(0,n_frames),filename,fps=fps)
+
+	stem = os.path.splitext(filename)[0]
+	jobs = [(frames,start,stop,f'{stem}_part{n:04d}{ext}',fps)
+				for n,(start,stop) in enumerate(segments(n_frames,workers,chunk))]
+	if workers <= 1:
+		parts = [_encode_segment(job) for job in jobs]
+	else:
+		from concurrent.futures import ProcessPoolExecutor
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			parts = list(pool.map(_encode_segment,jobs))
+
+	join(parts,filename)
+	if not keep_segments:
+		for part in parts:
+			os.remove(part)
+	return filename
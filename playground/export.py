@@ -0,0 +1,193 @@
+'''
+Saving one figure in several formats -- a PDF for the paper, a PNG for the
+slides, an SVG for the web -- without laying it out & drawing it from
+scratch for each one.
+
+	>>> export.save(fig,'figure',['pdf','png','svg'],dpi={'png':[150,300]},report=True)
+	layout                0.091 s
+	figure.pdf            0.109 s
+	agg (300 dpi)         0.025 s
+	figure_150dpi.png     0.078 s
+	figure_300dpi.png     0.066 s
+	figure.svg            0.033 s
+
+The layout (tight_layout, constrained layout, ...) is worked out once, and
+then switched off while the files are written, so no format solves it again.
+Vector formats (pdf, svg, eps, ps) each need their own draw, with their own
+backend.  Raster formats (png, jpg, tif, webp) all come from Agg: the figure
+is drawn once at the highest dpi asked for, and every raster file is written
+from that one buffer -- lower dpis are resampled from it (pass resample=False
+to draw each dpi separately instead, e.g. for tiny thumbnails where hinted
+text matters).  The raster files are framed the same way savefig would
+frame them: with savefig.bbox: tight (as in this repository's matplotlibrc)
+or bbox_inches='tight', the tight bounding box is worked out (without
+rasterizing anything) for each dpi, and the shared render is cropped to it.
+
+`save` hands back how long each step took, in seconds.
+'''
+
+import io
+import time
+import numpy as np
+import matplotlib
+from matplotlib.transforms import Bbox
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+raster = {'png':'PNG','jpg':'JPEG','jpeg':'JPEG','tif':'TIFF','tiff':'TIFF','webp':'WEBP'}
+vector = ['pdf','svg','eps','ps']
+
+
+def _dpis(fmt,dpi):
+	if isinstance(dpi,dict):
+		dpi = dpi.get(fmt)
+	if dpi is None or dpi == 'figure':
+		dpi = matplotlib.rcParams['savefig.dpi']
+		if dpi == 'figure':
+			dpi = None # (filled in with the figure's own dpi)
+	return [dpi] if dpi is None or np.isscalar(dpi) else list(dpi)
+
+
+def tight_bbox(fig,dpi=None,pad_inches=None):
+	'''
+	The box (in inches) savefig(bbox_inches='tight') crops fig to, padded by
+	pad_inches (defaults to savefig.pad_inches).
+	'''
+	if pad_inches is None:
+		pad_inches = matplotlib.rcParams['savefig.pad_inches']
+	if pad_inches == 'layout': # (constrained layout's own padding, if it has one)
+		pads = getattr(fig.get_layout_engine(),'get',dict)()
+		w_pad,h_pad = pads.get('w_pad',0.),pads.get('h_pad',0.)
+	else:
+		w_pad = h_pad = pad_inches
+	canvas,original_dpi = fig.canvas,fig.dpi
+	try:
+		fig.dpi = dpi or original_dpi
+		renderer = FigureCanvasAgg(fig).get_renderer()
+		fig.draw_without_rendering() # (where everything goes, like savefig does)
+		return fig.get_tightbbox(renderer).padded(w_pad,h_pad)
+	finally:
+		fig.set_canvas(canvas)
+		fig.dpi = original_dpi
+
+
+def frame(fig,bbox_inches=None,pad_inches=None,dpi=None):
+	'''
+	The part of the figure (in inches) that savefig writes out: bbox_inches
+	can be 'tight', 'standard' (the whole figure), or a Bbox, and defaults
+	to savefig.bbox.
+	'''
+	if bbox_inches is None:
+		bbox_inches = matplotlib.rcParams['savefig.bbox']
+	if isinstance(bbox_inches,str) and bbox_inches == 'tight':
+		return tight_bbox(fig,dpi,pad_inches)
+	if bbox_inches is None or isinstance(bbox_inches,str):
+		return Bbox.from_bounds(0,0,*fig.get_size_inches())
+	return bbox_inches
+
+
+def render_agg(fig,dpi,bbox_inches=None,pad_inches=None,**kwargs):
+	'''
+	Draws the figure with Agg at this dpi, as an (ny,nx,4) RGBA array --
+	cropped to `frame(fig,bbox_inches,pad_inches)`, so it's the same image
+	savefig would write.  Other keywords (transparent, facecolor, ...) go to
+	savefig.
+	'''
+	bbox = frame(fig,bbox_inches,pad_inches,dpi)
+	buffer = io.BytesIO()
+	fig.savefig(buffer,format='rgba',dpi=dpi,bbox_inches=bbox,pad_inches=0,**kwargs)
+	nx,ny = int(bbox.width*dpi),int(bbox.height*dpi) # (Agg truncates, too)
+	return np.frombuffer(bytearray(buffer.getbuffer()),dtype=np.uint8).reshape(ny,nx,4)
+
+
+def write_raster(image,filename,fmt,dpi):
+	from PIL import Image
+	kwargs = {'dpi':(dpi,dpi)}
+	if raster[fmt] == 'PNG':
+		from PIL.PngImagePlugin import PngInfo
+		kwargs['pnginfo'] = PngInfo()
+		kwargs['pnginfo'].add_text('Software',f'Matplotlib version{matplotlib.__version__}, https://matplotlib.org/')
+	if raster[fmt] == 'JPEG':
+		image = image.convert('RGB')
+	image.save(filename,format=raster[fmt],**kwargs)
+
+
+def save(fig,stem,formats=('pdf','png','svg'),dpi=None,resample=True,report=False,**kwargs):
+	'''
+	Saves fig as stem.pdf, stem.png, etc.
+
+	formats		the file extensions to write
+	dpi		for the raster formats: a number, a list of them, or a
+			dictionary of either by format, e.g. {'png':[150,300]}.
+			When a format has more than one dpi, the files are
+			named stem_150dpi.png etc.  Defaults to savefig.dpi.
+	resample	make lower dpis by resampling the highest-dpi render
+	report		print the timings
+
+	Any other keywords go to savefig.  bbox_inches, pad_inches, transparent,
+	facecolor & edgecolor are used for the shared raster render as well;
+	with anything else, every format goes through savefig on its own.
+	Returns {step: seconds}.
+	'''
+	timings = {}
+	start = time.perf_counter()
+	engine = fig.get_layout_engine()
+	if engine is not None:
+		engine.execute(fig)
+		fig.set_layout_engine('none') # (so savefig doesn't solve it again)
+	timings['layout'] = time.perf_counter() - start
+
+	try:
+		jobs = [] # (filename, format, dpi)
+		for fmt in formats:
+			fmt = fmt.lower().lstrip('.')
+			if fmt not in raster and fmt not in vector:
+				raise ValueError(f"can't export '{fmt}', only {', '.join(list(raster) + vector)}")
+			dpis = _dpis(fmt,dpi) if fmt in raster else [None]
+			for d in dpis:
+				d = d or fig.dpi
+				name = f'{stem}_{d:g}dpi.{fmt}' if len(dpis) > 1 else f'{stem}.{fmt}'
+				jobs.append((name,fmt,d))
+
+		shared = set(kwargs) <= {'bbox_inches','pad_inches','transparent','facecolor','edgecolor'}
+		style = {k:v for k,v in kwargs.items() if k not in ('bbox_inches','pad_inches')}
+		frames,renders = {},{} # dpi --> frame (inches), RGBA array
+		def framed(d):
+			# (a tight box moves a little with the dpi, since the text is
+			# hinted at each size -- finding it is a pass without rasterizing)
+			if d not in frames:
+				t = time.perf_counter()
+				frames[d] = frame(fig,kwargs.get('bbox_inches'),kwargs.get('pad_inches'),d)
+				timings[f'bbox ({d:g} dpi)'] = time.perf_counter() - t
+			return frames[d]
+
+		highest = max([d for _,fmt,d in jobs if fmt in raster],default=None)
+		for name,fmt,d in jobs:
+			if fmt not in raster or not shared:
+				t = time.perf_counter()
+				fig.savefig(name,format=fmt,**({'dpi':d} if fmt in raster else {}),**kwargs)
+				timings[name] = time.perf_counter() - t
+				continue
+			from PIL import Image
+			source = highest if resample else d
+			if source not in renders:
+				bbox = framed(source)
+				t = time.perf_counter()
+				renders[source] = render_agg(fig,source,bbox,**style)
+				timings[f'agg ({source:g} dpi)'] = time.perf_counter() - t
+			t = time.perf_counter()
+			image = Image.fromarray(renders[source])
+			if source != d:
+				bbox = framed(d)
+				size = (max(1,int(bbox.width*d)),max(1,int(bbox.height*d))) # (what savefig would make)
+				image = image.resize(size,Image.LANCZOS)
+			write_raster(image,name,fmt,d)
+			timings[name] = time.perf_counter() - t
+	finally:
+		if engine is not None:
+			fig.set_layout_engine(engine)
+
+	if report:
+		width = max(len(step) for step in timings) + 2
+		for step,seconds in timings.items():
+			print(f'{step:<{width}}{seconds:8.3f} s')
+	return timings
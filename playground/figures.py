@@ -0,0 +1,412 @@
+'''
+Every figure in the repository as a builder: a function that makes the
+figure on its own matplotlib.figure.Figure (with an Agg canvas) and hands it
+back, without touching pyplot.
+
+pyplot keeps one "current figure" & "current axes" for the whole process, so
+two threads both calling plt.figure(), plt.plot(), plt.close('all') end up
+drawing into (and closing) each other's figures.  The builders never ask
+pyplot for anything -- every axes comes from its own figure, and the figure
+is garbage like any other object once you're done with it -- so they can run
+side by side in a thread pool, e.g. inside a web service where starting a
+process per render costs too much memory:
+
+	>>> with ThreadPoolExecutor(8) as pool:
+	... 	futures = [pool.submit(figures.render,'zlines',z) for z in [2.1,5.5,7.5]]
+	... 	pngs = [f.result() for f in futures]			# bytes
+
+	zlines(redshift)	bandpass-zlines
+	irac_color()		redshifted-irac-color (+ a catalog, as a density image)
+	emission_lines()	redshifted-emission-lines
+	big_picture()		big-picture-spectra (with its mock data)
+	imshow_hist(data)	imshow-colorbar-hist (with its fake map by default)
+	dither_frame(setup,i)	one frame of dither-patterns-MOSFIRE
+
+The scripts are just these plus export.save.  The things the builders share
+are all safe to share: loaded data is read-only and loaded under a lock, the
+layout, label-size & text caches have their own locks, and matplotlib keys
+its fonts by thread.  The one thing in matplotlib that isn't -- the mathtext
+parser, which is one object for the whole process -- is only ever used one
+thread at a time while playground.textcache is installed, which `render`
+does around each build & save.  (Calling the builders yourself from several
+threads?  Do it inside `with textcache.installed():`, or textcache.install()
+once first.)
+
+What isn't safe is two threads working on the *same* figure, so a figure
+from a builder belongs to the thread that built it (hand it on when that
+thread is done with it, like `render` does with the bytes).
+'''
+
+import io
+import os
+import numpy as np
+import matplotlib
+import matplotlib.gridspec as gridspec
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from playground import data, density, dither, layout, linemarks, mocks, panels, textcache
+from playground import igm_absorption as igm
+from playground.maphist import MapHistogram
+
+# the folders next to playground/, for data that lives with its figure
+repository = os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir)
+
+
+def new_figure(figsize):
+	'''A figure with its own Agg canvas, that pyplot knows nothing about.'''
+	fig = Figure(figsize=figsize)
+	FigureCanvasAgg(fig)
+	return fig
+
+
+def render(name,*args,fmt='png',dpi=None,**kwargs):
+	'''
+	Builds figure `name` (zlines, irac_color, ...) with args & kwargs, and
+	returns it as bytes in format `fmt`.  Safe to call from any thread.
+	'''
+	with textcache.installed(): # (which also keeps the mathtext parser to one thread at a time)
+		fig = builders[name](*args,**kwargs)
+		buffer = io.BytesIO()
+		fig.savefig(buffer,format=fmt,**({} if dpi is None else {'dpi':dpi}))
+	return buffer.getvalue()
+
+
+# -- bandpass-zlines -- #
+# -------------------- #
+
+def zlines(redshift):
+	'''The redshifted spectrum, its lines, and the NIR & IR bandpasses.'''
+	# Cloudy model provided by Taylor Hutchison
+	# Single stellar population from BPASS with age=10Myr & IMF that goes to 100 Msolar,
+	# Z(stellar)=Z(nebular)=0.2 Zsolar, ionization parameter log_10(U)=-2.1, n_H=300 cm^(-3)
+	z,zneb,u = 0.2,0.2,-2.1
+	model = 'age7z%szneb%su%s_100.con'%(z,zneb,u)
+	con = data.load(model,usecols=[0,6])
+	wave,vfv = con[:,0],con[:,1]
+	nu = 2.998e+14 / wave
+	sed_0 = vfv / nu
+
+	fig = new_figure((16.5,5))
+	ax = fig.add_subplot()
+
+	# ------ reading in filter curves ------ #
+	# HST/WFC3 NIR photometric bandpasses, Keck/MOSFIRE NIR spectroscopic
+	# bandpasses (J & K are in microns, not Angstroms like the rest), and
+	# Spitzer/IRAC IR channels -- http://svo2.cab.inta-csic.es/svo/theory/fps3/
+	curves = ['mosfire_yband_throughput.txt','mosfire_jband_throughput.txt',
+			  'mosfire_hband_throughput.txt','mosfire_kband_throughput.txt',
+			  'HST-WFC3_IR.F105W.dat','HST-WFC3_IR.F160W.dat',
+			  'Spitzer_IRAC.I1.dat','Spitzer_IRAC.I2.dat','Spitzer_IRAC.I3.dat','Spitzer_IRAC.I4.dat']
+
+	# this just provides the colors for the filters and their names for the legend
+	filts = ['MOS Y','MOS J','MOS H','MOS K',\
+			'F105W','F160W','[3.6]','[4.5]','[5.8]','[8.0]']
+	fcolors = ['#1F618D','C0','#5DADE2','C9','none','none',\
+				'#F4D03F','#DA9B27','#DA7B27','#DA4027']
+	flines = ['#1F618D','C0','#5DADE2','C9','#1FAF2F','#7ED487',\
+				'#F4D03F','#DA9B27','#DA7B27','#DA4027']
+	microns = [1e4,1,1e4,1,1e4,1e4,1e4,1e4,1e4,1e4] # what to divide by to get microns
+	for count,name in enumerate(curves):
+		filt = data.load(name)
+		keep = filt[:,0] > 0
+		if not keep.all(): # (otherwise it's just a view, no copy)
+			filt = filt[keep]
+		fwave = filt[:,0] / microns[count]
+		ftrans = filt[:,1] * (1e-14/filt[:,1].max())
+		ax.fill_between(fwave,ftrans,0,alpha=0.3,zorder=0,\
+			label=filts[count],facecolor=fcolors[count],edgecolor=flines[count])
+		ax.plot(fwave,ftrans,alpha=0.8,color=flines[count])
+	# -------------------------------------- #
+
+	# applying IGM absorption depending upon z
+	sed = sed_0 * igm.igm_absorption(wave*1e4*(1+redshift),redshift)
+	ax.plot(wave*(1+redshift),sed,color='k',lw=2.)
+
+	# the line labels are placed automatically, so they don't run into each
+	# other at whatever redshift you give
+	catalog = linemarks.nebular
+	font = np.where(np.isin(catalog['key'],['heii1','oiii]']),13,15)
+	linemarks.LineMarkers(ax,catalog,redshift,y=2e-14,fontsize=font)
+
+	ax.set_yscale('log')
+	ax.set_yticklabels([])
+	ax.tick_params(labelsize=16)
+	ax.set_xlabel(rf'observed wavelength for $z=\,${redshift} [microns]',fontsize=16)
+	ax.set_xlim(0.08*(1+redshift),0.668*(1+redshift))
+	ax.set_ylim(1e-15,3.5e-13)
+
+	leg = ax.legend(frameon=False,loc=9,fontsize=13,ncol=len(filts),\
+		bbox_to_anchor=(0.5,1.12))
+	for lh in leg.legend_handles:
+		lh.set_alpha(1)
+
+	layout.tight(fig,'bandpass-zlines') # (tight_layout, solved once & reused)
+	return fig
+
+
+# -- redshifted-irac-color -- #
+# --------------------------- #
+
+def irac_color(folder=os.path.join(repository,'redshifted-irac-color'),observed=None,
+			   classes=1,class_colors=None,dpi=None):
+	'''
+	Spitzer/IRAC [3.6]-[4.5] colors of the redshifted Cloudy+BPASS models,
+	and where the bright lines sit in each channel.  `folder` holds the
+	irac_color_BPASS_*.txt tables.
+
+	observed	(optional) the redshifts & colors of observed galaxies,
+			drawn underneath the models as a density image (see
+			playground.density): a DensityGrid, or chunks of (z,color)
+			or (z,color,class), e.g. from density.stream_table
+	classes		the number of classes in the chunks
+	class_colors	a color for each class
+	dpi		the dpi the figure will be saved at, so the density
+			image has one bin per pixel
+	'''
+	# reading in Spitzer/IRAC bandpasses
+	irac36 = data.load('Spitzer_IRAC.I1.dat')
+	irac45 = data.load('Spitzer_IRAC.I2.dat')
+
+	# Spitzer/IRAC colors calcuated for redshift Cloudy+BPASS models:
+	# BPASS with age=10Myr, Z(stellar)=Z(nebular)=0.1 Zsolar, n_H=300 cm^(-3),
+	# with binaries (IMF to 300 Msolar) & without (to 100 Msolar), for
+	# log_10(U) = -3.5, -2.5, -1.5 (just the second row, the IRAC colors)
+	models = [[data.load(os.path.join(folder,f'irac_color_BPASS_{kind}_u{u}_Z-0.1.txt'))[1]
+				for u in ['-3.5','-2.5','-1.5']] for kind in ['bin','no-bin']]
+
+	fig = new_figure((11,7))
+	gs1 = gridspec.GridSpec(2,1,figure=fig,height_ratios=[2,1.25],hspace=0.03) # I love gridspec
+
+	zed = np.linspace(1,10,num=100) # range of redshift from 1 to 10
+	cmap = [matplotlib.colormaps['Blues'],matplotlib.colormaps['Reds']] # colormaps for Binary & Single
+	name = [r'with binaries, M$_{up}$: 300 M$_{\odot}$',r'no binaries, M$_{up}$: 100 M$_{\odot}$']
+
+	# top subplot
+	ax = fig.add_subplot(gs1[0])
+	for i in range(2):
+		colors = [cmap[i](j) for j in np.linspace(0,1,7)]
+		colors = colors[1:]
+
+		kwargs = {'edgecolor':'k','s':100}
+		ax.scatter(zed,models[i][0],color=colors[0],label='U: -1.5',**kwargs)
+		ax.scatter(zed,models[i][1],color=colors[2],label='U: -2.5',**kwargs)
+		ax.scatter(zed,models[i][2],color=colors[4],label='U: -3.5',**kwargs)
+
+	# two different legends & a note about the metallicity
+	ax.text(0.02,0.9,r'$Z_* = Z_{neb} = 0.1$ $Z_\odot$',transform=ax.transAxes,fontsize=16)
+	ax.axhline(0,ls=':',color='k',zorder=0) # to guide the eye
+	ax.text(0.05,0.11,name[0],transform=ax.transAxes,fontsize=14) # "with binaries"
+	ax.text(0.05,0.035,name[1],transform=ax.transAxes,fontsize=14) # "no binaries"
+	ax.scatter(1.25,-1.17,s=80,color='C0',edgecolor='k') # color for "with binaries"
+	ax.scatter(1.25,-1.37,s=80,color=colors[2],edgecolor='k') # color for "no binaries"
+
+	ax.legend(loc=4,ncol=2,fontsize=15,columnspacing=0.3,handletextpad=0.2,frameon=True)
+	ax.set_ylabel(r'[3.6]$\endash$[4.5]',fontsize=18)
+	ax.set_xticklabels([]) # because it's the top subplot and we don't need to see them
+	ax.set_xlim(zed[0],zed[-1]) # just to make sure the two subplots are consistent xranges
+
+	if observed is not None: # a whole catalog as one image, under the model tracks
+		grid = observed
+		if not isinstance(grid,density.DensityGrid):
+			grid = density.for_axes(ax,classes=classes,dpi=dpi)
+			for chunk in observed:
+				grid.add(*chunk)
+		grid.draw(ax,colors=class_colors)
+
+	# bottom subplot: regions where the transmission curves for CH1 & CH2
+	# would allow lines to be seen (so above 0.3 for both)
+	ax = fig.add_subplot(gs1[1])
+	lines = {'oii1':3726.1,'oii2':3728.8,'oiii1':4959,'oiii2':5007,'hbeta':4862.68,'ha':6562.8}
+	tag = ['oii1','oii2','hbeta','oiii1','oiii2','ha']
+	names = [r'[OII] $\lambda$3727',r'[OII] $\lambda$3729',r'[OIII] $\lambda$4959',\
+			 r'[OIII] $\lambda$5007', r'H$\beta$ $\lambda$4863',r'H$\alpha$ $\lambda$6563']
+
+	# (only the ends are needed, so just slicing down to them -- no copies)
+	above = np.flatnonzero(irac36[:,1] > 0.3)
+	yes36 = irac36[above[0]:above[-1]+1,0]
+	above = np.flatnonzero(irac45[:,1] > 0.3)
+	yes45 = irac45[above[0]:above[-1]+1,0]
+
+	for l in range(len(names)):
+		rest = lines[tag[l]]
+		ax.plot([yes36[0]/rest-1,yes36[-1]/rest-1],[l,l],lw=4.5,color='C0')
+		ax.plot([yes45[0]/rest-1,yes45[-1]/rest-1],[l,l],lw=4.5,color='#C14219')
+
+	ax.plot([12,12],[l,l],lw=2.5,color='C0',label='[3.6]') # lazy way to make the legend
+	ax.plot([12,12],[l,l],lw=2.5,color='#C14219',label='[4.5]')
+	ax.legend(loc=2,fontsize=15,frameon=True)
+
+	ax.set_xlabel('redshift',fontsize=17)
+	ax.set_ylim(-1,6)
+	ax.set_xlim(zed[0],zed[-1])
+	ax.set_yticks(np.arange(0,6)) # spacing it for the emission line names
+	ax.set_yticklabels(names)
+	return fig
+
+
+# -- redshifted-emission-lines -- #
+# ------------------------------- #
+
+# the lines I use most frequently in my work
+line_waves = {'ha':6562.8,'c.iii]':[1906.8,1908.73],'lya':1215.67,\
+	'c.iv':[1548.19,1550.76],'o.ii':[3726.1,3728.8],'o.iii':[4959.,5007.],\
+	'si.iii]':[1882.71,1892.03],'cii':2326.0,'mg.ii':[2795.53,2802.71],\
+	'n.v':[1238.82,1242.8],'o.iii]':[1660.81,1666.15],\
+	'ne.v':3426,'si.iv':1397.61,'he.ii':1640.4,'he.i':[3889,5876],\
+	's.ii':[6717,6731],'hbeta':4862.68,'ne.iii':3869.81,'n.ii':[6549.81,6585.23],\
+	'si.iv+o.iv]':1400,'niv]':1486,'hdelta':4102.89,'hgamma':4341.68}
+
+
+def emission_lines():
+	'''Where redshifted emission lines land, over the MOSFIRE & IRAC bandpasses.'''
+	lines = ['lya','n.v','c.iv','he.ii','o.iii]','si.iii]','c.iii]','o.ii','hbeta','o.iii','n.ii','ha']
+	names = [r'Ly$\alpha$','N$\,$V','C$\,$IV','He$\,$II','O$\,$III]','Si$\,$III]','C$\,$III]',
+			 '[O$\,$II]',r'H$\beta$','[O$\,$III]','[N$\,$II]',r'H$\alpha$']
+	lst = ['-','--','-.',':','-','--','-.',':','-','--','-.',':']
+
+	cmap = matplotlib.colormaps['RdBu']
+	colors = [cmap(j) for j in np.linspace(0,1,len(lines))]
+	altcol = ['#ECC367','#5E6061','#70A5BC']
+	zed = np.linspace(1,10,num=100)
+
+	fig = new_figure((10,5.5))
+	ax = fig.add_subplot()
+	for i in range(len(lines)):
+		rest = np.atleast_1d(line_waves[lines[i]])[0] # (the bluer of a doublet)
+		color = altcol[i-5] if lines[i] in ['si.iii]','c.iii]','o.ii'] else colors[i]
+		ax.plot((1+zed)*rest/1e4,zed,color=color,label=names[i],ls=lst[i],lw=2.9)
+
+	# plotting regions for filters (MOSFIRE J & K are already in microns)
+	filts = [data.load(name) for name in ['mosfire_yband_throughput.txt','mosfire_jband_throughput.txt',
+			'mosfire_hband_throughput.txt','mosfire_kband_throughput.txt','Spitzer_IRAC.I1.dat',
+			'Spitzer_IRAC.I2.dat','Spitzer_IRAC.I3.dat','Spitzer_IRAC.I4.dat']]
+	names = ['$Y$','$J$','$H$','$K_s$','[3.6]','[4.5]','[5.8]','[8.0]']
+	cmap = matplotlib.colormaps['Blues']
+	colors = [cmap(j) for j in np.linspace(0.1,1,len(filts))]
+
+	for count,f in enumerate(filts):
+		wave,vals = f[:,0],f[:,1]
+		scale = np.median(vals)-np.std(vals)*1.5
+		wave,vals = wave[vals>scale],vals[vals>scale]
+		if count == 1 or count == 3:
+			if count == 1:
+				wave,vals = wave[vals>0.05],vals[vals>0.05]
+			ax.axvspan(wave[0],wave[-1],alpha=0.4,color=colors[count],zorder=0)
+			ax.axvline(wave[0],alpha=0.5,color='k',zorder=0)
+			ax.axvline(wave[-1],alpha=0.5,color='k',zorder=0)
+			ax.text(np.mean(wave)-np.mean(wave)*count/37,10.2,names[count],fontsize=15)
+		else:
+			ax.axvspan(wave[0]/1e4,wave[-1]/1e4,alpha=0.4,color=colors[count],zorder=0)
+			ax.axvline(wave[0]/1e4,alpha=0.5,color='k',zorder=0)
+			ax.axvline(wave[-1]/1e4,alpha=0.5,color='k',zorder=0)
+			nudge = 200 if count != len(filts)-1 else 80
+			ax.text((min(wave)+min(wave)*(count/nudge))/1e4,10.2,names[count],fontsize=15)
+
+	ax.legend()
+	ax.set_xscale('log')
+	ax.set_ylabel('redshift',fontsize=17)
+	ax.set_xlabel('observed wavelength [microns]',fontsize=16)
+	ax.set_xticklabels(['','','1.','10.'])
+	ax.set_ylim(1,10)
+
+	layout.tight(fig,'redshifted-emission-lines') # (tight_layout, solved once & reused)
+	return fig
+
+
+# -- big-picture-spectra -- #
+# ------------------------- #
+
+def big_picture_data(seed=3):
+	'''The fake 1D & 2D spectra, stamp, & errors shown in big-picture-spectra.'''
+	rng = np.random.default_rng(seed=seed)
+	shape = (250,70) # shape of the 2D spectrum
+	xcen, ycen = int(shape[0]/2), int(shape[1]/2)
+
+	spec2d_1 = mocks.mock_2d(1,shape,lines=[[xcen,ycen,35]],rng=rng)[0] # 2D emission line
+	spec1d_1 = mocks.mock_1d(1,shape[0],lines=[[xcen,15]],rng=rng)[0] # Lya 1D emission line
+
+	gauss1d,gauss2d = mocks.kernels()
+	spec2d_2 = spec2d_1.copy()
+	mocks.inject_lines(spec2d_2[None],(xcen+20,ycen),35,gauss2d) # 2D emission line
+	spec1d_2 = spec1d_1.copy()
+	mocks.inject_lines(spec1d_2[None],(xcen+20,),10,gauss1d) # CIII] 1D doublet emission line
+
+	# photometry of 'galaxy', adding signal for galaxy shape
+	galaxy = mocks.mock_stamps(1,(50,35),blobs=[[25,16,25],[27,19,25]],rng=rng)[0]
+	return {'spec2d':[spec2d_1,spec2d_2],'spec1d':[spec1d_1,spec1d_2],'galaxy':galaxy,
+			'wavelength':np.arange(shape[0]), # fake wavelength range
+			'error':mocks.mock_errors(1,shape[0],seed=13)[0]} # fake errors
+
+
+def big_picture(mock=None):
+	'''
+	The F160W stamp with its slits, and the 2D & 1D spectra of Lya & CIII],
+	for `mock` (big_picture_data() by default) -- the layout itself is
+	panels.PanelTemplate, the same one a whole survey is rendered with.
+	'''
+	mock = mock or big_picture_data()
+	wavelength,error1d = mock['wavelength'],mock['error']
+	obj = {'stamp':mock['galaxy'],'stamp_clim':(-1,2),
+		   # the slits (& their years) over the regions in the image,
+		   # the years listed from the bottom up
+		   'slits':[[[[5,23],[5,28],[28,28],[28,23]],'#70B5E3','2017'],
+					[[[7,7],[22,45],[25.5,43],[11,5]],'#CF6060','2016'],
+					[[[15,5],[15,45],[20,45],[20,5]],'#F4D03F','2014']],
+		   'lines':[{'band':'Y','spec2d':mock['spec2d'][0][75:175,28:42].T, # zooming in for the sake of the example
+					 'clim':(-1.5,2.3),'wave':wavelength,'flux':mock['spec1d'][0],'error':error1d,
+					 'xlim':(wavelength[74],wavelength[174])},
+					{'band':'H','spec2d':mock['spec2d'][1][:,15:55].T,
+					 'clim':(-1.5,2.2),'wave':wavelength,'flux':mock['spec1d'][1],'error':error1d}]}
+	template = panels.PanelTemplate()
+	template.render(obj)
+	return template.fig
+
+
+# -- imshow-colorbar-hist -- #
+# -------------------------- #
+
+def fake_map():
+	'''The fake log10(U) map of imshow-colorbar-hist: a galaxy with clumps.'''
+	from astropy.convolution import Gaussian2DKernel
+	image = Gaussian2DKernel(12).array * 3.5
+	clump = Gaussian2DKernel(5).array
+
+	# adding clumps, various stuff
+	size = 8*5 + 1 # the resulting size of Gaussian2DKernel
+	image[int(size/2):int(size*1.5),size:size*2] += clump * 1.25
+	image[:size,:size] += clump * 1.5
+	image[size:size*2,int(size/2):int(size*1.5)] += clump * 0.25
+	image[image.shape[0]-size:,int(size/2):int(size*1.5)] += clump * 0.75
+	image[image.shape[0]-size:,int(size*1.3):int(size*1.3)+size] += clump
+
+	image[image<0.001] = np.nan # some "no galaxy" regions for aesthetics
+	return np.log10(image) # rescaling for vis purposes
+
+
+def imshow_hist(image=None,title='log$_{10}$U',**kwargs):
+	'''
+	A map (already scaled, fake_map() by default), its colorbar, and the
+	histogram linked to the colorbar.  kwargs go to MapHistogram.
+	'''
+	image = fake_map() if image is None else image
+	kwargs = {'cmap':'viridis','bins':40,'axis_at':-2.15,'ticks':np.arange(20,121,20),**kwargs}
+
+	fig = new_figure((10,6))
+	gs0 = gridspec.GridSpec(1,1,figure=fig)
+	MapHistogram(fig,gs0[0],**kwargs).draw(image,title=title)
+	layout.tight(fig,'imshow-colorbar-hist') # (tight_layout, solved once & reused)
+	return fig
+
+
+# -- dither-patterns-MOSFIRE -- #
+# ----------------------------- #
+
+def dither_frame(setup,i):
+	'''Frame i of a dither setup (see playground.dither.geometry).'''
+	frame = dither.DitherFigure(float(setup['slit_length']))
+	frame.show(dither.frames(setup)[i])
+	return frame.fig
+
+
+builders = {'zlines':zlines,'irac_color':irac_color,'emission_lines':emission_lines,
+			'big_picture':big_picture,'imshow_hist':imshow_hist,'dither_frame':dither_frame}
@@ -0,0 +1,125 @@
+'''
+Reading small windows out of big FITS files -- MOSFIRE 2D spectra, HST
+stamps, anything where the full-frame reduction is hundreds of MB but the
+figure only ever shows a small part of it.
+
+Only the requested cutout (e.g. slit rows x a wavelength window) is read,
+through the HDU's `section` -- with memmap=False, since astropy won't
+memory-map a scaled (BSCALE/BZERO) image, and `section` only reads the
+slice either way.  Cutouts
+are cached by (file, slice, HDU), so asking for the same window again (for
+another figure, or another panel of the same one) doesn't touch the file.
+
+	>>> spec2d = cutout('mosfire_Y.fits',(slice(28,42),slice(1075,1175)))
+	>>> spec2d = cutout('mosfire_Y.fits',np.s_[28:42,1075:1175],hdu='SCI')
+
+The cache holds up to `max_bytes` of cutouts (least recently used ones are
+dropped first), and it notices when a file has been changed on disk.
+'''
+
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import astropy.io.fits as fits
+
+max_bytes = 2**28 # 256 MB of cutouts, change it with set_cache_size
+
+_cache = OrderedDict() # key --> read-only cutout, in least- to most-recently used order
+_nbytes = 0
+_lock = threading.Lock()
+
+
+def _normalize(index):
+	'''Makes a slice (or tuple of slices/ints) hashable, for the cache key.'''
+	if not isinstance(index,tuple):
+		index = (index,)
+	key = []
+	for i in index:
+		if isinstance(i,slice):
+			key.append(('slice',i.start,i.stop,i.step))
+		elif i is Ellipsis:
+			key.append(('...',))
+		else:
+			key.append(('int',int(i)))
+	return tuple(key)
+
+
+def set_cache_size(nbytes):
+	'''Changes how many bytes of cutouts are kept around (0 turns it off).'''
+	global max_bytes
+	with _lock:
+		max_bytes = nbytes
+		_evict()
+
+
+def clear_cache():
+	global _nbytes
+	with _lock:
+		_cache.clear()
+		_nbytes = 0
+
+
+def _evict():
+	global _nbytes
+	while _nbytes > max_bytes and _cache:
+		_,old = _cache.popitem(last=False)
+		_nbytes -= old.nbytes
+
+
+def cutout(filename,index,hdu=0):
+	'''
+	Reads a cutout from a FITS image without loading the rest of it.
+
+	filename	the FITS file
+	index		what to cut out, in numpy order (rows, then columns), e.g.
+			np.s_[28:42,1075:1175] for 14 slit rows & 100 wavelength pixels
+	hdu		the HDU number or name (e.g. 'SCI' or ('SCI',2))
+
+	Returns a read-only array -- copy it if you want to change it.
+	'''
+	global _nbytes
+	info = os.stat(filename)
+	key = (os.path.abspath(filename),info.st_mtime_ns,info.st_size,
+			hdu,_normalize(index))
+
+	with _lock:
+		if key in _cache:
+			_cache.move_to_end(key)
+			return _cache[key]
+
+	with fits.open(filename,memmap=False) as hdul:
+		# section only reads the rows/columns that get sliced, and applies
+		# BSCALE/BZERO to just those (memmap=True would refuse a scaled image)
+		data = np.array(hdul[hdu].section[index])
+	data.setflags(write=False)
+
+	with _lock:
+		if data.nbytes <= max_bytes:
+			_cache[key] = data
+			_nbytes += data.nbytes
+			_evict()
+	return data
+
+
+def header(filename,hdu=0):
+	'''Just the header of one HDU (no data is read).'''
+	with fits.open(filename,memmap=True) as hdul:
+		return hdul[hdu].header.copy()
+
+
+def wavelengths(hdr,index=None,axis=1):
+	'''
+	The wavelength of each pixel along `axis` (numpy order, so 1 = columns
+	for a 2D spectrum with wavelength along the rows), from the linear
+	CRVAL/CDELT/CRPIX keywords in a header.  Pass the same `index` as for
+	the cutout to get just its wavelengths.
+	'''
+	n = hdr['NAXIS'] - axis # FITS axes count the other way around
+	pixels = np.arange(hdr[f'NAXIS{n}'])
+	if index is not None:
+		index = index if isinstance(index,tuple) else (index,)
+		if axis < len(index):
+			pixels = pixels[index[axis]]
+	delta = hdr.get(f'CDELT{n}',hdr.get(f'CD{n}_{n}',1.0))
+	return hdr[f'CRVAL{n}'] + (pixels + 1 - hdr[f'CRPIX{n}']) * delta
@@ -0,0 +1,90 @@
+'''
+This is a script which adds in IGM absorption
+for the higher redshifts, following the prescription
+outlined in Madau (1995, ApJ, 441, 18).
+
+Note that the four different absorption effects
+accounted for here only include the first four
+transitions in the Lyman series (alpha to delta).
+
+Everything works on arrays: lam & z are broadcast
+together, so a (nframes,1) array of redshifts and a
+(nframes,nwave) array of wavelengths gives the
+absorption for every frame of an animation at once.
+
+Credit: 	Taylor Hutchison
+		aibhleog@tamu.edu
+		Texas A&M University
+'''
+
+import functools
+import hashlib
+import numpy as np
+
+def _setup(lam,z):
+	# always in float64, even for float32 spectra -- the Lyman-limit
+	# polynomial is a difference of big terms, and the optical depths
+	# get exponentiated
+	lam,z = np.broadcast_arrays(np.asarray(lam,dtype=np.float64),
+				np.asarray(z,dtype=np.float64))
+	return lam,z
+
+def lya_forest(lam,z): # in angstroms
+	lam,z = _setup(lam,z)
+	lam_a = 1216
+	return np.where(lam < lam_a*(1+z),0.0036 * np.power(lam/lam_a,3.46),0)
+
+def metal_lines(lam,z): # in angstroms
+	lam,z = _setup(lam,z)
+	lam_a = 1216
+	return np.where(lam < lam_a*(1+z),0.0017 * np.power(lam/lam_a,1.68),0)
+
+def line_blanketing(lam,z): # in angstroms
+	lam,z = _setup(lam,z)
+	Aj = [1.7e-3,1.2e-3,9.3e-4]
+	lam_j = [1026,973,950] # angstroms
+	output = np.zeros(lam.shape)
+	for A,lj in zip(Aj,lam_j):
+		output += np.where(lam < (lj*(1+z)),A*np.power(lam/lj,3.46),0)
+	return output
+
+def lyman_limit(lam,z):
+	lam,z = _setup(lam,z)
+	ly_L = 912 # angstroms
+	x_c = 1 + ((lam/ly_L)-1)
+	x_em = 1 + z
+	with np.errstate(over='ignore',invalid='ignore',divide='ignore'):
+		val = 0.25 * x_c**3 * (x_em**0.46 - x_c**0.46) \
+			+ 9.4 * x_c**1.5 * (x_em**0.18 - x_c**0.18) \
+			- 0.7 * x_c**3 * (x_c**-1.32 - x_em**-1.32) - 0.023 \
+			* (x_em**1.68 - x_c**1.68)
+	# (the polynomial goes negative far below the Lyman limit, where
+	# it no longer applies -- an optical depth can't be negative)
+	return np.where(lam < ly_L*(1+z),np.clip(val,0,None),0)
+
+def igm_absorption(lam,z):
+	lam,z = _setup(lam,z)
+	tau_eff = lya_forest(lam,z) \
+		+ metal_lines(lam,z) \
+		+ line_blanketing(lam,z) \
+		+ lyman_limit(lam,z)
+	# (the smallest optical depth of each spectrum)
+	floor = np.broadcast_to(tau_eff.min(axis=-1,keepdims=True)*1e-2,tau_eff.shape)
+	red = lam > 1216*(1+z)
+	tau_eff[red] = floor[red]
+	return np.exp(-tau_eff) # to be multiplied by a source's spectrum
+
+@functools.lru_cache(None) # (the code doesn't change under a running process)
+def version():
+	# a hash of this prescription, for the caches of anything worked out
+	# with it (see zstack & photoz) -- edit the code here, and the old
+	# results just stop matching
+	try:
+		with open(__file__,'rb') as f:
+			return hashlib.sha1(f.read()).hexdigest()
+	except (OSError,NameError): # (no source around) -- the functions' bytecode, then
+		sha = hashlib.sha1()
+		for name,value in sorted(globals().items()):
+			if callable(value) and hasattr(value,'__code__'):
+				sha.update(name.encode() + value.__code__.co_code + repr(value.__code__.co_consts).encode())
+		return sha.hexdigest()
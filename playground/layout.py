@@ -0,0 +1,153 @@
+'''
+tight_layout, worked out once per figure template instead of on every render.
+
+plt.tight_layout() measures every tick label, axis label & title (a full
+text layout pass) to find the subplot parameters -- and for a figure that's
+made over & over with the same layout (the zlines figure at another
+redshift, a map in a batch, a frame of an animation), it comes out the same
+every time.  `tight` solves it the first time for a (template, figsize, rc
+style), and after that just puts the stored subplot parameters back:
+
+	>>> layout.tight(fig,'bandpass-zlines')		# instead of plt.tight_layout()
+
+Stored with the parameters are where every axes ended up, and how big the
+labels were (measured with playground.placement's cached text sizes, so
+checking costs next to nothing).  The layout is solved again if any label
+got bigger than it was -- a longer tick label, a new title -- or if the axes
+don't land where they did, e.g. because the figure got another axes.
+Labels getting smaller doesn't count, the old layout still fits.
+
+Layouts are kept for the rest of the process, and in the cache directory
+(`layouts/`), so the next run of a script starts with them too.
+'''
+
+import os
+import json
+import hashlib
+import threading
+import warnings
+import numpy as np
+import matplotlib
+from playground import data as _data
+from playground import placement
+
+cache_dir = os.path.join(_data.cache_dir,'layouts')
+
+tolerance = 0.5 # points a label can grow by before the layout is solved again
+
+_layouts = {} # key --> stored layout
+_lock = threading.Lock()
+
+
+def _rc_key():
+	# every rc setting, since fonts, tick sizes, pads etc. all move things
+	items = sorted((k,repr(v)) for k,v in matplotlib.rcParams.items())
+	return hashlib.sha1(repr(items).encode()).hexdigest()[:16]
+
+
+def _key(fig,template,kwargs):
+	figsize = tuple(np.round(fig.get_size_inches(),4))
+	return hashlib.sha1(repr((template,figsize,_rc_key(),sorted(kwargs.items()))).encode()).hexdigest()
+
+
+def _size(texts):
+	# the biggest (width,height) of the visible, non-empty labels
+	texts = [t for t in texts if t.get_visible() and t.get_text()]
+	if not texts:
+		return [0.,0.]
+	sizes = [placement.text_size(t.get_text(),fontproperties=t.get_fontproperties()) for t in texts]
+	return np.max(sizes,axis=0).tolist()
+
+
+def label_sizes(fig):
+	'''
+	How big the labels around each axes are, in points: the tick labels
+	(x & y), the axis labels, and the title, as (width,height) pairs.
+	'''
+	sizes = []
+	for ax in fig.axes:
+		sizes.append([_size(ax.xaxis.get_majorticklabels()),_size(ax.yaxis.get_majorticklabels()),
+					  _size([ax.xaxis.label]),_size([ax.yaxis.label]),
+					  _size([ax.title,ax._left_title,ax._right_title])])
+	return sizes
+
+
+def _positions(fig):
+	return [list(ax.get_position(original=True).bounds) for ax in fig.axes]
+
+
+def _load(key):
+	with _lock:
+		if key in _layouts:
+			return _layouts[key]
+	try:
+		with open(os.path.join(cache_dir,key+'.json')) as f:
+			stored = json.load(f)
+	except (OSError,ValueError):
+		return None
+	with _lock:
+		_layouts[key] = stored
+	return stored
+
+
+def _store(key,stored):
+	with _lock:
+		_layouts[key] = stored
+	try:
+		os.makedirs(cache_dir,exist_ok=True)
+		filename = os.path.join(cache_dir,key+'.json')
+		tmp = f'{filename}.{os.getpid()}.tmp'
+		with open(tmp,'w') as f:
+			json.dump(stored,f)
+		os.replace(tmp,filename) # so another process never reads half of one
+	except OSError: # (a read-only cache is fine, it's just not saved)
+		pass
+
+
+def _placed(fig):
+	# are all the axes tight_layout can't handle placed by a locator (insets,
+	# which follow the axes they're in)?  Then leaving them out is right.
+	return all(ax.get_subplotspec() is not None or ax.get_axes_locator() is not None
+			   for ax in fig.axes)
+
+
+def _fits(fig,stored,sizes):
+	if len(stored['positions']) != len(fig.axes):
+		return False
+	if np.any(np.array(sizes) > np.array(stored['sizes']) + tolerance):
+		return False # a label grew
+	return np.allclose(_positions(fig),stored['positions'],atol=1e-6)
+
+
+def tight(fig,template,**kwargs):
+	'''
+	fig.tight_layout(**kwargs), solved once per (template, figsize, rc
+	style) and reused after that.  Returns True if it had to be solved.
+	'''
+	key = _key(fig,template,kwargs)
+	stored = _load(key)
+	sizes = label_sizes(fig)
+	if stored is not None:
+		fig.subplots_adjust(**stored['subplotpars'])
+		if _fits(fig,stored,sizes):
+			return False
+
+	with warnings.catch_warnings():
+		if _placed(fig): # (no need to warn that the insets are left out)
+			warnings.filterwarnings('ignore','This figure includes Axes that are not compatible',UserWarning)
+		fig.tight_layout(**kwargs)
+	params = fig.subplotpars
+	_store(key,{'subplotpars':{k:getattr(params,k) for k in ['left','right','bottom','top','wspace','hspace']},
+				'positions':_positions(fig),
+				'sizes':sizes})
+	return True
+
+
+def forget():
+	'''Forgets every stored layout (in this process & on disk).'''
+	with _lock:
+		_layouts.clear()
+	if os.path.isdir(cache_dir):
+		for name in os.listdir(cache_dir):
+			if name.endswith('.json'):
+				os.remove(os.path.join(cache_dir,name))
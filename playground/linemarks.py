@@ -0,0 +1,199 @@
+'''
+Marking emission lines on a spectrum, like the dashed lines & vertical labels
+in `bandpass-zlines` and `inset-axes-long-plot`.
+
+The lines come from a catalog: a numpy structured array sorted by rest
+wavelength (in angstroms), with a short key and the label for each line.
+`nebular` is the list that `bandpass-zlines` shows -- make your own with
+`line_catalog`, or pick some out of it with `select`.
+
+LineMarkers draws every marker as one LineCollection (x in data, y in axes
+coordinates, so the lines always run the full height of the axes) and every
+label in one LabelLayer, instead of an axvline & a text per line.  Moving it
+all to another redshift is one call, which works out the new positions for
+every line at once:
+
+	>>> marks = LineMarkers(ax,nebular,z=7.5,y=2e-14)
+	>>> marks.set_redshift(6.0)
+
+By default the labels are placed automatically when they're drawn: each one
+goes just to the right of its line, and they're packed so they don't overlap
+& stay inside the axes (see playground.placement) -- so they work at any
+redshift or x range.  Labels for lines outside of the x range are hidden
+(and shown again if the x limits change to include them).
+'''
+
+import numpy as np
+from playground import placement
+from matplotlib.artist import Artist
+from matplotlib.collections import LineCollection
+from matplotlib.text import Text
+from matplotlib.transforms import Bbox
+
+
+def line_catalog(entries):
+	'''
+	A line catalog from (key, rest wavelength [angstroms], label) entries,
+	sorted by wavelength.
+	'''
+	entries = [tuple(entry) for entry in entries]
+	longest = max([len(label) for _,_,label in entries] + [1])
+	catalog = np.array(entries,dtype=[('key','U16'),('wave','f8'),('label',f'U{longest}')])
+	return np.sort(catalog,order='wave',kind='stable')
+
+
+def select(catalog,keys):
+	'''The lines in the catalog with these keys (still sorted by wavelength).'''
+	return catalog[np.isin(catalog['key'],keys)]
+
+
+def between(catalog,lo,hi,z=0,units=1e4):
+	'''The lines that land between lo & hi (observed, in wave/units) at redshift z.'''
+	rest = np.array([lo,hi]) * units / (1+z)
+	start,stop = np.searchsorted(catalog['wave'],rest)
+	return catalog[start:stop]
+
+
+nebular = line_catalog([
+	('lya',1215.67,r'Ly$\alpha$'),('nv',1240,r'NV $\lambda$1240'),
+	('civ',1548,r'CIV $\lambda$1549'),('heii1',1640.4,r'HeII $\lambda$1640'),
+	('oiii]',1664,r'OIII] $\lambda$1660,1666'),
+	('siiii]',1883,r'SiIII] $\lambda$1883,1892'),
+	('ciii]',1906.8,'CIII] $\\lambda$1907\n  & $\\lambda$1909'),
+	('mgii',2798,'MgII $\\lambda$2796\n  & $\\lambda$2803'),
+	('[oii]',3727,'[OII] $\\lambda$3727\n    & $\\lambda$3729'),
+	('[neiii]',3869,r'[NeIII] $\lambda$3869'),('hdelta',4102,r'H$\delta$'),
+	('hgamma',4341,r'H$\gamma$'),('heii2',4686,r'HeII $\lambda$4686'),
+	('hbeta',4862.68,r'H$\beta$ $\lambda$4863'),('[oiii]1',4959,''),
+	('[oiii]2',5007,'[OIII] $\\lambda$4959\n    & $\\lambda$5007'),
+	('hei',5876,r'HeI $\lambda$5876')])
+
+
+class LabelLayer(Artist):
+	'''
+	A batch of text labels drawn as one artist.  The labels are Text objects
+	that only this layer draws (they aren't added to the axes), so they're
+	laid out like any other text, but the axes only has one artist to deal
+	with & moving them all is one set_offsets.
+
+	Extra keywords (e.g. rotation, verticalalignment) go to every label.
+	layout, if set, is called with the renderer before they're drawn.
+	'''
+	def __init__(self,ax,labels,fontsize=15,transform=None,**kwargs):
+		super().__init__()
+		style = dict(rotation='vertical',verticalalignment='bottom')
+		style.update(kwargs)
+		sizes = np.broadcast_to(fontsize,len(labels))
+		self.texts = [Text(0,0,label,fontsize=size,**style) for label,size in zip(labels,sizes)]
+		self.layout = None
+		self.set_transform(transform or ax.transData)
+		ax.add_artist(self)
+		for text in self.texts:
+			text.set_figure(self.figure)
+			text.set_transform(self.get_transform())
+
+	def set_offsets(self,x,y):
+		'''Moves the labels (arrays, or numbers for all of them).'''
+		n = len(self.texts)
+		for text,xx,yy in zip(self.texts,np.broadcast_to(x,n),np.broadcast_to(y,n)):
+			text.set_position((xx,yy))
+		self.stale = True
+
+	def show(self,which=True):
+		'''Shows the labels where `which` is True, and hides the rest.'''
+		for text,shown in zip(self.texts,np.broadcast_to(which,len(self.texts))):
+			text.set_visible(bool(shown) and text.get_text() != '')
+		self.stale = True
+
+	def get_window_extent(self,renderer=None):
+		boxes = [text.get_window_extent(renderer) for text in self.texts if text.get_visible()]
+		return Bbox.union(boxes) if boxes else Bbox.null()
+
+	def draw(self,renderer):
+		if not self.get_visible():
+			return
+		if self.layout is not None:
+			self.layout(renderer)
+		renderer.open_group('labels',gid=self.get_gid())
+		for text in self.texts:
+			text.draw(renderer)
+		renderer.close_group('labels')
+		self.stale = False
+
+
+class LineMarkers:
+	'''
+	Dashed markers (and labels) for every line in a catalog, at redshift z.
+
+	labels		whether to label the lines
+	shift		'auto' to place the labels automatically, or how far
+			(rest-frame angstroms) to move each label from its line --
+			a number, or one per line
+	gap		space (points) between a line & its label, and between
+			labels, when they're placed automatically
+	y		where the bottom of each label goes (data coordinates) --
+			automatically placed labels are lowered if they'd stick
+			out of the top of the axes
+	fontsize	a number, or one per line
+	units		what to divide angstroms by to get the x axis units
+	text_kw		extra keywords for the labels
+
+	Any other keywords go to the LineCollection.
+	'''
+	def __init__(self,ax,catalog,z=0,labels=True,shift='auto',gap=3,y=None,fontsize=15,
+				units=1e4,text_kw=None,**kwargs):
+		self.ax,self.catalog,self.units,self.gap = ax,catalog,units,gap
+		self.auto = isinstance(shift,str) and shift == 'auto'
+		self.shift = np.broadcast_to(np.asarray(0 if self.auto else shift,dtype=float),len(catalog))
+		style = dict(linestyles='--',colors='k',alpha=.5)
+		style.update(kwargs)
+		self.lines = LineCollection([],transform=ax.get_xaxis_transform(),**style)
+		ax.add_collection(self.lines,autolim=False)
+		self.labels = None
+		if labels:
+			self.y = np.broadcast_to(np.asarray(ax.get_ylim()[1] if y is None else y,dtype=float),
+									 len(catalog))
+			self.labels = LabelLayer(ax,catalog['label'],fontsize,**(text_kw or {}))
+			if self.auto:
+				self.labels.layout = self._place
+			ax.callbacks.connect('xlim_changed',self._in_view)
+		self.set_redshift(z)
+
+	def set_redshift(self,z):
+		'''Moves every marker & label to redshift z.'''
+		self.z = z
+		x = self.catalog['wave'] / self.units * (1+z)
+		segments = np.empty((len(x),2,2))
+		segments[:,:,0] = x[:,None]
+		segments[:,:,1] = [0,1] # the bottom & top of the axes
+		self.lines.set_segments(segments)
+		self.x = x
+		if self.labels is not None:
+			self.labels.set_offsets((self.catalog['wave'] + self.shift) / self.units * (1+z),self.y)
+			self._in_view(self.ax)
+		return self
+
+	def _in_view(self,ax):
+		# only labeling the lines that are in the x range (called whenever
+		# the x limits change, too)
+		lo,hi = sorted(ax.get_xlim())
+		self.labels.show((self.x >= lo) & (self.x <= hi))
+
+	def _place(self,renderer):
+		# packing the labels that are showing into a row, now that the axes
+		# are where they'll be drawn -- working in pixels
+		shown = np.flatnonzero([text.get_visible() for text in self.labels.texts])
+		if len(shown) == 0:
+			return
+		texts = [self.labels.texts[i] for i in shown]
+		length,thickness = renderer.points_to_pixels(placement.text_sizes(
+					[text.get_text() for text in texts],
+					fontproperties=texts[0].get_fontproperties(),
+					fontsize=[text.get_fontsize() for text in texts]))
+		gap = renderer.points_to_pixels(self.gap)
+		box = self.ax.bbox
+		x,y = self.ax.transData.transform(np.column_stack([self.x[shown],self.y[shown]])).T
+		left = placement.pack(x + gap,thickness + gap,box.x0,box.x1)
+		bottom = np.minimum(y,box.y1 - 2*gap - length) # (vertical labels)
+		for text,xy in zip(texts,self.ax.transData.inverted().transform(np.column_stack([left,bottom]))):
+			text.set_position(xy)
@@ -0,0 +1,253 @@
+'''
+A spatial map with a colorbar and a histogram linked to that colorbar, as
+in the `imshow-colorbar-hist` figure (similar to Hutchison et al. 2024).
+
+The histogram is binned with np.histogram on the finite values only (the
+NaN "no galaxy" regions never get copied around), and all of the bars are
+drawn as a single PolyCollection with one array of facecolors -- so there's
+no loop over patches, no matter how many bins you ask for.
+
+The artists are made once and then updated in place, which means many maps
+that share the same layout (say, a whole set of quantities from one IFU
+cube) can be rendered one after another without rebuilding the figure:
+
+	>>> mh = MapHistogram(fig,gs[0])
+	>>> mh.draw(logU,title='log$_{10}$U')
+	>>> fig.savefig('logU.pdf')
+	>>> mh.draw(metallicity,title='12+log(O/H)')
+	>>> fig.savefig('OH.pdf')
+
+See `render_maps` for doing exactly that for a list of maps.
+
+For maps too big to hold in memory, the histogram, median & clims can come
+from playground.streamhist instead (pass `stats=` to draw), so only the
+image that's actually shown needs to be in memory.
+'''
+
+import os
+import numpy as np
+import matplotlib as mpl
+import matplotlib.gridspec as gridspec
+from matplotlib.figure import Figure
+from matplotlib.collections import PolyCollection
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.ticker import MaxNLocator
+from playground import pipeline
+
+
+def finite_values(data):
+	'''Returns the finite values of a map as a 1D array (NaNs & infs dropped).'''
+	data = np.asarray(data)
+	return data[np.isfinite(data)]
+
+
+def finite_range(data):
+	'''
+	[min,max] of the finite values of a map, NaNs & infs skipped.  Raises
+	a ValueError for a map with nothing to show (empty, or all NaN).
+	'''
+	data = np.asarray(data)
+	if not np.isfinite(data).any():
+		raise ValueError(f'the map (shape {data.shape}) has no finite values')
+	lo,hi = np.nanmin(data),np.nanmax(data)
+	if not np.isfinite([lo,hi]).all(): # (infs in there, too)
+		values = finite_values(data)
+		lo,hi = values.min(),values.max()
+	return [lo,hi]
+
+
+def histogram(values,bins=40,clims=None):
+	'''
+	Bins the finite values of a map.  If clims are given they set the range
+	of the bins, otherwise the range of the finite values is used.
+	Returns the counts and the bin edges, just like np.histogram.
+	'''
+	if clims is None:
+		clims = finite_range(values)
+	values = finite_values(values)
+	return np.histogram(values,bins=bins,range=clims)
+
+
+def bar_verts(counts,edges):
+	'''
+	Vertices for horizontal bars that go from 0 to `counts`, one for each bin,
+	as a single (nbins,4,2) array that a PolyCollection can take directly.
+	'''
+	nbins = len(counts)
+	verts = np.zeros((nbins,4,2))
+	verts[:,1:3,0] = counts[:,None] # the right side of each bar
+	verts[:,:2,1] = edges[:-1,None] # bottom of each bar
+	verts[:,2:,1] = edges[1:,None]  # top of each bar
+	return verts
+
+
+def bar_colors(edges,cmap):
+	'''
+	Colors for the bars, taken from the colormap using the bin centers
+	(scaled to the interval [0,1]) so that they match the colorbar.
+	https://stackoverflow.com/questions/23061657/plot-histogram-with-colors-taken-from-colormap
+	'''
+	bin_centers = 0.5 * (edges[:-1] + edges[1:])
+	col = bin_centers - bin_centers.min()
+	if col.max() > 0:
+		col /= col.max()
+	else: # (a single bin)
+		col[:] = 0.5
+	return cmap(col)
+
+
+class MapHistogram:
+	'''
+	The map + linked colorbar histogram, drawn into `subplot_spec` of `fig`.
+
+	cmap		colormap for both the map and the histogram bars
+	bins		number of histogram bins
+	axis_at		where (in data units) the manually-added histogram axis goes;
+			defaults to a little below the top of the colorbar
+	ticks		counts to put tick marks at on that axis; defaults to a
+			handful of nicely rounded values that fit the histogram
+	'''
+	def __init__(self,fig,subplot_spec,cmap='viridis',bins=40,axis_at=None,ticks=None,
+				width_ratios=(2,1),wspace=-0.12):
+		self.fig = fig
+		self.cmap = mpl.colormaps.get_cmap(cmap)
+		self.bins = bins
+		self.axis_at = axis_at
+		self.ticks = ticks
+
+		gs = gridspec.GridSpecFromSubplotSpec(1,2,subplot_spec=subplot_spec,
+								width_ratios=width_ratios,wspace=wspace)
+		self.ax_map = fig.add_subplot(gs[0])
+		self.ax_hist = fig.add_subplot(gs[1])
+		self.ax_map.axis('off')
+		self.ax_hist.axis('off')
+		self.ax_hist.set_zorder(-1) # makes sure subplot dimensions don't cover the map
+
+		self.im = None # everything else gets made on the first draw
+
+	def _first_draw(self,data,clims):
+		ax = self.ax_map
+		self.title = ax.set_title('',y=0.94)
+		self.im = ax.imshow(data,origin='lower',cmap=self.cmap,clim=clims)
+		self.cbar = self.fig.colorbar(self.im,ax=ax,pad=0.03)
+		self.cbar.ax.yaxis.set_ticks_position('left')
+
+		ax = self.ax_hist
+		self.bars = PolyCollection([],edgecolor='none')
+		ax.add_collection(self.bars)
+
+		# have to manually add the y axis of the histogram
+		self.axis_line = ax.axhline(0,color='k',lw=1)
+		self.tick_marks = ax.vlines([],0,0,color='k',lw=1)
+		self.tick_labels = [] # (kept from map to map, more made if there are more ticks)
+
+		# adding median, if helpful
+		self.median_line = ax.axhline(0,color='k',lw=2,ls='--')
+		self.median_text = ax.text(0.05,0,'median',va='bottom',
+								transform=ax.get_yaxis_transform())
+
+	def draw(self,data,title='',clims=None,stats=None):
+		'''
+		Draws (or redraws) a map.  `data` should already be scaled the way
+		you want it shown (log10, etc.) -- NaNs are left blank in the map and
+		skipped in the histogram.  The clims default to the finite data range;
+		a map with no finite values at all is a ValueError.
+
+		If `stats` (a playground.streamhist.StreamingHistogram) is given, the
+		histogram, median, & default clims all come from it instead of `data`.
+		'''
+		if stats is None:
+			if clims is None:
+				clims = finite_range(data)
+				if not clims[1] > clims[0]: # only one value in the map, give it some room
+					clims = [clims[0]-0.5,clims[1]+0.5]
+			values = finite_values(data)
+			if not len(values):
+				raise ValueError(f'the map (shape {np.shape(data)}) has no finite values')
+			counts,edges = np.histogram(values,bins=self.bins,range=clims)
+			median = np.median(values) # already finite, no need for nanmedian
+		else:
+			if clims is None:
+				clims = stats.clims
+			counts,edges = stats.counts,stats.edges
+			median = stats.median
+
+		if self.im is None:
+			self._first_draw(data,clims)
+		else:
+			self.im.set_data(data)
+			self.im.set_clim(clims)
+		self.title.set_text(title)
+
+		# the histogram that links to the colorbar
+		self.bars.set_verts(bar_verts(counts,edges))
+		self.bars.set_facecolor(bar_colors(edges,self.cmap))
+
+		ax = self.ax_hist
+		ax.set_xlim(0,counts.max()*1.05)
+		ax.set_ylim(clims) # matching colorbar
+
+		span = clims[1] - clims[0]
+		axis_at = self.axis_at
+		if axis_at is None:
+			axis_at = clims[1] - span*0.14
+		self._draw_axis(axis_at,span,counts.max())
+
+		self.median_line.set_ydata([median,median])
+		self.median_text.set_y(median+span*0.03)
+
+	def _draw_axis(self,axis_at,span,top):
+		ticks = self.ticks
+		if ticks is None:
+			ticks = MaxNLocator(5,integer=True).tick_values(0,top)
+			ticks = ticks[(ticks > 0) & (ticks <= top)]
+		ticks = np.asarray(ticks)
+
+		self.axis_line.set_ydata([axis_at,axis_at])
+		length = span*0.015 # same proportions as the hand-tuned original
+		segments = np.zeros((len(ticks),2,2))
+		segments[:,:,0] = ticks[:,None]
+		segments[:,0,1],segments[:,1,1] = axis_at+length,axis_at-length
+		self.tick_marks.set_segments(segments)
+
+		while len(self.tick_labels) < len(ticks):
+			self.tick_labels.append(self.ax_hist.text(0,0,'',ha='right',rotation=270,fontsize=13))
+		for i,txt in enumerate(self.tick_labels):
+			if i < len(ticks):
+				txt.set_text('%g'%ticks[i])
+				txt.set_position((ticks[i]+top*0.016,axis_at+length*2.3))
+			txt.set_visible(i < len(ticks))
+
+
+def render_maps(maps,titles,output,figsize=(10,6),**kwargs):
+	'''
+	Renders many maps that share the same layout, reusing one figure.
+
+	maps		a list (or any iterable) of 2D arrays, already scaled
+	titles		a title for each map
+	output		either a single PDF file name, which gets one page per map,
+			or a format string like 'map_{i}.png' or '{title}.pdf'
+	kwargs		passed on to MapHistogram (cmap, bins, axis_at, ticks)
+
+	With a format string, the maps are rendered as a pipeline (see
+	playground.pipeline): if `maps` is a generator that reads each map,
+	the next one is read while the current one draws, and the files are
+	written in the background.
+	'''
+	fig = Figure(figsize=figsize)
+	gs = gridspec.GridSpec(1,1,figure=fig)
+	mh = MapHistogram(fig,gs[0],**kwargs)
+
+	if '{' in output:
+		def render(item):
+			i,(data,title) = item
+			mh.draw(data,title=title)
+			filename = output.format(i=i,title=title)
+			return [(filename,pipeline.snapshot(fig,os.path.splitext(filename)[1]))]
+		pipeline.run(enumerate(zip(maps,titles)),render)
+	else:
+		with PdfPages(output) as pdf:
+			for data,title in zip(maps,titles):
+				mh.draw(data,title=title)
+				pdf.savefig(fig)
+	return fig
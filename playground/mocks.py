@@ -0,0 +1,144 @@
+'''
+Fake (mock) spectra & galaxy stamps, like the ones made for the
+`big-picture-spectra` figure -- but any number of them at once.
+
+Everything uses np.random.Generator with an explicit seed (or a Generator
+you pass in), rather than the global np.random.seed, so a batch of mocks is
+reproducible no matter what else in the process uses random numbers.
+
+N realizations come back as a single (N,ny,nx) array (or (N,length) for 1D
+spectra), and the emission lines are added to all of them in one go: each
+line is the gaussian kernel from `playground/data/kernels`, scaled by an
+amplitude and centered at a position that can be the same for every
+realization or different for each one.
+
+	>>> spec2d = mock_2d(1000,lines=[[125,35,35]],seed=3)  # (1000,250,70)
+	>>> rng = np.random.default_rng(3)
+	>>> ypos = rng.integers(20,230,size=1000)                 # a line per mock,
+	>>> spec1d = mock_1d(1000,lines=[[ypos,15]],rng=rng)      # at random rows
+
+For thousands and thousands of mocks, `parallel_mocks` splits the work over
+a process pool, giving each worker its own independent (spawned) stream.
+'''
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from playground import data
+
+
+def kernels():
+	'''
+	The 1D & 2D gaussian kernels (sigma=2, 7 pixels on a side), pulled from
+	http://dev.theomader.com/gaussian-kernel-calculator/
+	'''
+	return data.load('gaussian1D_sig2_kernel7.txt'),data.load('gaussian2D_sig2_kernel7.txt')
+
+
+def _rng(seed=None,rng=None):
+	if rng is not None:
+		return rng
+	return np.random.default_rng(seed)
+
+
+def inject_lines(spectra,centers,amplitudes,kernel):
+	'''
+	Adds a kernel-shaped line to every realization in `spectra`, in place.
+
+	spectra		(N,...) array of realizations
+	centers		pixel position of the kernel center, one entry per axis of a
+			realization, each either a single value or one per realization
+	amplitudes	what the kernel is scaled by, a single value or one per
+			realization
+
+	Any part of a line that lands outside of a spectrum is dropped.
+	'''
+	n,dims = spectra.shape[0],spectra.shape[1:]
+	kernel = np.asarray(kernel)
+	if kernel.ndim != len(dims):
+		raise ValueError(f'a {kernel.ndim}D kernel can\'t be added to {len(dims)}D spectra')
+	half = np.array(kernel.shape) // 2
+
+	# the pixel positions of every kernel element for every realization,
+	# made by broadcasting (N,1,...) centers against the kernel offsets
+	offsets = np.indices(kernel.shape).reshape(len(dims),-1) - half[:,None]
+	coords = [np.broadcast_to(np.asarray(c),(n,))[:,None].astype(np.int64) + offsets[k]
+				for k,c in enumerate(centers)]
+	values = np.broadcast_to(np.asarray(amplitudes,dtype=float),(n,))[:,None] * kernel.ravel()
+
+	inside = np.ones(values.shape,dtype=bool)
+	for k,c in enumerate(coords):
+		inside &= (c >= 0) & (c < dims[k])
+	which = np.broadcast_to(np.arange(n)[:,None],values.shape)
+
+	# np.add.at so that overlapping lines add up instead of overwriting
+	np.add.at(spectra,(which[inside],*[c[inside] for c in coords]),values[inside])
+	return spectra
+
+
+def noise(n,shape,seed=None,rng=None,dtype=np.float64):
+	'''Uniform noise between -1 and 1, in N realizations of `shape`.'''
+	return _rng(seed,rng).uniform(-1,1,(n,*shape)).astype(dtype,copy=False)
+
+
+def mock_2d(n,shape=(250,70),lines=(),seed=None,rng=None,dtype=np.float64):
+	'''
+	N fake 2D spectra, noise plus emission lines.
+	`lines` is a list of [row,column,amplitude] (any of which can be arrays
+	with one value per realization).
+	'''
+	spectra = noise(n,shape,seed,rng,dtype)
+	gauss2d = kernels()[1]
+	for row,col,amplitude in lines:
+		inject_lines(spectra,(row,col),amplitude,gauss2d)
+	return spectra
+
+
+def mock_1d(n,length=250,lines=(),seed=None,rng=None,dtype=np.float64):
+	'''
+	N fake 1D spectra, noise plus emission lines.
+	`lines` is a list of [pixel,amplitude] (either can be arrays with one
+	value per realization).
+	'''
+	spectra = noise(n,(length,),seed,rng,dtype)
+	gauss1d = kernels()[0]
+	for pixel,amplitude in lines:
+		inject_lines(spectra,(pixel,),amplitude,gauss1d)
+	return spectra
+
+
+def mock_errors(n,length=250,seed=None,rng=None,dtype=np.float64):
+	'''Fake 1D error spectra, between 0.4 and 1.4.'''
+	return (_rng(seed,rng).random((n,length)) + 0.4).astype(dtype,copy=False)
+
+
+def mock_stamps(n,shape=(50,35),blobs=((25,16,25),(27,19,25)),seed=None,rng=None,
+				dtype=np.float64):
+	'''
+	N fake galaxy stamps -- noise plus a couple of overlapping gaussian
+	`blobs`, each [row,column,amplitude] just like the lines in mock_2d.
+	'''
+	return mock_2d(n,shape,lines=blobs,seed=seed,rng=rng,dtype=dtype)
+
+
+def _mock_worker(job):
+	kind,n,seed_sequence,kwargs = job
+	rng = np.random.default_rng(seed_sequence)
+	return {'2d':mock_2d,'1d':mock_1d,'stamps':mock_stamps}[kind](n,rng=rng,**kwargs)
+
+
+def parallel_mocks(kind,n,seed=None,workers=4,**kwargs):
+	'''
+	Makes N mocks over a pool of `workers` processes.  `kind` is '2d', '1d',
+	or 'stamps', and the kwargs are passed on to that function (per-realization
+	line positions aren't split up, so keep those the same for every mock).
+
+	Each worker gets its own stream spawned from np.random.SeedSequence(seed),
+	so the streams are independent and the result is reproducible for a given
+	seed & number of workers.
+	'''
+	streams = np.random.SeedSequence(seed).spawn(workers)
+	sizes = [n // workers + (1 if w < n % workers else 0) for w in range(workers)]
+	jobs = [(kind,size,stream,kwargs) for size,stream in zip(sizes,streams) if size > 0]
+
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		return np.concatenate(list(pool.map(_mock_worker,jobs)))
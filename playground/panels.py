@@ -0,0 +1,228 @@
+'''
+The `big-picture-spectra` layout (an F160W stamp with slits, plus 2D & 1D
+spectra of two lines) for every object in a survey, e.g. for an appendix.
+
+The nested gridspecs and all of the artists are made once, in PanelTemplate.
+Each object is then rendered by swapping its data into those artists
+(set_data on the images & lines, new vertices for the error bands & slits),
+so an object costs one draw instead of a whole new figure.
+
+Each object is a dictionary:
+
+	{'name': 'z7_GND_42912',		(optional) written in the corner
+	 'stamp': 2D array,			the F160W (or whatever) stamp
+	 'stamp_clim': (-1,2),
+	 'slits': [[vertices,color,label],...],	polygons in stamp pixels
+	 'lines': [top,bottom]}			one dictionary per line:
+
+	{'band': 'Y',
+	 'spec2d': 2D array,			as shown: spatial rows x wavelength
+	 'clim': (-1.5,2.3),
+	 'wave','flux','error': 1D arrays,	the 1D spectrum
+	 'xlim': (wave[74],wave[174])}		(optional) defaults to the 2D range
+
+	>>> render_survey(objects,'appendix.pdf',workers=8)
+'''
+
+import os
+import warnings
+import numpy as np
+import matplotlib.gridspec as gridspec
+import matplotlib.patheffects as PathEffects
+from matplotlib.figure import Figure
+from matplotlib.patches import Polygon
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from playground import textcache
+
+
+def band_verts(x,lower,upper):
+	'''Vertices of a fill_between(x,lower,upper) polygon, as one array.'''
+	return np.concatenate([np.column_stack([x,lower]),np.column_stack([x[::-1],upper[::-1]])])
+
+
+class PanelTemplate:
+	'''
+	The figure, gridspecs, & artists for one object, made once.
+
+	ylabels		the y axis labels of the top & bottom 1D spectra
+	max_slits	how many slit polygons to keep ready in the stamp
+	'''
+	def __init__(self,figsize=(10.5,9),max_slits=3,
+				ylabels=(r'F$_{\lambda}$ [10$^{-18}$ erg/s/cm$^2$/$\AA$]',
+						 r'F$_{\lambda}$ [10$^{-19}$ erg/s/cm$^{2}$/$\AA$]')):
+		self.fig = Figure(figsize=figsize)
+		FigureCanvasAgg(self.fig)
+		gs0 = gridspec.GridSpec(2,1,figure=self.fig,height_ratios=[1,0.9],hspace=0.1)
+
+		# top row: the stamp on the left, the first line on the right
+		gs01 = gridspec.GridSpecFromSubplotSpec(1,2,subplot_spec=gs0[0],
+								width_ratios=[1.2,2],wspace=0.22)
+		gs001 = gridspec.GridSpecFromSubplotSpec(3,1,subplot_spec=gs01[1],
+								height_ratios=[0.05,1,0.12],hspace=0.0)
+		gs011 = gridspec.GridSpecFromSubplotSpec(2,1,subplot_spec=gs001[1],
+								height_ratios=[1.25,2],hspace=0.0)
+
+		# bottom row: the second line, padded on either side
+		gs02 = gridspec.GridSpecFromSubplotSpec(1,3,subplot_spec=gs0[1],
+								width_ratios=[0.28,2,0.13],wspace=0.0)
+		gs003 = gridspec.GridSpecFromSubplotSpec(2,1,subplot_spec=gs02[1],
+								height_ratios=[1.75,2],hspace=0.0)
+
+		self.lines = [self._line_panel(gs011,ylabels[0],20.5,(0.023,0.73),2.3),
+					  self._line_panel(gs003,ylabels[1],24.5,(0.02,0.75),2.7)]
+		self._stamp_panel(gs01[0],max_slits)
+
+	def _blank(self,ax):
+		ax.xaxis.set_ticks_position('none')
+		ax.yaxis.set_ticks_position('none')
+		ax.set_yticklabels([])
+		ax.set_xticklabels([])
+
+	def _outlined(self,ax,x,y,size,**kwargs):
+		# white text with black outline
+		txt = ax.text(x,y,'',size=size,color='w',transform=ax.transAxes,**kwargs)
+		txt.set_path_effects([PathEffects.withStroke(linewidth=3,foreground='k')])
+		return txt
+
+	def _line_panel(self,gs,ylabel,size,where,lw):
+		panel = {}
+		ax = self.fig.add_subplot(gs[0]) # 2D spectrum
+		panel['image'] = ax.imshow(np.zeros((2,2)),aspect='auto',origin='lower',cmap='gray')
+		self._blank(ax)
+		panel['band'] = self._outlined(ax,where[0],where[1],size)
+		panel['ax2d'] = ax
+
+		ax = self.fig.add_subplot(gs[1]) # 1D spectrum
+		panel['flux'], = ax.plot([],[],drawstyle='steps-mid',lw=lw)
+		panel['error'] = ax.fill_between([0,1],[0,0],[0,0],alpha=0.2)
+		ax.set_ylabel(ylabel,fontsize=16)
+		ax.set_xlabel('observed wavelength [microns]',labelpad=5,fontsize=16)
+		panel['ax1d'] = ax
+		return panel
+
+	def _stamp_panel(self,gs,max_slits):
+		ax = self.fig.add_subplot(gs)
+		self.stamp = ax.imshow(np.zeros((2,2)),aspect='auto',origin='upper',cmap='gray')
+		self._blank(ax)
+		self.stamp_label = self._outlined(ax,0.03,0.90,22.5,ha='left')
+		self.stamp_label.set_text('F160W')
+		self.name = self._outlined(ax,0.97,0.90,14,ha='right')
+
+		# slits & their labels, hidden until an object needs them
+		self.slits,self.slit_labels = [],[]
+		for i in range(max_slits):
+			slit = Polygon([[0,0]],zorder=3,facecolor='none',lw=1.8,visible=False)
+			ax.add_patch(slit)
+			txt = ax.text(0.04,0.04+0.09*i,'',size=19.5,transform=ax.transAxes)
+			self.slits.append(slit)
+			self.slit_labels.append(txt)
+		self.ax_stamp = ax
+
+	def render(self,obj):
+		'''Swaps one object's data into the artists.'''
+		ny,nx = obj['stamp'].shape
+		self.stamp.set_data(obj['stamp'])
+		self.stamp.set_extent((-0.5,nx-0.5,ny-0.5,-0.5))
+		self.stamp.set_clim(obj.get('stamp_clim',(-1,2)))
+		self.name.set_text(obj.get('name',''))
+
+		slits = obj.get('slits',[])
+		if len(slits) > len(self.slits):
+			raise ValueError(f'{len(slits)} slits, but the template only has room for {len(self.slits)}')
+		for i,(slit,txt) in enumerate(zip(self.slits,self.slit_labels)):
+			if i < len(slits):
+				vertices,color,label = slits[i]
+				slit.set_xy(vertices)
+				slit.set_edgecolor(color)
+				txt.set_text(label)
+				txt.set_color(color)
+				# using the set_path_effects to "bold" the text
+				txt.set_path_effects([PathEffects.withStroke(linewidth=1.18,foreground=color)])
+			slit.set_visible(i < len(slits))
+			txt.set_visible(i < len(slits))
+
+		for panel,line in zip(self.lines,obj['lines']):
+			spec2d = line['spec2d']
+			panel['image'].set_data(spec2d)
+			panel['image'].set_extent((-0.5,spec2d.shape[1]-0.5,-0.5,spec2d.shape[0]-0.5))
+			panel['ax2d'].set_xlim(-0.5,spec2d.shape[1]-0.5)
+			panel['ax2d'].set_ylim(-0.5,spec2d.shape[0]-0.5)
+			panel['image'].set_clim(line.get('clim',(-1.5,2.3)))
+			panel['band'].set_text('%s-band'%(line['band']))
+
+			wave,flux,error = line['wave'],line['flux'],line['error']
+			panel['flux'].set_data(wave,flux)
+			panel['error'].set_verts([band_verts(wave,error*-1,error)])
+
+			ax = panel['ax1d']
+			ax.set_xlim(line.get('xlim',(wave[0],wave[-1])))
+			bottom = min(np.min(flux),np.min(-error))
+			top = max(np.max(flux),np.max(error))
+			pad = (top - bottom) * 0.05
+			ax.set_ylim(bottom-pad,top+pad)
+
+	def save(self,filename_or_pdf):
+		'''Saves the current object to a file name or an open PdfPages.'''
+		if isinstance(filename_or_pdf,PdfPages):
+			filename_or_pdf.savefig(self.fig)
+		else:
+			self.fig.savefig(filename_or_pdf)
+
+
+def _render_chunk(job):
+	objects,filename,kwargs = job
+	template = PanelTemplate(**kwargs)
+	with PdfPages(filename) as pdf, textcache.installed(): # the outlined labels are the same in every panel
+		for obj in objects:
+			template.render(obj)
+			template.save(pdf)
+	return filename
+
+
+def _merge(parts,filename):
+	'''Joins the chunk PDFs into one (with pypdf), and removes the chunks.'''
+	from pypdf import PdfWriter
+	writer = PdfWriter()
+	for part in parts:
+		writer.append(part)
+	with open(filename,'wb') as f:
+		writer.write(f)
+	for part in parts:
+		os.remove(part)
+	return [filename]
+
+
+def render_survey(objects,filename,workers=1,chunk=None,**kwargs):
+	'''
+	Renders every object onto its own page of a multi-page PDF.
+
+	workers		number of processes; each one builds its own template and
+			renders a chunk of the objects into its own PDF, and the
+			chunks are joined in order at the end.  That needs pypdf --
+			without it, there's a warning and everything is rendered
+			on this process instead, into the one PDF
+	chunk		objects per process job, defaults to splitting them evenly
+	kwargs		passed on to PanelTemplate
+
+	Returns the list of PDF files written (just `filename`).
+	'''
+	objects = list(objects)
+	if workers > 1:
+		try:
+			import pypdf
+		except ImportError:
+			warnings.warn(f'pypdf is not installed, so chunks rendered on {workers} processes '
+						  'could not be joined -- rendering them all on this one instead',stacklevel=2)
+			workers = 1
+	if workers <= 1:
+		return [_render_chunk((objects,filename,kwargs))]
+
+	from concurrent.futures import ProcessPoolExecutor
+	chunk = chunk or -(-len(objects) // workers)
+	stem = os.path.splitext(filename)[0]
+	jobs = [(objects[i:i+chunk],f'{stem}_part{i//chunk:04d}.pdf',kwargs)
+				for i in range(0,len(objects),chunk)]
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		parts = list(pool.map(_render_chunk,jobs))
+	return _merge(parts,filename)
@@ -0,0 +1,340 @@
+'''
+Photometric redshifts from the Cloudy/BPASS models: the same models (and
+filter curves) the IRAC color tracks of `redshifted-irac-color` come from,
+fit to a whole catalog of observed photometry at once.
+
+Two steps:
+
+	model_grid	the flux every model would have in every filter, at
+			every redshift of a grid (with IGM absorption), worked
+			out once & cached -- a (nmodels,nz,nfilters) table
+	fit		chi^2 of every object against every (model, z) in the
+			table, and from it the posterior P(z) of each object,
+			the probability of each model (e.g. of each ionization
+			parameter), and the best fit
+
+The synthetic photometry is all on one log-spaced wavelength grid: each
+model is rebinned onto it once (flux-conserving, playground.rebin), and
+since redshifting is just a shift along log(wavelength), the model at each
+z is read off the same array at an offset.  Each filter is a row of weights
+on the observed grid, so the fluxes at a block of redshifts are one matrix
+product.  Fluxes are f_nu averaged over the filter per photon (the usual
+int f_nu T dlam/lam / int T dlam/lam), in the models' own arbitrary units --
+every fit has a free amplitude anyway.
+
+The fit has a free (non-negative) amplitude for each object & (model, z),
+which has a closed form, so chi^2 for a block of objects against the whole
+table is two matrix products:
+
+	chi^2 = sum(w f^2) - (sum(w f F))^2 / sum(w F^2)	with w = 1/sigma^2
+
+The objects are done a block at a time (so only a block x table of chi^2 is
+ever in memory), and with workers > 1 the catalog is split over a process
+pool.  10^5 objects against 10^4 (model, z) points is a matter of seconds
+per core.
+
+	>>> grid = model_grid(filters=['HST-WFC3_IR.F160W.dat','Spitzer_IRAC.I1.dat',
+	... 		'Spitzer_IRAC.I2.dat'],z=np.linspace(0,12,1201),ebv=[0,0.1,0.2])
+	>>> result = fit(grid,flux,error,workers=4)	# flux & error are (nobjects,nfilters)
+	>>> result.z_best, result.pdf			# (nobjects,), (nobjects,nz)
+
+Missing photometry is fine -- a NaN flux, or an error that's NaN, zero, or
+infinite, leaves that filter out of that object's fit.
+'''
+
+import os
+import hashlib
+import numpy as np
+from playground import data as _data
+from playground import igm_absorption as igm
+from playground import rebin as _rebin
+
+cache_dir = os.path.join(_data.cache_dir,'photoz')
+
+models = ['age7z0.1zneb0.1u-1.5_300.con','age7z0.2zneb0.2u-2.1_100.con']
+filters = ['HST-WFC3_IR.F105W.dat','HST-WFC3_IR.F160W.dat','Spitzer_IRAC.I1.dat','Spitzer_IRAC.I2.dat']
+
+
+def filter_curve(name):
+	'''
+	A filter curve as (microns, throughput), in increasing wavelength.  Most
+	of the curves are in Angstroms, but the MOSFIRE J & K ones are already in
+	microns -- anything that ends short of 100 is taken to be in microns.
+	'''
+	curve = _data.load(name,dtype=np.float64)
+	curve = curve[curve[:,0] > 0]
+	wave,trans = curve[:,0],curve[:,1]
+	if wave.max() > 100:
+		wave = wave / 1e4
+	order = np.argsort(wave)
+	return wave[order],np.clip(trans[order],0,None)
+
+
+def con_model(name):
+	'''A Cloudy model's rest-frame f_nu (arbitrary units), on its wavelengths in microns.'''
+	con = _data.load(name,usecols=[0,6],dtype=np.float64)
+	wave,vfv = con[:,0],con[:,1]
+	return wave,vfv * wave / 2.998e+14 # nuF_nu / nu
+
+
+def calzetti(wave):
+	'''The Calzetti et al. (2000) attenuation curve k(lambda), for lambda in microns.'''
+	wave = np.asarray(wave,dtype=np.float64)
+	with np.errstate(divide='ignore'):
+		blue = 2.659*(-2.156 + 1.509/wave - 0.198/wave**2 + 0.011/wave**3) + 4.05
+		red = 2.659*(-1.857 + 1.040/wave) + 4.05
+	return np.clip(np.where(wave < 0.63,blue,red),0,None)
+
+
+def _key(*parts):
+	sha = hashlib.sha1(b'photoz-v1')
+	for part in parts:
+		if isinstance(part,np.ndarray):
+			part = np.ascontiguousarray(part,dtype=np.float64)
+			sha.update(str(part.shape).encode())
+			sha.update(part.data)
+		else:
+			sha.update(repr(part).encode())
+	return sha.hexdigest()
+
+
+class ModelGrid:
+	'''
+	Model fluxes on a (model, z) grid.
+
+	fluxes		(nmodels,nz,nfilters)
+	z		the redshifts
+	names		a name for each model
+	filters		the filter names, in the order of the last axis
+	'''
+	def __init__(self,fluxes,z,names,filters):
+		self.fluxes = np.asarray(fluxes,dtype=np.float64)
+		self.z = np.asarray(z,dtype=np.float64)
+		self.names = list(names)
+		self.filters = list(filters)
+
+	@property
+	def shape(self):
+		return self.fluxes.shape
+
+	def table(self):
+		'''The fluxes as a (nmodels*nz,nfilters) table, model-major.'''
+		return self.fluxes.reshape(-1,self.fluxes.shape[-1])
+
+
+def synthetic_fluxes(templates,filter_curves,z,resolution=2000,block=256):
+	'''
+	(ntemplates,nz,nfilters) fluxes of rest-frame templates at each z.
+
+	templates	a list of (microns, f_nu) rest-frame spectra
+	filter_curves	a list of (microns, throughput)
+	resolution	of the log-spaced wavelength grid, lambda/dlambda
+	block		how many redshifts to work out at a time
+	'''
+	z = np.asarray(z,dtype=np.float64)
+	step = 1. / resolution # in ln(lambda)
+
+	# the observed grid covers every filter, & the rest-frame grid covers
+	# everything that can be redshifted into it
+	lo = min(wave[trans > 0].min() for wave,trans in filter_curves)
+	hi = max(wave[trans > 0].max() for wave,trans in filter_curves)
+	n_obs = int(np.ceil(np.log(hi/lo) / step)) + 1
+	u_obs = np.log(lo) + step*np.arange(n_obs)
+	n_shift = int(np.ceil(np.log1p(z.max()) / step)) + 1
+	u_rest = u_obs[0] - step*n_shift + step*np.arange(n_shift + n_obs + 1)
+
+	# each filter, as weights on the observed grid (dlam/lam is the same
+	# step everywhere, so it's just the throughput, normalized)
+	weights = np.array([np.interp(u_obs,np.log(wave),trans,left=0,right=0)
+						for wave,trans in filter_curves])
+	weights /= weights.sum(axis=1,keepdims=True)
+
+	# every template on the rest-frame grid (flux-conserving)
+	rest = np.array([_rebin.rebin(wave,flux,np.exp(u_rest),fill=0) for wave,flux in templates])
+
+	fluxes = np.empty((len(templates),len(z),len(filter_curves)))
+	lam_obs = np.exp(u_obs) * 1e4 # angstroms, for the IGM
+	for start in range(0,len(z),block):
+		zz = z[start:start+block]
+		# where each observed wavelength falls on the rest grid, at each z
+		position = (u_obs[None,:] - np.log1p(zz)[:,None] - u_rest[0]) / step # (nzz,nobs)
+		left = np.floor(position).astype(np.int64)
+		frac = position - left
+		shifted = rest[:,left] * (1 - frac) + rest[:,left+1] * frac # (ntemplates,nzz,nobs)
+		shifted *= igm.igm_absorption(lam_obs[None,:],zz[:,None])
+		fluxes[:,start:start+block] = shifted @ weights.T
+	return fluxes
+
+
+def _identity(name):
+	# which file a name means & which version of it -- edit (or replace) a
+	# model or filter curve, and the old grids stop matching
+	filename = _data.resolve(name)
+	stat = os.stat(filename)
+	return filename,stat.st_size,stat.st_mtime_ns
+
+
+def model_grid(models=models,filters=filters,z=np.linspace(0,12,1201),ebv=(0,),resolution=2000,
+			   cache=True):
+	'''
+	The ModelGrid for Cloudy models (by name) through filters (by name),
+	each with every E(B-V) of Calzetti dust in `ebv`, at every z.  Cached in
+	the cache directory (`photoz/`), by everything that goes into it: the
+	grid & the model and filter files (path, size & mtime), and the IGM code.
+	'''
+	z = np.asarray(z,dtype=np.float64)
+	names = [f'{m} E(B-V)={e:g}' if len(ebv) > 1 else m for m in models for e in ebv]
+	filename = os.path.join(cache_dir,_key(list(models),list(filters),z,np.asarray(ebv),resolution,
+			[_identity(n) for n in list(models) + list(filters)],igm.version())+'.npy')
+	if cache and os.path.exists(filename):
+		return ModelGrid(np.load(filename),z,names,filters)
+
+	templates = []
+	for m in models:
+		wave,fnu = con_model(m)
+		templates += [(wave,fnu * 10**(-0.4*e*calzetti(wave))) for e in ebv]
+	fluxes = synthetic_fluxes(templates,[filter_curve(f) for f in filters],z,resolution)
+
+	if cache:
+		try:
+			os.makedirs(cache_dir,exist_ok=True)
+			tmp = f'{filename}.{os.getpid()}.tmp'
+			with open(tmp,'wb') as f:
+				np.save(f,fluxes)
+			os.replace(tmp,filename) # so another process never reads half of one
+		except OSError: # (a read-only cache is fine, it's just not saved)
+			pass
+	return ModelGrid(fluxes,z,names,filters)
+
+
+# -- fitting -- #
+# ------------- #
+
+def _weights(flux,error):
+	flux,error = np.asarray(flux,dtype=np.float64),np.asarray(error,dtype=np.float64)
+	good = np.isfinite(flux) & np.isfinite(error) & (error > 0)
+	w = np.zeros(flux.shape)
+	w[good] = 1. / error[good]**2
+	return np.where(good,flux,0.),w
+
+
+def chi2(table,flux,w):
+	'''
+	chi^2 (with the best non-negative amplitude) & that amplitude, for each
+	object (rows of flux & w, the inverse variances) against each row of
+	the (ntable,nfilters) table: both (nobjects,ntable).
+	'''
+	fw = flux * w
+	cross = fw @ table.T # sum(w f F)
+	norm = w @ (table**2).T # sum(w F^2)
+	total = np.sum(fw * flux,axis=1,keepdims=True) # sum(w f^2)
+	fits = (cross > 0) & (norm > 0) # (otherwise the best amplitude is 0)
+	scale = np.divide(cross,norm,out=np.zeros_like(cross),where=fits)
+	return total - scale * cross,scale
+
+
+class Result:
+	'''
+	What `fit` found, for each object:
+
+	pdf		(nobjects,nz) posterior P(z), normalized over the z grid
+	model_prob	(nobjects,nmodels) posterior probability of each model
+	z_best		the z of the best fit (lowest chi^2)
+	model_best	the index (into grid.names) of the best-fit model
+	chi2_best	its chi^2, & scale_best its amplitude
+	z_mean		the mean of P(z)
+	'''
+	def __init__(self,grid,n):
+		self.z = grid.z
+		self.names = grid.names
+		nmodels,nz = grid.shape[:2]
+		self.pdf = np.zeros((n,nz),dtype=np.float32)
+		self.model_prob = np.zeros((n,nmodels),dtype=np.float32)
+		self.z_best = np.zeros(n)
+		self.model_best = np.zeros(n,dtype=np.int64)
+		self.chi2_best = np.zeros(n)
+		self.scale_best = np.zeros(n)
+
+	@property
+	def z_mean(self):
+		return _trapezoid(self.pdf * self.z,self.z)
+
+	def interval(self,level=0.68):
+		'''The central `level` credible interval of each object's z, (nobjects,2).'''
+		cdf = np.cumsum(self.pdf * np.gradient(self.z),axis=1)
+		cdf /= cdf[:,-1:]
+		tails = [(1-level)/2,(1+level)/2]
+		return np.array([[np.interp(t,c,self.z) for t in tails] for c in cdf])
+
+	def _concatenate(self,parts):
+		for name in ['pdf','model_prob','z_best','model_best','chi2_best','scale_best']:
+			setattr(self,name,np.concatenate([getattr(part,name) for part in parts]))
+		return self
+
+
+def _trapezoid(y,x):
+	return np.sum((y[...,1:] + y[...,:-1]) * np.diff(x) / 2,axis=-1)
+
+
+def _fit(grid,flux,error,prior=None,block=None,memory=2**28):
+	flux,w = _weights(flux,error)
+	table = grid.table()
+	nmodels,nz = grid.shape[:2]
+	result = Result(grid,len(flux))
+	log_prior = 0. if prior is None else np.log(np.broadcast_to(prior,(nmodels,nz))).ravel()
+	dz = np.gradient(grid.z)
+
+	# enough objects at a time that the chi^2 & co. take about `memory` bytes
+	block = block or max(1,memory // (len(table) * 8 * 4))
+	for start in range(0,len(flux),block):
+		f,ww = flux[start:start+block],w[start:start+block]
+		c2,scale = chi2(table,f,ww)
+
+		best = np.argmin(c2,axis=1)
+		rows = np.arange(len(best))
+		result.chi2_best[start:start+block] = c2[rows,best]
+		result.scale_best[start:start+block] = scale[rows,best]
+		result.model_best[start:start+block],iz = np.divmod(best,nz)
+		result.z_best[start:start+block] = grid.z[iz]
+
+		# the posterior, relative to the best fit (so exp never overflows)
+		like = np.exp(-0.5 * (c2 - c2[rows,best][:,None]) + log_prior)
+		like = like.reshape(len(f),nmodels,nz)
+		pdf = like.sum(axis=1)
+		evidence = _trapezoid(pdf,grid.z)[:,None]
+		result.pdf[start:start+block] = pdf / evidence
+		model_prob = (like * dz).sum(axis=2)
+		result.model_prob[start:start+block] = model_prob / model_prob.sum(axis=1,keepdims=True)
+	return result
+
+
+def _fit_shard(job):
+	grid,flux,error,kwargs = job
+	return _fit(grid,flux,error,**kwargs)
+
+
+def fit(grid,flux,error,prior=None,workers=1,block=None,memory=2**28):
+	'''
+	Fits every object (rows of flux & error, in the units of your
+	photometry, in the order of grid.filters) against every (model, z) of
+	a ModelGrid, and returns a Result.
+
+	prior		(optional) prior probabilities, (nmodels,nz) or (nz,)
+			-- flat in z & over the models if not given
+	workers		split the catalog over this many processes
+	block, memory	objects fit at a time, by default as many as fit in
+			`memory` bytes (per worker)
+	'''
+	flux,error = np.atleast_2d(flux),np.atleast_2d(error)
+	if flux.shape[1] != len(grid.filters):
+		raise ValueError(f'{flux.shape[1]} fluxes per object, but the grid has {len(grid.filters)} filters')
+	kwargs = {'prior':prior,'block':block,'memory':memory}
+	if workers <= 1 or len(flux) < 2:
+		return _fit(grid,flux,error,**kwargs)
+
+	from concurrent.futures import ProcessPoolExecutor
+	shards = np.array_split(np.arange(len(flux)),workers)
+	jobs = [(grid,flux[s],error[s],kwargs) for s in shards if len(s) > 0]
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		parts = list(pool.map(_fit_shard,jobs))
+	return Result(grid,0)._concatenate(parts)
@@ -0,0 +1,196 @@
+'''
+Rendering a batch of figures as a pipeline, so that loading the next item's
+inputs and writing the last item's file happen while the current one draws,
+instead of load, draw, save, load, draw, save, ...
+
+	loading		a thread pool runs load(item) for the next few items
+			(`prefetch` of them), e.g. reading models & filter curves
+	drawing		the main thread, one item at a time (matplotlib drawing
+			isn't thread-safe, so it stays on one thread)
+	writing		a background thread writes the files, taking them from a
+			queue that holds at most `queue_size` of them
+
+Both hand-offs are bounded: loading stops getting ahead when `prefetch` items
+are loading or waiting, and drawing waits when the writer has `queue_size` files to go,
+so memory stays flat however long the batch is.
+
+render(data) returns the files for one item, as (filename, payload) pairs,
+where the payload is bytes or a `snapshot` of the figure.  A PNG snapshot is
+just the Agg buffer, and it's compressed on the writer thread (zlib lets go
+of the GIL), so even the encoding is taken off the drawing thread.
+
+	>>> def load(name):
+	... 	con = data.load(name,usecols=[0,6])
+	... 	return name,con[:,0],con[:,1]
+	>>> def render(loaded):
+	... 	name,wave,vfv = loaded
+	... 	line.set_data(wave,vfv)
+	... 	return [(name+'.png',snapshot(fig,'png'))]
+	>>> stats = run(models,render,load=load)
+'''
+
+import io
+import os
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from playground import export
+
+_done = object() # (marks the end of the items)
+
+
+class Raster:
+	'''An Agg render of a figure, to be encoded (e.g. as a PNG) when it's written.'''
+	def __init__(self,rgba,dpi):
+		self.rgba,self.dpi = rgba,dpi
+
+
+def snapshot(fig,fmt='png',dpi=None,**kwargs):
+	'''
+	The figure as it is now, ready to be written as `fmt`: a Raster for
+	raster formats (drawn now, encoded by the writer), bytes for the rest.
+	'''
+	fmt = fmt.lower().lstrip('.')
+	if fmt in export.raster:
+		import matplotlib
+		dpi = dpi or matplotlib.rcParams['savefig.dpi']
+		dpi = fig.dpi if dpi == 'figure' else dpi
+		return Raster(export.render_agg(fig,dpi),dpi)
+	buffer = io.BytesIO()
+	fig.savefig(buffer,format=fmt,**kwargs)
+	return buffer.getvalue()
+
+
+def write(filename,payload):
+	'''Writes bytes or a Raster to filename (through a temporary file).'''
+	tmp = f'{filename}.{os.getpid()}.{threading.get_ident()}.tmp'
+	if isinstance(payload,Raster):
+		from PIL import Image
+		fmt = os.path.splitext(filename)[1].lower().lstrip('.')
+		with open(tmp,'wb') as f:
+			export.write_raster(Image.fromarray(payload.rgba),f,fmt,payload.dpi)
+	else:
+		with open(tmp,'wb') as f:
+			f.write(payload)
+	os.replace(tmp,filename) # so nobody sees half a file
+
+
+class Writer:
+	'''
+	A background thread writing files from a bounded queue.  put() blocks
+	while the queue is full; an error in the writer is raised by the next
+	put() or by close().
+	'''
+	def __init__(self,queue_size=4):
+		self.queue = queue.Queue(maxsize=queue_size)
+		self.error = None
+		self.seconds = 0.
+		self.written = []
+		self.thread = threading.Thread(target=self._run,daemon=True)
+		self.thread.start()
+
+	def _run(self):
+		while True:
+			job = self.queue.get()
+			if job is None:
+				return
+			if self.error is not None:
+				continue # (just emptying the queue)
+			start = time.perf_counter()
+			try:
+				write(*job)
+				self.written.append(job[0])
+			except Exception as error:
+				self.error = error
+			self.seconds += time.perf_counter() - start
+
+	def put(self,filename,payload):
+		if self.error is not None:
+			raise self.error
+		self.queue.put((filename,payload))
+
+	def close(self,suppress=False):
+		'''
+		Waits for the files still queued to be written.  An error in the
+		writer is raised here, unless `suppress` (when another error is
+		already on its way up, and shouldn't be replaced by this one).
+		'''
+		self.queue.put(None)
+		self.thread.join()
+		if self.error is not None and not suppress:
+			raise self.error
+
+
+def _feed(items,load,pool,ahead,slots,stop):
+	# walking through the items on its own thread (so even a generator that
+	# does its own reading runs ahead), starting a load for each one -- once
+	# there's a slot for it, so no more than `prefetch` are ever started
+	# ahead of the drawing
+	try:
+		for item in items:
+			while not slots.acquire(timeout=0.05):
+				if stop.is_set():
+					return
+			if stop.is_set():
+				return
+			ahead.put(pool.submit(load,item) if load is not None else item)
+		ahead.put(_done)
+	except BaseException as error:
+		ahead.put(error)
+
+
+def run(items,render,load=None,prefetch=2,loaders=2,queue_size=4):
+	'''
+	Renders every item, with loading & writing overlapped with drawing.
+
+	items		anything iterable -- names, parameters, or the data itself
+	render		render(data) --> [(filename, bytes or snapshot), ...]
+	load		load(item) --> data, run on the thread pool (None to
+			pass the items straight to render)
+	prefetch	how many items can be loaded ahead of the drawing (at
+			least 1)
+	loaders		threads loading items
+	queue_size	how many files can be waiting for the writer
+
+	Returns the files written, & how long was spent on each part.
+	'''
+	stats = {'items':0,'waiting for input':0.,'rendering':0.,'waiting for writer':0.}
+	ahead = queue.Queue() # (bounded by the slots)
+	slots = threading.Semaphore(max(1,prefetch))
+	stop = threading.Event()
+	writer = Writer(queue_size)
+	with ThreadPoolExecutor(max_workers=loaders) as pool:
+		feeder = threading.Thread(target=_feed,args=(items,load,pool,ahead,slots,stop),daemon=True)
+		feeder.start()
+		try:
+			while True:
+				start = time.perf_counter()
+				next_item = ahead.get()
+				if next_item is _done:
+					break
+				if isinstance(next_item,BaseException):
+					raise next_item
+				data = next_item.result() if load is not None else next_item
+				slots.release() # (it's being drawn now, not ahead)
+				stats['waiting for input'] += time.perf_counter() - start
+
+				start = time.perf_counter()
+				outputs = render(data)
+				stats['rendering'] += time.perf_counter() - start
+
+				start = time.perf_counter()
+				for filename,payload in outputs:
+					writer.put(filename,payload)
+				stats['waiting for writer'] += time.perf_counter() - start
+				stats['items'] += 1
+		except BaseException:
+			writer.close(suppress=True) # (the render's error is the one to see)
+			raise
+		finally:
+			stop.set()
+			feeder.join() # (it sees `stop` while waiting for a slot)
+		writer.close()
+	stats['writing'] = writer.seconds
+	stats['files'] = writer.written
+	return stats
@@ -0,0 +1,88 @@
+'''
+Laying out line labels automatically, instead of nudging each one by hand
+(like the old `shifts` table in `bandpass-zlines`), so they don't pile on
+top of each other at whatever redshift or x range you're looking at.
+
+Two pieces:
+
+	text_size	how big a label is.  Each label is measured once, on a
+			small canvas of its own (never by drawing the figure),
+			and cached by (text, font), so measuring the same labels
+			every frame of an animation costs a dictionary lookup.
+	pack		where to put a row of labels so none of them overlap,
+			each as close as it can get to where it wants to be.
+
+`pack` only ever moves labels to the right, so a label never ends up on the
+wrong side of its own line (unless it runs out of room at the right edge).
+Subtracting the widths of the labels before each one turns "no overlaps"
+into "the left edges never decrease", so the packed row is just a running
+maximum -- np.maximum.accumulate, no loop over the labels.
+
+	>>> width,height = text_sizes(labels,fontsize=15)	# in points
+	>>> left = pack(x,height*dpi/72+pad,lo,hi)		# for vertical labels
+'''
+
+import threading
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.text import Text
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from playground import session
+
+_metrics = {} # (text, font, linespacing) --> (width, height) in points
+_ruler = None # the figure & renderer the labels are measured with
+_lock = threading.Lock()
+
+
+def _measure(text,prop,linespacing):
+	# the label's size on a little canvas of our own, at 72 dpi (so in
+	# points), laid out by matplotlib itself
+	global _ruler
+	if _ruler is None:
+		figure = session.ignore(Figure(dpi=72)) # (it's meant to live as long as the process)
+		_ruler = figure,FigureCanvasAgg(figure).get_renderer()
+	figure,renderer = _ruler
+	kwargs = {} if linespacing is None else {'linespacing':linespacing}
+	box = Text(0,0,text,fontproperties=prop,figure=figure,**kwargs).get_window_extent(renderer)
+	return box.width,box.height
+
+
+def text_size(text,fontsize=None,fontproperties=None,linespacing=None):
+	'''
+	The (width,height) of a label in points, before it's rotated (cached).
+	Multi-line labels are stacked like matplotlib does.
+	'''
+	prop = FontProperties() if fontproperties is None else fontproperties.copy()
+	if fontsize is not None:
+		prop.set_size(fontsize)
+	key = (text,hash(prop),linespacing)
+	with _lock:
+		if key not in _metrics:
+			_metrics[key] = (0.,0.) if text == '' else _measure(text,prop,linespacing)
+		return _metrics[key]
+
+
+def text_sizes(texts,fontsize=None,fontproperties=None,linespacing=None):
+	'''text_size for a list of labels, as (width,height) arrays.'''
+	sizes = np.broadcast_to(np.asarray(fontsize,dtype=object),len(texts))
+	return np.array([text_size(text,size,fontproperties,linespacing)
+					 for text,size in zip(texts,sizes)]).reshape(-1,2).T
+
+
+def pack(x,widths,lo=-np.inf,hi=np.inf):
+	'''
+	Left edges for a row of labels that want to start at x (in order) and
+	are `widths` wide, so that none overlap and they all fit in [lo,hi].
+	If they can't all fit, they're squeezed to overlap evenly.
+	'''
+	x,widths = np.asarray(x,dtype=float),np.asarray(widths,dtype=float)
+	if len(x) == 0:
+		return x.copy()
+	total = widths.sum()
+	if total > hi - lo: # not enough room, so they'll overlap a bit
+		widths = widths * (hi - lo) / total
+		total = hi - lo
+	before = np.concatenate([[0],np.cumsum(widths)[:-1]]) # widths of the labels before each
+	start = np.clip(np.maximum.accumulate(x - before),lo,hi - total)
+	return start + before
@@ -0,0 +1,191 @@
+'''
+Multi-resolution image pyramids, so that very large maps (full-frame MOSFIRE
+2D spectra, IFU mosaics, ...) aren't sent to the renderer at full size when
+they only cover a few hundred pixels of the figure.
+
+Level 0 is the full image, and each level after that is block-averaged by
+another factor of 2 (NaN-aware: NaNs are ignored in the averages, and a block
+that is all NaN stays NaN).  The levels are built once, a tile of rows at a
+time, and cached on disk as `.npy` files that get memory-mapped back in -- so
+the next render (or another process) doesn't have to build them again.
+
+	>>> pyr = Pyramid.from_fits('mosfire_2d.fits')
+	>>> im = imshow(ax,pyr,cmap='gray',clim=(-1.5,2.3))
+
+`imshow` looks at how many pixels the axes will take up at the output DPI and
+picks the smallest level that still has at least that many pixels.
+'''
+
+import os
+import hashlib
+import numpy as np
+from playground import data as _data
+
+cache_dir = os.path.join(_data.cache_dir,'pyramids')
+
+
+def block_average(image,factor=2,rows=512):
+	'''
+	NaN-aware block average of a 2D image by an integer factor.  Any rows or
+	columns left over at the edges (if the shape isn't a multiple of the
+	factor) are averaged into smaller edge blocks rather than dropped.
+	The image is read `rows` output rows at a time, so it can be a memmap.
+	'''
+	ny,nx = image.shape
+	oy,ox = -(-ny // factor),-(-nx // factor) # ceiling division
+	output = np.empty((oy,ox),dtype=np.float32)
+
+	for start in range(0,oy,rows):
+		stop = min(start+rows,oy)
+		tile = np.asarray(image[start*factor:stop*factor],dtype=np.float32)
+
+		# padding with NaNs so the tile splits evenly into blocks
+		pad_y,pad_x = (stop-start)*factor - tile.shape[0],ox*factor - nx
+		if pad_y or pad_x:
+			tile = np.pad(tile,((0,pad_y),(0,pad_x)),constant_values=np.nan)
+
+		blocks = tile.reshape(stop-start,factor,ox,factor)
+		finite = np.isfinite(blocks)
+		total = np.where(finite,blocks,0).sum(axis=(1,3))
+		count = finite.sum(axis=(1,3))
+		with np.errstate(invalid='ignore',divide='ignore'):
+			output[start:stop] = np.where(count > 0,total/count,np.nan)
+	return output
+
+
+def _save(filename,image):
+	# temporary file first, so another process never reads half a level
+	tmp = f'{filename}.{os.getpid()}.tmp'
+	with open(tmp,'wb') as f:
+		np.save(f,image)
+	os.replace(tmp,filename)
+
+
+class Pyramid:
+	'''
+	The levels of an image pyramid, each one a (memory-mapped) 2D array.
+	Use Pyramid.from_array or Pyramid.from_fits to make one.
+	'''
+	def __init__(self,levels):
+		self.levels = levels
+
+	@property
+	def shape(self):
+		return self.levels[0].shape
+
+	@classmethod
+	def build(cls,image,key,min_size=256,rows=512):
+		'''
+		Builds (or loads, if it's already cached under `key`) the pyramid for
+		`image`, halving it until the smaller side is under `min_size`.
+		'''
+		folder = os.path.join(cache_dir,key)
+		os.makedirs(folder,exist_ok=True)
+
+		level,levels = 0,[]
+		while True:
+			filename = os.path.join(folder,f'level{level}.npy')
+			if not os.path.exists(filename):
+				if level == 0: # copying the original, tile by tile
+					tmp = f'{filename}.{os.getpid()}.tmp'
+					full = np.lib.format.open_memmap(tmp,mode='w+',
+												dtype=np.float32,shape=image.shape)
+					for start in range(0,image.shape[0],rows):
+						full[start:start+rows] = image[start:start+rows]
+					full.flush()
+					del full
+					os.replace(tmp,filename)
+				else:
+					_save(filename,block_average(levels[-1],2,rows))
+			levels.append(np.load(filename,mmap_mode='r'))
+
+			if min(levels[-1].shape) < min_size or min(levels[-1].shape) < 2:
+				break
+			level += 1
+		return cls(levels)
+
+	@classmethod
+	def from_array(cls,image,key=None,min_size=256):
+		'''Pyramid for an array; the cache key defaults to a hash of its contents.'''
+		if key is None:
+			sha = hashlib.sha1(str((image.shape,image.dtype)).encode())
+			for start in range(0,image.shape[0],512):
+				sha.update(np.ascontiguousarray(image[start:start+512]).data)
+			key = sha.hexdigest()
+		return cls.build(image,key,min_size=min_size)
+
+	@classmethod
+	def from_fits(cls,filename,hdu=0,min_size=256):
+		'''Pyramid for one HDU of a FITS file (read a tile at a time, through its section).'''
+		import astropy.io.fits as fits
+		info = os.stat(filename)
+		key = hashlib.sha1(str((os.path.abspath(filename),info.st_size,
+							info.st_mtime,hdu)).encode()).hexdigest()
+		# (not memmap: astropy won't memory-map a scaled image, and section
+		# only reads -- and scales -- the rows that get sliced anyway)
+		with fits.open(filename,memmap=False) as hdul:
+			return cls.build(hdul[hdu].section,key,min_size=min_size)
+
+	def level_for(self,npix_y,npix_x):
+		'''
+		The smallest level that still has at least (npix_y,npix_x) pixels,
+		i.e. the one that matches the resolution it will be shown at.
+		'''
+		for level in range(len(self.levels)-1,-1,-1):
+			ny,nx = self.levels[level].shape
+			if ny >= npix_y and nx >= npix_x:
+				return level
+		return 0
+
+	def cutout(self,level,window=None):
+		'''
+		A (y0,y1,x0,x1) window of the full-resolution image, taken from
+		`level`.  Returns the array and its extent in full-resolution pixels.
+		'''
+		ny,nx = self.shape
+		if window is None:
+			window = (0,ny,0,nx)
+		y0,y1,x0,x1 = window
+		f = 2**level
+		image = self.levels[level][y0//f:-(-y1//f),x0//f:-(-x1//f)]
+		extent = (x0//f*f-0.5,min(-(-x1//f)*f,nx)-0.5,y0//f*f-0.5,min(-(-y1//f)*f,ny)-0.5)
+		return np.asarray(image),extent
+
+
+def axes_pixels(ax,dpi=None):
+	'''How many (y,x) output pixels the axes cover, when saved at `dpi`.'''
+	fig = ax.get_figure()
+	bbox = ax.get_position() # in figure fraction, doesn't need a draw
+	width,height = fig.get_size_inches()
+	dpi = dpi or fig.dpi
+	return int(np.ceil(bbox.height*height*dpi)),int(np.ceil(bbox.width*width*dpi))
+
+
+def imshow(ax,pyramid,window=None,dpi=None,transpose=False,**kwargs):
+	'''
+	Like ax.imshow, but only sends the pyramid level that matches the pixel
+	size of the axes (at `dpi`, default the figure's) to the renderer.  The
+	image keeps the pixel coordinates of the full-resolution array, so
+	anything else plotted on top lines up the same as with a full imshow.
+
+	window		(y0,y1,x0,x1) part of the full image to show
+	transpose	shows the image transposed, e.g. for 2D spectra stored with
+			wavelength along the rows
+	'''
+	npix_y,npix_x = axes_pixels(ax,dpi)
+	if transpose:
+		npix_y,npix_x = npix_x,npix_y
+
+	ny,nx = pyramid.shape
+	y0,y1,x0,x1 = window or (0,ny,0,nx)
+	# scaling the pixel target up from the window to the full image
+	level = pyramid.level_for(npix_y*ny/(y1-y0),npix_x*nx/(x1-x0))
+	image,extent = pyramid.cutout(level,(y0,y1,x0,x1))
+
+	if transpose:
+		image = image.T
+		extent = (extent[2],extent[3],extent[0],extent[1])
+	kwargs.setdefault('origin','lower')
+	if kwargs['origin'] == 'upper':
+		extent = (extent[0],extent[1],extent[3],extent[2])
+	return ax.imshow(image,extent=extent,**kwargs)
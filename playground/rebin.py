@@ -0,0 +1,104 @@
+'''
+Flux-conserving rebinning: moving spectra from one wavelength grid to another
+(e.g. the Cloudy `.con` grid onto a filter's `.dat` grid, or a redshifted
+spectrum onto an instrument's pixels) without losing or making up flux.
+
+Each wavelength is the center of a bin (its edges are halfway to the
+neighbors), and a new bin's flux density is the average over it of the old
+bins, weighted by how much of each one it overlaps -- so the integral of
+the spectrum is the same on both grids, and narrow lines don't get skipped
+over like they would by np.interp when the new grid is coarser.
+
+Those overlaps only depend on the two grids, so they're worked out once as
+a sparse (nnew,nold) matrix and cached by the grids' fingerprints; a whole
+(...,nwave) stack of spectra is then one sparse matrix product:
+
+	>>> new_flux = rebin(zwave,fluxes,pixels)	# fluxes is (...,len(zwave))
+	>>> to_pixels = rebinning(zwave,pixels)		# or keep the matrix around
+	>>> new_flux = to_pixels(fluxes)
+
+Both grids can be in any order (the Cloudy models go from long to short
+wavelengths), and the output is in the order of the new grid.  New bins
+that aren't fully covered by the old grid get `fill`.
+'''
+
+import threading
+import numpy as np
+import scipy.sparse as sparse
+from playground.resolution import fingerprint
+
+_cache = {} # (old grid, new grid) --> Rebinning
+_lock = threading.Lock()
+
+
+def edges(wave):
+	'''Bin edges for a sorted grid of bin centers, halfway between them.'''
+	wave = np.asarray(wave,dtype=np.float64)
+	if len(wave) < 2:
+		raise ValueError('need at least two wavelengths to make bins')
+	mid = (wave[1:] + wave[:-1]) / 2
+	return np.concatenate([[2*wave[0] - mid[0]],mid,[2*wave[-1] - mid[-1]]])
+
+
+def overlap_matrix(wave,new_wave):
+	'''
+	Sparse (len(new_wave),len(wave)) matrix of the fraction of each new bin
+	covered by each old bin, and which new bins are fully covered.
+	'''
+	wave,new_wave = np.asarray(wave,dtype=np.float64),np.asarray(new_wave,dtype=np.float64)
+	order,new_order = np.argsort(wave),np.argsort(new_wave)
+	old_edges,new_edges = edges(wave[order]),edges(new_wave[new_order])
+
+	# cutting the wavelength axis at every edge of both grids: each piece
+	# is inside one old bin & one new bin (or off the end of one of them)
+	cuts = np.union1d(old_edges,new_edges)
+	mid,width = (cuts[1:] + cuts[:-1]) / 2,np.diff(cuts)
+	i = np.searchsorted(new_edges,mid) - 1
+	j = np.searchsorted(old_edges,mid) - 1
+	inside = (i >= 0) & (i < len(new_wave)) & (j >= 0) & (j < len(wave))
+	i,j = i[inside],j[inside]
+
+	rows,cols = new_order[i],order[j] # back to the grids' own orders
+	weights = width[inside] / np.diff(new_edges)[i]
+	matrix = sparse.csr_matrix((weights,(rows,cols)),shape=(len(new_wave),len(wave)))
+	covered = np.bincount(rows,weights,minlength=len(new_wave)) > 1 - 1e-9
+	return matrix,covered
+
+
+class Rebinning:
+	'''
+	Rebins spectra from the grid `wave` onto `new_wave` (same units).
+	matrix is the sparse overlap matrix, covered the new bins it fully covers.
+	'''
+	def __init__(self,wave,new_wave):
+		self.nwave = len(wave)
+		self.new_wave = np.asarray(new_wave)
+		self.matrix,self.covered = overlap_matrix(wave,new_wave)
+
+	def __call__(self,flux,fill=0):
+		'''Rebins a spectrum or a stack of them, (...,nwave) --> (...,nnew).'''
+		flux = np.asarray(flux)
+		shape = flux.shape[:-1]
+		stack = flux.reshape(-1,self.nwave).T # (nwave,nspectra)
+
+		result = (self.matrix @ stack).T.astype(flux.dtype if flux.dtype.kind == 'f' else np.float64)
+		if fill is not None and not self.covered.all():
+			result[:,~self.covered] = fill
+		return result.reshape(shape + (len(self.new_wave),))
+
+
+def rebinning(wave,new_wave):
+	'''A (cached) Rebinning between these two grids.'''
+	key = (fingerprint(wave),fingerprint(new_wave))
+	with _lock:
+		if key not in _cache:
+			_cache[key] = Rebinning(wave,new_wave)
+		return _cache[key]
+
+
+def rebin(wave,flux,new_wave,fill=0):
+	'''
+	Rebins flux (one spectrum, or a (...,nwave) stack) from wave onto
+	new_wave, conserving flux.
+	'''
+	return rebinning(wave,new_wave)(flux,fill=fill)
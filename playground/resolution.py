@@ -0,0 +1,205 @@
+'''
+Instrumental broadening: what a spectrum looks like through a disperser with
+resolving power R(lambda), e.g. the JWST/NIRSpec medium-resolution gratings
+in `inset-axes-long-plot` (the "medium res" insets).
+
+A resolution element is lambda/R wide, so if R changes across the band the
+line spread function does too -- unless the spectrum is resampled onto a
+grid in u = integral R(lambda)/lambda dlambda, where every resolution element
+is exactly 1 wide.  (For a constant R that's just a log-lambda grid, and for
+the gratings, where R is roughly proportional to lambda, it's nearly linear.)
+On that grid the broadening is a single gaussian, so it's one FFT convolution
+for a whole stack of spectra, and then the result is resampled back.
+
+	>>> g140m = Broadening(zwave,'G140M','F100LP')
+	>>> wave,smooth = g140m.wave,g140m(fluxes)	# fluxes is (...,nwave)
+
+The two resampling matrices (native --> u grid, and u grid --> output) only
+depend on the wavelengths and the disperser setup, so `broadening` caches
+the whole setup by a fingerprint of the wavelength grid: hundreds of models
+on the same grid share one set of matrices.
+
+R(lambda) defaults to a simple model for the gratings -- R = R0 * lambda /
+lambda_center, with R0 = 1000 at the center wavelength in the grating's
+name -- but it can also be a number, a function of wavelength (microns), or
+a (wave,R) table, e.g. from the JWST dispersion files.
+'''
+
+import hashlib
+import threading
+import numpy as np
+import scipy.fft
+import scipy.sparse as sparse
+
+# NIRSpec gratings & the wavelength range (microns) of each filter with them
+dispersers = {'G140M':{'R':1000,'center':1.40,'filters':{'F070LP':(0.70,1.27),'F100LP':(0.97,1.89)}},
+			  'G235M':{'R':1000,'center':2.35,'filters':{'F170LP':(1.66,3.17)}},
+			  'G395M':{'R':1000,'center':3.95,'filters':{'F290LP':(2.87,5.27)}}}
+
+fwhm = 2 * np.sqrt(2*np.log(2)) # gaussian FWHM / sigma
+
+_cache = {} # setup --> Broadening
+_lock = threading.Lock()
+
+
+def resolving_power(disperser,R=None):
+	'''
+	R(lambda) for a disperser, as a function of wavelength in microns.
+	R can be a number, a function, or a (wave,R) table to interpolate.
+	'''
+	if callable(R):
+		return R
+	if R is None:
+		info = dispersers[disperser.upper()]
+		R0,center = info['R'],info['center']
+		return lambda wave: R0 * np.asarray(wave) / center
+	if np.isscalar(R):
+		return lambda wave: np.full(np.shape(wave),float(R))
+	table_wave,table_R = np.asarray(R[0],dtype=float),np.asarray(R[1],dtype=float)
+	order = np.argsort(table_wave)
+	return lambda wave: np.interp(wave,table_wave[order],table_R[order])
+
+
+def fingerprint(wave):
+	'''A short hash of a wavelength grid, for the caches.'''
+	wave = np.ascontiguousarray(wave)
+	sha = hashlib.sha1(str((wave.shape,wave.dtype.str)).encode())
+	sha.update(wave.data)
+	return sha.hexdigest()
+
+
+def interpolation_matrix(x,xnew):
+	'''
+	Sparse (len(xnew),len(x)) matrix that linearly interpolates values on x
+	(any order) onto xnew; points outside of x get the end values.
+	'''
+	x,xnew = np.asarray(x,dtype=np.float64),np.asarray(xnew,dtype=np.float64)
+	order = np.argsort(x)
+	xs = x[order]
+	right = np.clip(np.searchsorted(xs,xnew),1,len(xs)-1)
+	left = right - 1
+	w = np.clip((xnew - xs[left]) / (xs[right] - xs[left]),0,1)
+	rows = np.repeat(np.arange(len(xnew)),2)
+	cols = order[np.column_stack([left,right]).ravel()]
+	weights = np.column_stack([1-w,w]).ravel()
+	return sparse.csr_matrix((weights,(rows,cols)),shape=(len(xnew),len(x)))
+
+
+class Broadening:
+	'''
+	Broadens spectra on the wavelength grid `wave` (microns, any order) to
+	the resolution of a disperser, over `band` (defaults to the filter's).
+
+	disperser,filt	e.g. 'G140M','F100LP' -- or give R & band yourself
+	R		see `resolving_power`
+	oversample	u-grid points per gaussian sigma (at least -- it's more
+			if the spectrum is sampled more finely than that)
+	pixels		output samples per resolution element -- None to give
+			back the native wavelengths inside the band instead
+			(NIRSpec has ~2.2 pixels per resolution element)
+	'''
+	def __init__(self,wave,disperser,filt=None,R=None,band=None,oversample=4,pixels=None):
+		wave = np.asarray(wave,dtype=np.float64)
+		self.nwave = len(wave)
+		if band is None:
+			filters = dispersers[disperser.upper()]['filters']
+			band = filters[filt.upper()] if filt else (min(b[0] for b in filters.values()),
+														max(b[1] for b in filters.values()))
+		self.band = band
+		self.R = resolving_power(disperser,R)
+
+		# u(lambda), on a fine grid a bit wider than the band (for the wings)
+		sigma = 1/fwhm # one resolution element is 1 in u, its FWHM
+		margin = 6 * band[1] / self.R(band[1]) # six resolution elements past the edges
+		fine = np.geomspace(max(band[0]-margin,1e-6),band[1]+margin,20000)
+		u = np.concatenate([[0],np.cumsum(np.diff(fine) * self.R(fine[1:]) / fine[1:])])
+
+		# the uniform u grid (sampling the gaussian, and at least as finely
+		# as the spectrum itself, so narrow lines aren't skipped over), & the
+		# gaussian on it
+		du = sigma / oversample
+		inside = np.sort(wave[(wave >= fine[0]) & (wave <= fine[-1])])
+		if len(inside) > 1:
+			spacing = np.median(np.diff(np.interp(inside,fine,u)))
+			du = min(du,max(spacing,du/100))
+		self.u = np.arange(u[0],u[-1],du)
+		ugrid_wave = np.interp(self.u,u,fine)
+		half = int(np.ceil(5*sigma/du))
+		offsets = np.arange(-half,half+1) * du
+		kernel = np.exp(-0.5*(offsets/sigma)**2)
+		self.kernel = kernel / kernel.sum()
+
+		# native --> u grid
+		self.into = interpolation_matrix(wave,ugrid_wave)
+
+		# u grid --> output
+		if pixels is None:
+			self.wave = wave[(wave >= band[0]) & (wave <= band[1])]
+		else:
+			lo,hi = np.interp(band,fine,u)
+			self.wave = np.interp(np.arange(lo,hi,1/pixels),u,fine)
+		self.out = interpolation_matrix(ugrid_wave,self.wave)
+
+		# the kernel's FFT, padded so the convolution doesn't wrap around
+		self.nfft = scipy.fft.next_fast_len(len(self.u) + len(self.kernel) - 1,real=True)
+		self.kernel_fft = scipy.fft.rfft(self.kernel,self.nfft)
+
+	def __call__(self,flux,workers=None):
+		'''
+		Broadens a spectrum or a stack of them, (...,nwave) --> (...,nout).
+		workers is passed to scipy.fft, for the FFTs of big stacks.
+		'''
+		flux = np.asarray(flux)
+		shape = flux.shape[:-1]
+		stack = flux.reshape(-1,self.nwave).T # (nwave,nspectra)
+
+		on_u = self.into @ stack
+		spectrum = scipy.fft.rfft(on_u,self.nfft,axis=0,workers=workers)
+		spectrum *= self.kernel_fft[:,None]
+		smooth = scipy.fft.irfft(spectrum,self.nfft,axis=0,workers=workers)
+		half = len(self.kernel) // 2
+		smooth = smooth[half:half+len(self.u)] # the 'same' part of the convolution
+
+		result = (self.out @ smooth).T.astype(flux.dtype if flux.dtype.kind == 'f' else np.float64)
+		return result.reshape(shape + (len(self.wave),))
+
+
+def _setup_key(value):
+	# arrays (& (wave,R) tables of them) go in by their contents, since repr()
+	# cuts big arrays short with '...' -- two different tables would match
+	if isinstance(value,np.ndarray):
+		return fingerprint(value)
+	if isinstance(value,(list,tuple)):
+		return (type(value).__name__,) + tuple(_setup_key(v) for v in value)
+	if callable(value):
+		return value # (an R(lambda) function, by identity)
+	return repr(value)
+
+
+def broadening(wave,disperser,filt=None,**kwargs):
+	'''A (cached) Broadening for this wavelength grid & setup.'''
+	key = (fingerprint(wave),disperser.upper(),filt.upper() if filt else None,
+			tuple(sorted((name,_setup_key(value)) for name,value in kwargs.items())))
+	with _lock:
+		if key not in _cache:
+			_cache[key] = Broadening(wave,disperser,filt,**kwargs)
+		return _cache[key]
+
+
+def broaden(wave,flux,disperser,filt=None,**kwargs):
+	'''
+	Broadens flux (one spectrum, or a (...,nwave) stack) to the resolution
+	of a disperser.  Returns the output wavelengths & the broadened flux.
+	'''
+	engine = broadening(wave,disperser,filt,**kwargs)
+	return engine.wave,engine(flux)
+
+
+def all_gratings(wave,flux,setups=None,**kwargs):
+	'''
+	Broadens a stack of spectra for every grating/filter setup (defaults to
+	all of them in `dispersers`).  Returns {(grating,filter):(wave,flux)}.
+	'''
+	if setups is None:
+		setups = [(d,f) for d in dispersers for f in dispersers[d]['filters']]
+	return {(d,f):broaden(wave,flux,d,f,**kwargs) for d,f in setups}
@@ -0,0 +1,282 @@
+'''
+A retained-mode scene for animations where only a handful of artists change
+from frame to frame (like the dither frames, where a star moves or a label
+shows up), so that each frame doesn't have to redraw the whole figure.
+
+Artists are registered by name, as either static (drawn once, into a cached
+background) or dynamic.  A frame is a set of deltas, {name: {property:
+value}}, which are applied with artist.set(...) -- anything matplotlib
+can set works, e.g.
+
+	{'star1': {'center': (-0.02,0.6), 'visible': True},
+	 'label': {'text': 'Dither A', 'y': 0.7}}
+
+The blit path then only restores the background over the regions that
+changed (for each changed artist, the box around both where it was last
+frame & where it is now), and redraws the artists that overlap those
+regions, clipped to them.  Artists that are changed directly (not through
+deltas) are picked up too: an artist counts as changed when it moved, or
+when its properties differ from the last time it was drawn -- so setting
+something to what it already was costs nothing.  When the changed regions
+add up to more than `max_dirty` of the figure (every artist sliding at
+once, in a tween), a full draw is quicker, and that's what's done.
+
+A static artist that's above a dynamic one (in zorder) can't be part of
+the background, or the dynamic one would be drawn over it -- so it's kept
+out of it, and redrawn along with the dynamic artists instead.  Anything
+that isn't registered is part of the background, so register whatever is
+drawn on top of a dynamic artist.
+
+`tween` makes in-between frames from two snapshots of the scene (positions,
+sizes, & colors are interpolated, and artists that appear or disappear are
+faded in or out), for a smoother, higher frame rate animation.
+
+	>>> scene = Scene(fig)
+	>>> scene.add('slit',slit,static=True)
+	>>> scene.add('star',star)
+	>>> for delta in deltas:
+	... 	frames.append(scene.render(delta))
+	>>> save_gif(frames,'figure.gif',fps=30)
+'''
+
+import numpy as np
+from matplotlib.text import Text
+from matplotlib.colors import to_rgba
+from matplotlib.transforms import Bbox
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from playground import textcache
+
+# properties that `snapshot` records (& `tween` interpolates) for each artist,
+# when the artist has a getter for them
+tweenable = ['visible','alpha','center','radius','xy','width','height','position',
+			 'xdata','ydata','facecolor','edgecolor','color','text','fontsize']
+
+
+class Scene:
+	def __init__(self,fig,pad=6,max_dirty=0.6):
+		self.fig = fig
+		if not isinstance(fig.canvas,FigureCanvasAgg):
+			FigureCanvasAgg(fig)
+		self.canvas = fig.canvas
+		self.pad = pad # extra points around each changed region, for line widths, outlines, etc.
+		self.max_dirty = max_dirty # (fraction of the figure) past which a frame is drawn in full
+		self.static,self.dynamic = {},{}
+		self.background = None
+		self._overlay = {} # name --> (static artist above a dynamic one, its extent)
+		self._extents = {} # name --> where the artist was drawn last frame
+		self._drawn = {} # name --> its properties when it was drawn
+
+	def add(self,name,artist,static=False):
+		'''Registers an artist by name.  Static artists go in the background.'''
+		if static:
+			self.static[name] = artist
+		else:
+			artist.set_animated(True) # the normal draw skips it
+			self.dynamic[name] = artist
+		self.background = None # the background needs redrawing
+		return artist
+
+	def __getitem__(self,name):
+		return self.dynamic.get(name,self.static.get(name))
+
+	def apply(self,deltas):
+		'''Applies {name: {property: value}} deltas to the registered artists.'''
+		for name,props in deltas.items():
+			if name in self.static:
+				self.background = None # changing a static artist means a full redraw
+			self[name].set(**props)
+
+	def snapshot(self):
+		'''The current tweenable properties of every dynamic artist.'''
+		return {name:_props(artist) for name,artist in self.dynamic.items()}
+
+	def _extent(self,artist,renderer):
+		if not artist.get_visible():
+			return None
+		try:
+			bbox = artist.get_window_extent(renderer)
+		except (RuntimeError,ValueError): # e.g. a line with no data yet
+			return None
+		if not np.all(np.isfinite(bbox.bounds)) or bbox.width < 0 or bbox.height < 0:
+			return None
+		if isinstance(artist,Text) and artist.get_path_effects():
+			# (text with path effects is drawn as unhinted outlines, which
+			# can run a few percent past the hinted extent)
+			bbox = bbox.expanded(1.1,1.1)
+		return bbox.padded(self.pad * self.fig.dpi / 72)
+
+	def _draw_clipped(self,artist,region,renderer):
+		# drawing an artist clipped to the region, so nothing outside of it is
+		# drawn twice (which would darken anything semi-transparent)
+		clip_box,clip_on = artist.get_clip_box(),artist.get_clip_on()
+		clip = region if clip_box is None or not clip_on else Bbox.intersection(region,clip_box)
+		if clip is None:
+			return
+		artist.set_clip_box(clip)
+		artist.set_clip_on(True)
+		artist.draw(renderer)
+		artist.set_clip_box(clip_box)
+		artist.set_clip_on(clip_on)
+
+	def render(self,deltas=None,blit=True):
+		'''
+		Applies the deltas and draws the frame.  Returns the frame as an
+		(ny,nx,4) RGBA uint8 array.  With blit=False it's a full redraw.
+		'''
+		with textcache.installed(): # (labels are redrawn every frame)
+			return self._render({} if deltas is None else deltas,blit)
+
+	def _draw_background(self):
+		lowest = min((artist.get_zorder() for artist in self.dynamic.values()),default=np.inf)
+		for name,artist in self.static.items():
+			artist.set_animated(artist.get_zorder() >= lowest) # (kept out of the background)
+		self.canvas.draw()
+		self.background = np.asarray(self.canvas.buffer_rgba()).copy()
+		renderer = self.canvas.get_renderer()
+		self._overlay = {name:(artist,self._extent(artist,renderer))
+							for name,artist in self.static.items() if artist.get_animated()}
+		return renderer
+
+	def _dirty(self,extents,props):
+		# the box around where each changed artist was & is, in whole pixels
+		regions = []
+		for name in self.dynamic:
+			old,new = self._extents.get(name),extents[name]
+			if _same(old,new) and _same(self._drawn.get(name),props[name]):
+				continue
+			boxes = [bbox for bbox in (old,new) if bbox is not None]
+			bbox = Bbox.intersection(Bbox.union(boxes),self.fig.bbox) if boxes else None
+			if bbox is not None and bbox.width > 0 and bbox.height > 0:
+				regions.append(Bbox([[np.floor(bbox.x0),np.floor(bbox.y0)],[np.ceil(bbox.x1),np.ceil(bbox.y1)]]))
+		return _merge(regions)
+
+	def _render(self,deltas,blit):
+		self.apply(deltas)
+		canvas,fig = self.canvas,self.fig
+		renderer = canvas.get_renderer()
+		extents = {name:self._extent(artist,renderer) for name,artist in self.dynamic.items()}
+		props = {name:_props(artist) for name,artist in self.dynamic.items()}
+
+		regions = None
+		if blit and self.background is not None:
+			regions = self._dirty(extents,props)
+			if sum(b.width*b.height for b in regions) > self.max_dirty * fig.bbox.width * fig.bbox.height:
+				regions = None
+		if regions is None: # a full draw: the background, & everything else on top
+			renderer = self._draw_background()
+			extents = {name:self._extent(artist,renderer) for name,artist in self.dynamic.items()}
+			regions = [fig.bbox]
+		else: # putting the background back where things changed (the buffer's rows go from the top down)
+			buffer,height = np.asarray(canvas.buffer_rgba()),self.background.shape[0]
+			for bbox in regions:
+				x0,y0,x1,y1 = [int(v) for v in bbox.extents]
+				buffer[height-y1:height-y0,x0:x1] = self.background[height-y1:height-y0,x0:x1]
+
+		# redrawing the artists that touch those regions, in z order
+		layers = [(artist,extents[name]) for name,artist in self.dynamic.items()]
+		layers += list(self._overlay.values())
+		for artist,extent in sorted(layers,key=lambda layer: layer[0].get_zorder()):
+			if extent is None:
+				continue
+			for region in regions:
+				if region is fig.bbox:
+					artist.draw(renderer)
+					break
+				if extent.overlaps(region):
+					self._draw_clipped(artist,region,renderer)
+		self._extents,self._drawn = extents,props
+
+		return np.asarray(canvas.buffer_rgba()).copy()
+
+
+def _props(artist):
+	props = {}
+	for prop in tweenable:
+		getter = getattr(artist,'get_'+prop,None)
+		if getter is not None and hasattr(artist,'set_'+prop):
+			props[prop] = getter()
+	return props
+
+
+def _same(a,b):
+	'''Whether two extents, or two sets of properties, are the same.'''
+	if isinstance(a,Bbox) and isinstance(b,Bbox):
+		return np.array_equal(a.extents,b.extents)
+	if isinstance(a,dict) and isinstance(b,dict):
+		return a.keys() == b.keys() and all(_same(a[k],b[k]) for k in a)
+	try:
+		return bool(np.array_equal(a,b)) if not isinstance(a,str) else a == b
+	except (TypeError,ValueError):
+		return a == b
+
+
+def _merge(regions):
+	'''
+	Joins overlapping regions until none of them overlap, so that nothing
+	gets drawn twice.
+	'''
+	regions = list(regions)
+	merged = True
+	while merged:
+		merged = False
+		for i in range(len(regions)):
+			for j in range(i+1,len(regions)):
+				if regions[i].overlaps(regions[j]):
+					regions[i] = Bbox.union([regions[i],regions.pop(j)])
+					merged = True
+					break
+			if merged:
+				break
+	return regions
+
+
+def _mix(a,b,t):
+	'''Linear interpolation of numbers, arrays, colors, or tuples of them.'''
+	try:
+		a_arr,b_arr = np.asarray(a,dtype=float),np.asarray(b,dtype=float)
+		if a_arr.shape == b_arr.shape:
+			mixed = a_arr + (b_arr - a_arr) * t
+			return tuple(mixed) if isinstance(a,tuple) else mixed
+	except (TypeError,ValueError):
+		pass
+	try: # colors
+		return tuple(np.array(to_rgba(a)) + (np.array(to_rgba(b)) - np.array(to_rgba(a))) * t)
+	except (TypeError,ValueError):
+		return b if t >= 0.5 else a
+
+
+def tween(start,end,t):
+	'''
+	The deltas for a moment `t` (0 to 1) between two snapshots.  Artists that
+	appear or disappear are faded in or out instead of popping.
+	'''
+	deltas = {}
+	for name,props in end.items():
+		before,delta = start.get(name,{}),{}
+		was,now = before.get('visible',True),props.get('visible',True)
+		if not was and not now:
+			continue
+		for prop,value in props.items():
+			if prop in ('visible','alpha') or prop not in before:
+				continue
+			if not was: # appearing -- it just fades in, from wherever it ends up
+				delta[prop] = value
+			elif not now:
+				delta[prop] = before[prop]
+			elif prop == 'text': # (which could look like a number or a color)
+				delta[prop] = value if t >= 0.5 else before[prop]
+			else:
+				delta[prop] = _mix(before[prop],value,t)
+		alpha = props.get('alpha') if now else before.get('alpha')
+		if was != now:
+			alpha = (1. if alpha is None else alpha) * (t if now else 1-t)
+		delta['visible'] = True
+		delta['alpha'] = alpha
+		deltas[name] = delta
+	return deltas
+
+
+def save_gif(frames,filename,fps=30,loop=0):
+	'''Writes RGBA frames (e.g. from Scene.render) to a GIF, with Pillow.'''
+	from playground import encode
+	return encode.write_gif(frames,filename,fps=fps,loop=loop)
@@ -0,0 +1,284 @@
+'''
+Keeping long-running render processes (an overnight batch, a worker in a
+web service) from slowly filling up with figures & arrays nobody needs.
+
+Two pieces:
+
+	RenderSession	a context around one render, which notes what it
+			leaves behind: figures still open in pyplot, figures
+			still alive (and how many artists they hold), the memory
+			traced by tracemalloc, and the change in RSS.  A figure
+			that outlives its render is a leak -- something is still
+			holding on to it (a list of frames, an animation, a
+			callback), so it never gets garbage collected.
+	recycled	runs renders on worker processes, and retires any worker
+			that goes over a memory ceiling (or has done max_tasks
+			renders), starting a fresh one in its place.  Whatever
+			leaked in the old worker goes with it, so memory stays
+			bounded however long the batch is.
+
+	>>> with RenderSession('zlines 7.5') as session:
+	... 	fig = figures.zlines(7.5)
+	... 	export.save(fig,'figure',['png'])
+	>>> session.report.leaks			# [] if nothing was left behind
+	>>> print(session.report)
+
+	>>> results,reports = recycled(render_one,items,workers=4,ceiling=1500)
+
+The figures are found by asking the garbage collector for every Figure
+that's alive, when the session starts & when it ends -- nothing in
+matplotlib is patched to keep track of them.  That can't tell which thread
+made a figure, though, so a session counts every figure that's new &
+still alive when it ends -- including ones another thread is still busy
+with.  With renders in a thread pool (see playground.figures), the reports
+are only about leaks when the renders are done one at a time (or in
+processes, like `recycled`).  A figure that's *meant* to stay around (like
+the one playground.placement measures labels on) is passed to `ignore`,
+and isn't counted.  tracemalloc is only started if you ask for it
+(trace=True), since tracing every allocation slows everything down -- and
+it's one tracer for the whole process, like RSS, so those numbers include
+whatever other threads allocated in the meantime.
+'''
+
+import gc
+import os
+import sys
+import time
+import queue
+import weakref
+import threading
+import traceback
+import tracemalloc
+import multiprocessing
+from matplotlib.figure import Figure
+
+_ignored = weakref.WeakSet() # figures that are meant to outlive a render
+_ignored_lock = threading.Lock()
+
+
+def live_figures():
+	'''Every Figure that's still alive (that the garbage collector knows of).'''
+	return [obj for obj in gc.get_objects() if isinstance(obj,Figure)]
+
+
+def ignore(fig):
+	'''
+	Marks a figure that's meant to stay around (a module-level cache, say),
+	so no session counts it as a leak.  Returns the figure.
+	'''
+	with _ignored_lock:
+		_ignored.add(fig)
+	return fig
+
+
+def rss():
+	'''This process's resident memory, in MB.'''
+	try:
+		with open('/proc/self/statm') as f:
+			return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+	except (OSError,ValueError,AttributeError): # not Linux -- the peak is the best there is
+		import resource
+		peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def _pyplot_figures():
+	# (only if pyplot is already in use -- no point importing it to find nothing)
+	if 'matplotlib.pyplot' not in sys.modules:
+		return set()
+	return set(sys.modules['matplotlib.pyplot'].get_fignums())
+
+
+def artist_count(fig):
+	'''How many artists a figure holds (every one of them, all the way down).'''
+	return len(fig.findobj())
+
+
+class Report:
+	'''What one render left behind (memory in MB).'''
+	def __init__(self,name):
+		self.name = name
+		self.seconds = 0.
+		self.rss_before = self.rss_after = 0.
+		self.traced = self.traced_peak = None # (only with tracemalloc)
+		self.allocations = [] # (where, MB) of the biggest new allocations
+		self.figures = [] # (label, artists) of figures still alive afterwards
+		self.pyplot_open = [] # pyplot figure numbers opened & never closed
+
+	@property
+	def rss_delta(self):
+		return self.rss_after - self.rss_before
+
+	@property
+	def leaks(self):
+		'''Descriptions of everything that outlived the render.'''
+		leaks = [f'pyplot figure {num} still open' for num in self.pyplot_open]
+		leaks += [f'{label} still alive, holding {n} artists' for label,n in self.figures]
+		return leaks
+
+	def __str__(self):
+		lines = [f'{self.name}: {self.seconds:.2f} s, RSS {self.rss_after:.1f} MB ({self.rss_delta:+.1f})']
+		if self.traced is not None:
+			lines.append(f'	traced {self.traced:+.2f} MB (peak {self.traced_peak:.2f} MB)')
+		lines += ['	' + leak for leak in self.leaks]
+		lines += [f'	{size:+.2f} MB at {where}' for where,size in self.allocations]
+		return '\n'.join(lines)
+
+
+class RenderSession:
+	'''
+	A context around one render (see the module docstring).
+
+	name		for the report
+	close		close any pyplot figures the render left open
+	trace		trace allocations with tracemalloc (slower), reporting
+			the `top` biggest new ones by line
+	collect		run the garbage collector before measuring, so only
+			memory something still points to counts as left behind
+
+	The Report is `session.report`, and `on_leak` (if given) is called
+	with it whenever the render left something behind.
+	'''
+	def __init__(self,name='render',close=True,trace=False,top=5,collect=True,on_leak=None):
+		self.name,self.close,self.trace,self.top = name,close,trace,top
+		self.collect,self.on_leak = collect,on_leak
+		self.report = None
+
+	def __enter__(self):
+		if self.collect:
+			gc.collect()
+		self.report = Report(self.name)
+		self._before = weakref.WeakSet(live_figures())
+		self._pyplot = _pyplot_figures()
+		if self.trace:
+			self._started = not tracemalloc.is_tracing()
+			if self._started:
+				tracemalloc.start()
+			tracemalloc.reset_peak()
+			self._snapshot = tracemalloc.take_snapshot()
+			self._traced = tracemalloc.get_traced_memory()[0]
+		self.report.rss_before = rss()
+		self._start = time.perf_counter()
+		return self
+
+	def __exit__(self,*exc):
+		report = self.report
+		report.seconds = time.perf_counter() - self._start
+		opened = sorted(_pyplot_figures() - self._pyplot)
+		if self.close and opened:
+			import matplotlib.pyplot as plt
+			for num in opened:
+				plt.close(num)
+			opened = []
+		report.pyplot_open = opened
+
+		if self.collect:
+			gc.collect()
+		with _ignored_lock:
+			ignored = set(_ignored)
+		for fig in live_figures():
+			if fig not in self._before and fig not in ignored:
+				label = fig.get_label() or f'Figure at 0x{id(fig):x}'
+				report.figures.append((label,artist_count(fig)))
+
+		if self.trace:
+			current,peak = tracemalloc.get_traced_memory()
+			report.traced = (current - self._traced) / 2**20
+			report.traced_peak = (peak - self._traced) / 2**20
+			grown = tracemalloc.take_snapshot().compare_to(self._snapshot,'lineno')
+			report.allocations = [(str(stat.traceback[0]),stat.size_diff/2**20)
+								  for stat in grown[:self.top] if stat.size_diff > 0]
+			self._snapshot = None
+			if self._started:
+				tracemalloc.stop()
+		report.rss_after = rss()
+
+		if report.leaks and self.on_leak is not None:
+			self.on_leak(report)
+		return False
+
+
+# -- recycling worker processes -- #
+# -------------------------------- #
+
+def _worker(func,tasks,results,ceiling,max_tasks,session):
+	done = 0
+	while True:
+		job = tasks.get()
+		if job is None:
+			return
+		i,item = job
+		try:
+			with RenderSession(str(item),**session) as s:
+				value = func(item)
+			results.put(('done',i,(value,s.report)))
+		except Exception as error:
+			results.put(('error',i,f'{error!r} in a worker:\n{traceback.format_exc()}'))
+		done += 1
+		if (ceiling is not None and rss() > ceiling) or (max_tasks is not None and done >= max_tasks):
+			results.put(('retired',os.getpid(),rss()))
+			return
+
+
+def recycled(func,items,workers=2,ceiling=None,max_tasks=None,trace=False,context=None,
+			 on_retire=None):
+	'''
+	func(item) for every item, on `workers` processes, each render in a
+	RenderSession.  A worker whose RSS is over `ceiling` (MB) after a
+	render, or that has done `max_tasks` renders, is retired and replaced.
+
+	func		a module-level function (it's sent to the workers)
+	trace		trace allocations in each session (see RenderSession)
+	context		a multiprocessing context (or its name, e.g. 'spawn')
+	on_retire	called with (pid, MB) whenever a worker is retired
+
+	Returns the results & the session reports, both in the order of items.
+	An error in func is raised here (as a RuntimeError with the worker's
+	traceback), after the workers are stopped.
+	'''
+	items = list(items)
+	if isinstance(context,str) or context is None:
+		context = multiprocessing.get_context(context)
+	tasks,results = context.Queue(),context.Queue()
+	for job in enumerate(items):
+		tasks.put(job)
+	session = {'trace':trace} # (each session is named after its item)
+
+	def start():
+		process = context.Process(target=_worker,args=(func,tasks,results,ceiling,max_tasks,session),
+								  daemon=True)
+		process.start()
+		return process
+
+	processes = [start() for i in range(min(workers,len(items)))]
+	values,reports = [None]*len(items),[None]*len(items)
+	remaining,error = len(items),None
+	try:
+		while remaining and error is None:
+			try:
+				kind,key,payload = results.get(timeout=1)
+			except queue.Empty:
+				if any(p.exitcode not in (None,0) for p in processes):
+					raise RuntimeError('a worker died (killed for memory?) with renders left to do')
+				continue
+			if kind == 'done':
+				values[key],reports[key] = payload
+				remaining -= 1
+			elif kind == 'error':
+				error = RuntimeError(payload)
+			elif kind == 'retired':
+				if on_retire is not None:
+					on_retire(key,payload)
+				processes = [p for p in processes if p.pid != key]
+				if remaining > len(processes): # (only if there's still work for it)
+					processes.append(start())
+	finally:
+		for p in processes:
+			tasks.put(None)
+		for p in processes:
+			p.join(timeout=5)
+			if p.is_alive():
+				p.terminate()
+	if error is not None:
+		raise error
+	return values,reports
@@ -0,0 +1,154 @@
+'''
+Image stamps (like the F160W stamp in `big-picture-spectra`) cut out of a
+large mosaic, with the slits drawn on from their sky positions instead of
+from hand-placed pixel vertices.
+
+Each slit is described the way it is in the mask design:
+
+	{'pa': 23.,		position angle, degrees east of north
+	 'width': 0.7,		arcsec
+	 'length': 7.,		arcsec
+	 'offset': (0,0),	(optional) slit center minus target, (east,north) arcsec
+	 'color': '#CF6060', 'label': '2016'}
+
+The corners of every slit (for every target) are turned into pixels with a
+single WCS call, and the stamp itself is read through playground.fitsio,
+so only the stamp's window of the mosaic is ever read (through the HDU's
+section).  Stamps are cached, so remaking many objects' stamps costs (at
+most) the reads -- the cached arrays are read-only, so copy a stamp before
+changing it.
+
+	>>> obj = stamp('goodsn_f160w.fits',189.15,62.25,size=35,slits=slits)
+	>>> obj['stamp'], obj['slits']   # ready for playground.panels
+'''
+
+import os
+from functools import lru_cache
+import numpy as np
+from astropy.wcs import WCS
+from playground import fitsio
+
+
+@lru_cache(maxsize=32)
+def _wcs(path,mtime,hdu):
+	return WCS(fitsio.header(path,hdu))
+
+
+def mosaic_wcs(filename,hdu=0):
+	'''The (cached) WCS of a mosaic.'''
+	return _wcs(os.path.abspath(filename),os.stat(filename).st_mtime_ns,hdu)
+
+
+def slit_corners(ra,dec,pa,width,length,east=0,north=0):
+	'''
+	Sky positions (degrees) of the four corners of slits.  Every argument
+	can be an array (they're broadcast together), so this does any number
+	of slits at once.  Returns ra & dec arrays with a last axis of 4.
+	'''
+	pa = np.radians(np.asarray(pa,dtype=float))[...,None]
+	along = np.array([-0.5,-0.5,0.5,0.5]) * np.asarray(length,dtype=float)[...,None]
+	across = np.array([-0.5,0.5,0.5,-0.5]) * np.asarray(width,dtype=float)[...,None]
+
+	# offsets from the target in arcsec, (east,north), along & across the slit
+	de = np.asarray(east,dtype=float)[...,None] + along*np.sin(pa) + across*np.cos(pa)
+	dn = np.asarray(north,dtype=float)[...,None] + along*np.cos(pa) - across*np.sin(pa)
+
+	dec = np.asarray(dec,dtype=float)[...,None]
+	ra = np.asarray(ra,dtype=float)[...,None]
+	return ra + de/3600/np.cos(np.radians(dec)),dec + dn/3600
+
+
+def _slit_key(slits):
+	# hashable version of the slit definitions, for the cache
+	return tuple((s['pa'],s['width'],s['length'],tuple(s.get('offset',(0,0))),
+				s.get('color','w'),s.get('label','')) for s in slits)
+
+
+def stamps(filename,targets,size=35,slits=(),hdu=0):
+	'''
+	Stamps for many targets at once.
+
+	targets		list (or array) of (ra,dec) in degrees
+	size		stamp size in pixels, either one number or (ny,nx)
+	slits		the slit definitions (same for every target) -- or a list
+			with a list of slits for each target
+
+	Returns a list of {'stamp':array,'slits':[[vertices,color,label],...]}.
+	Vertices are (x,y) pixels in the stamp, which is what Polygon wants when
+	the stamp is shown with imshow.
+	'''
+	targets = np.atleast_2d(np.asarray(targets,dtype=float))
+	if len(slits) > 0 and isinstance(slits[0],dict):
+		slits = [slits] * len(targets)
+	elif len(slits) == 0:
+		slits = [[]] * len(targets)
+	ny,nx = (size,size) if np.isscalar(size) else size
+
+	wcs = mosaic_wcs(filename,hdu)
+	x,y = wcs.all_world2pix(targets[:,0],targets[:,1],0)
+	x0 = np.round(x).astype(int) - nx//2 # corners of the stamps in the mosaic
+	y0 = np.round(y).astype(int) - ny//2
+
+	# every corner of every slit of every target, in one go
+	owner = np.array([i for i,s in enumerate(slits) for _ in s],dtype=int)
+	flat = [s for ss in slits for s in ss]
+	if flat:
+		ra,dec = slit_corners(targets[owner,0],targets[owner,1],
+							[s['pa'] for s in flat],[s['width'] for s in flat],
+							[s['length'] for s in flat],
+							[s.get('offset',(0,0))[0] for s in flat],
+							[s.get('offset',(0,0))[1] for s in flat])
+		sx,sy = wcs.all_world2pix(ra.ravel(),dec.ravel(),0)
+		sx = sx.reshape(-1,4) - x0[owner,None]
+		sy = sy.reshape(-1,4) - y0[owner,None]
+
+	results,k = [],0
+	for i in range(len(targets)):
+		entry = {'stamp':_read(filename,hdu,wcs.pixel_shape,(ny,nx),(y0[i],x0[i])),'slits':[]}
+		for s in slits[i]:
+			entry['slits'].append([np.column_stack([sx[k],sy[k]]),s.get('color','w'),
+									s.get('label','')])
+			k += 1
+		results.append(entry)
+	return results
+
+
+def _read(filename,hdu,mosaic_shape,shape,corner):
+	'''Reads a stamp, padding with NaNs where it hangs off the mosaic.'''
+	nx,ny = mosaic_shape # the WCS keeps these in FITS order
+	y0,x0 = corner
+	y1,x1 = min(y0+shape[0],ny),min(x0+shape[1],nx)
+	padded = np.full(shape,np.nan,dtype=np.float32)
+	if y1 <= max(y0,0) or x1 <= max(x0,0): # entirely off the mosaic
+		return padded
+
+	data = fitsio.cutout(filename,np.s_[max(y0,0):y1,max(x0,0):x1],hdu)
+	if data.shape == tuple(shape):
+		return data
+	y,x = max(-y0,0),max(-x0,0)
+	padded[y:y+data.shape[0],x:x+data.shape[1]] = data
+	return padded
+
+
+@lru_cache(maxsize=1024)
+def _cached_stamp(path,mtime,hdu,ra,dec,size,slit_key):
+	slits = [{'pa':pa,'width':w,'length':l,'offset':off,'color':c,'label':lab}
+				for pa,w,l,off,c,lab in slit_key]
+	entry = stamps(path,[(ra,dec)],size,slits,hdu)[0]
+	entry['stamp'].setflags(write=False) # (shared by everyone who asks for it)
+	for vertices,_,_ in entry['slits']:
+		vertices.setflags(write=False)
+	return entry
+
+
+def stamp(filename,ra,dec,size=35,slits=(),hdu=0):
+	'''
+	One stamp (see `stamps`), cached by file, position, size, & slits --
+	so rebuilding an object's stamp is free after the first time.
+	'''
+	path = os.path.abspath(filename)
+	size = size if np.isscalar(size) else tuple(size)
+	entry = _cached_stamp(path,os.stat(path).st_mtime_ns,hdu,float(ra),float(dec),
+						size,_slit_key(slits))
+	# a dict & lists of their own (the arrays are read-only)
+	return {'stamp':entry['stamp'],'slits':[list(s) for s in entry['slits']]}
@@ -0,0 +1,169 @@
+'''
+Histograms & summary statistics for maps (or whole data cubes) that are too
+big to hold in memory, for the colorbar histogram in `imshow-colorbar-hist`.
+
+Instead of `ax.hist(data.flatten())` -- which copies the whole array, NaN
+regions and all -- the FITS file is read through its HDU's `section`, a
+block of rows at a time.  Each block only adds to running counts:
+
+	- the number of finite values, and their min & max
+	- a fixed-edge histogram (the one that gets plotted)
+	- a much finer histogram over the same range, used for the median and
+	  any other quantile.  The quantiles are exact to within one fine bin,
+	  i.e. (max-min)/(bins*resolution), which is far below anything you'd
+	  see on a colorbar.
+
+(The fine histogram is used instead of a P-square or t-digest estimator
+because those update one value at a time, which is slow in python, while a
+histogram update is a single np.bincount per block.)
+
+	>>> stats = stream_fits('cube.fits',bins=40)
+	>>> stats.clims, stats.median
+	>>> mh.draw(preview,title='log$_{10}$U',stats=stats) # see playground.maphist
+'''
+
+import numpy as np
+import astropy.io.fits as fits
+
+
+class StreamingHistogram:
+	'''
+	Running histogram & statistics over the range [lo,hi].
+
+	bins		number of bins in the histogram that gets plotted
+	resolution	number of fine bins in each of those, for the quantiles
+	'''
+	def __init__(self,lo,hi,bins=40,resolution=256):
+		if not hi > lo: # only one value in the map, give it some room
+			lo,hi = lo-0.5,hi+0.5
+		self.lo,self.hi = float(lo),float(hi)
+		self.bins = bins
+		self.resolution = resolution
+		self.fine = np.zeros(bins*resolution,dtype=np.int64)
+		self.below,self.above = 0,0 # finite values outside of [lo,hi]
+		self.count = 0
+		self.min,self.max = np.inf,-np.inf
+
+	def add(self,block):
+		'''Adds a block of values (any shape, NaNs are skipped).'''
+		values = np.asarray(block).ravel()
+		values = values[np.isfinite(values)]
+		if len(values) == 0:
+			return
+
+		self.count += len(values)
+		self.min = min(self.min,values.min())
+		self.max = max(self.max,values.max())
+
+		below,above = values < self.lo,values > self.hi
+		self.below += np.count_nonzero(below)
+		self.above += np.count_nonzero(above)
+		values = values[~(below | above)]
+
+		nfine = len(self.fine)
+		indx = np.floor((values - self.lo) * (nfine / (self.hi - self.lo))).astype(np.int64)
+		indx = np.clip(indx,0,nfine-1) # the last bin includes its right edge
+		self.fine += np.bincount(indx,minlength=nfine)
+
+	@property
+	def edges(self):
+		return np.linspace(self.lo,self.hi,self.bins+1)
+
+	@property
+	def counts(self):
+		'''
+		The histogram counts, same as np.histogram(values,bins,(lo,hi))[0]
+		(give or take values sitting right on a bin edge).
+		'''
+		return self.fine.reshape(self.bins,self.resolution).sum(axis=1)
+
+	@property
+	def clims(self):
+		'''The range of the finite values, for linking to a colorbar.'''
+		return [self.min,self.max]
+
+	def quantile(self,q):
+		'''Estimates a quantile (0 <= q <= 1) from the fine histogram.'''
+		target = q * self.count - self.below
+		if target <= 0:
+			return self.lo if self.below == 0 else self.min
+		cumulative = np.cumsum(self.fine)
+		if target > cumulative[-1]:
+			return self.max
+
+		# linearly interpolating inside the fine bin that holds the target
+		i = np.searchsorted(cumulative,target)
+		before = cumulative[i-1] if i > 0 else 0
+		width = (self.hi - self.lo) / len(self.fine)
+		return self.lo + width * (i + (target - before) / self.fine[i])
+
+	@property
+	def median(self):
+		return self.quantile(0.5)
+
+
+def iter_blocks(data,block_size=2**26):
+	'''
+	Yields consecutive blocks along the first axis of an array (or of a
+	FITS section), each holding roughly `block_size` bytes.  For a 2D map
+	these are groups of rows, for a cube they're groups of planes.
+	'''
+	shape = data.shape
+	row_bytes = np.dtype(data.dtype).itemsize * int(np.prod(shape[1:]))
+	rows = max(1,block_size // max(row_bytes,1))
+	for start in range(0,shape[0],rows):
+		yield data[start:start+rows]
+
+
+def stream_blocks(blocks,bins=40,clims=None,resolution=256):
+	'''
+	Builds a StreamingHistogram from a function that returns a fresh
+	iterator of blocks each time it's called.  If the clims aren't given
+	it takes one extra (cheap) pass through the blocks to find them.
+	'''
+	if clims is None:
+		lo,hi = np.inf,-np.inf
+		for block in blocks():
+			values = np.asarray(block)
+			values = values[np.isfinite(values)]
+			if len(values) > 0:
+				lo,hi = min(lo,values.min()),max(hi,values.max())
+		if lo > hi:
+			raise ValueError('no finite values to make a histogram of')
+		clims = [lo,hi]
+
+	stats = StreamingHistogram(clims[0],clims[1],bins=bins,resolution=resolution)
+	for block in blocks():
+		stats.add(block)
+	return stats
+
+
+def stream_array(data,bins=40,clims=None,block_size=2**26,resolution=256):
+	'''Same as stream_fits, but for an array you already have (or a np.memmap).'''
+	return stream_blocks(lambda: iter_blocks(data,block_size),bins=bins,
+						clims=clims,resolution=resolution)
+
+
+def stream_fits(filename,hdu=0,bins=40,clims=None,transform=None,block_size=2**26,
+				resolution=256):
+	'''
+	Streams the data in one HDU of a FITS file (read block by block, through
+	the HDU's section) into a StreamingHistogram.
+
+	transform	applied to each block before it's counted, e.g. np.log10 to
+			match a map that's shown in log space
+	block_size	roughly how many bytes to read at a time
+	'''
+	# (memmap=False: astropy won't memory-map a scaled image, and section only
+	# reads the rows that get sliced -- applying BSCALE/BZERO to those -- anyway)
+	with fits.open(filename,memmap=False) as hdul:
+		section = hdul[hdu].section
+
+		def blocks():
+			for block in iter_blocks(section,block_size):
+				if transform is not None:
+					with np.errstate(divide='ignore',invalid='ignore'):
+						block = transform(block)
+				yield block
+
+		return stream_blocks(blocks,bins=bins,clims=clims,resolution=resolution)
@@ -0,0 +1,214 @@
+'''
+One cache, for the whole process, of the text work that doesn't change from
+render to render: parsed mathtext (r'Ly$\alpha$', '$z$: 7.50') and the
+glyph outlines of text drawn as paths (all of the text outlined with
+PathEffects.withStroke in the dither frames & big-picture panels).
+
+Matplotlib already caches mathtext, but only the last 50 expressions and
+only per parser -- and every savefig makes a new renderer with a new parser,
+so a batch or an animation parses the same labels all over again every
+frame.  Text drawn as a path (which is how path effects draw text) isn't
+cached at all.  While the caches are installed:
+
+	mathtext	parsed layouts, keyed by (string, font properties, dpi,
+			output type), shared by every parser
+	text paths	glyph outlines, keyed by (string, font properties);
+			they're in font units, so the same outline works at any
+			dpi & size
+
+Both are LRU caches with a fixed number of entries, so labels that change
+every frame (like a redshift counter) just cycle through without growing
+the cache forever.
+
+Installing them also makes mathtext safe to use from several threads at once
+(see playground.figures): matplotlib parses every expression with the same
+parser object, so parsing is done one expression at a time, under a lock --
+which, since each expression is only parsed once, costs next to nothing.
+
+Nothing is installed on import.  Installing swaps in a private method of
+matplotlib's MathTextParser & TextToPath, so it's opt-in -- either around
+the renders that want it (the dither, panels & scene render loops and
+figures.render do this), or for the rest of the process:
+
+	>>> with textcache.installed():
+	... 	render_all_the_frames()
+	>>> textcache.install()			# (until uninstall())
+	>>> textcache.stats()
+
+If a matplotlib version doesn't have (or has changed) one of those methods,
+that cache just isn't installed, and matplotlib does what it always does.
+The entries stay cached between installs, so the next render still gets
+the hits.
+'''
+
+import inspect
+import threading
+import contextlib
+from collections import OrderedDict
+import numpy as np
+from matplotlib.mathtext import MathTextParser
+from matplotlib.textpath import TextToPath
+
+
+class LRU:
+	'''A thread-safe least-recently-used cache of at most maxsize entries.'''
+	def __init__(self,maxsize=1024):
+		self.maxsize = maxsize
+		self.hits = self.misses = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self,key,make):
+		'''The cached value for key, or make() (which is then cached).'''
+		with self._lock:
+			if key in self._entries:
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return self._entries[key]
+			self.misses += 1
+		value = make() # (outside of the lock, so other threads aren't held up)
+		with self._lock:
+			self._entries[key] = value
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.maxsize:
+				self._entries.popitem(last=False)
+		return value
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self.hits = self.misses = 0
+
+	def __len__(self):
+		return len(self._entries)
+
+
+mathtext_layouts = LRU(2048)
+text_paths = LRU(4096)
+
+_originals = {}
+_parsing = threading.Lock() # matplotlib's mathtext parser is one object for the whole process
+
+
+def _parse_cached(parser,s,dpi,prop,antialiased,load_glyph_flags):
+	# (prop is already a private copy, made by MathTextParser.parse)
+	key = (parser._output_type,s,dpi,prop,antialiased,load_glyph_flags)
+	parse = _originals['parse']
+	def make():
+		with _parsing: # (it keeps its state on itself while it parses, so one thread at a time)
+			return parse(parser,s,dpi,prop,antialiased,load_glyph_flags)
+	return mathtext_layouts.get(key,make)
+
+
+def _get_text_path(text2path,prop,s,ismath=False,**kwargs):
+	key = (s,prop.copy(),ismath,repr(sorted(kwargs.items())))
+	def make():
+		verts,codes = _originals['text_path'](text2path,prop,s,ismath=ismath,**kwargs)
+		verts = np.array(verts,dtype=float).reshape(-1,2)
+		codes = np.array(codes,dtype=np.uint8)
+		verts.flags.writeable = codes.flags.writeable = False # (they're shared)
+		return verts,codes
+	return text_paths.get(key,make)
+
+
+def _signature(function):
+	try:
+		return list(inspect.signature(getattr(function,'__wrapped__',function)).parameters)
+	except (TypeError,ValueError):
+		return None
+
+# what each patched method is expected to look like, so that a matplotlib
+# that changed them is left alone
+_expected = {'parse':['self','s','dpi','prop','antialiased','load_glyph_flags'],
+			 'text_path':['self','prop','s','ismath']}
+
+
+def _patch():
+	if _originals:
+		return
+	parse = getattr(MathTextParser,'_parse_cached',None)
+	if parse is not None and _signature(parse) == _expected['parse']:
+		_originals['parse'] = getattr(parse,'__wrapped__',parse)
+		_originals['parse_method'] = parse
+		MathTextParser._parse_cached = _parse_cached
+	text_path = getattr(TextToPath,'get_text_path',None)
+	if text_path is not None and (_signature(text_path) or [])[:4] == _expected['text_path']:
+		_originals['text_path'] = text_path
+		TextToPath.get_text_path = _get_text_path
+	_originals['installed'] = True # (even if neither could be, so it isn't tried every time)
+
+
+def _unpatch():
+	if 'parse_method' in _originals:
+		MathTextParser._parse_cached = _originals['parse_method']
+	if 'text_path' in _originals:
+		TextToPath.get_text_path = _originals['text_path']
+	_originals.clear()
+
+
+_installing = threading.Lock()
+_pinned = False # install() was called
+_users = 0 # installed() contexts still open, in any thread
+
+
+def install(mathtext=2048,paths=4096):
+	'''
+	Turns the caches on for the rest of the process (or until uninstall;
+	it's fine to call this more than once), holding at most `mathtext`
+	layouts & `paths` outlines.  Returns which caches could be installed.
+	'''
+	global _pinned
+	with _installing:
+		mathtext_layouts.maxsize,text_paths.maxsize = mathtext,paths
+		_patch()
+		_pinned = True
+	return active()
+
+
+@contextlib.contextmanager
+def installed(mathtext=None,paths=None):
+	'''
+	The caches, turned on for the duration of the with block.  Blocks can be
+	nested or open in several threads at once -- matplotlib's own methods
+	are only put back when the last one closes (and not at all after
+	install()).  The sizes default to what they already are.
+	'''
+	global _users
+	with _installing:
+		mathtext_layouts.maxsize = mathtext or mathtext_layouts.maxsize
+		text_paths.maxsize = paths or text_paths.maxsize
+		_patch()
+		_users += 1
+	try:
+		yield active()
+	finally:
+		with _installing:
+			_users -= 1
+			if not _users and not _pinned:
+				_unpatch()
+
+
+def active():
+	'''The caches that are installed right now, e.g. ['mathtext','text paths'].'''
+	return [name for name,key in [('mathtext','parse'),('text paths','text_path')] if key in _originals]
+
+
+def uninstall():
+	'''Puts matplotlib's own text handling back, and empties the caches.'''
+	global _pinned
+	with _installing:
+		_pinned = False
+		if not _users:
+			_unpatch()
+	clear()
+
+
+def clear():
+	mathtext_layouts.clear()
+	text_paths.clear()
+
+
+def stats():
+	'''Hits, misses & entries of each cache.'''
+	return {name:{'hits':cache.hits,'misses':cache.misses,'entries':len(cache)}
+			for name,cache in [('mathtext',mathtext_layouts),('text paths',text_paths)]}
@@ -0,0 +1,121 @@
+'''
+The frames of a redshifting spectrum (like `redshifted-spectrum-animation`),
+worked out all at once before the animation starts.
+
+Every frame's flux -- IGM absorption at that redshift, and the dimming with
+redshift -- is computed in one vectorized pass (a block of frames at a time,
+so memory stays flat), and stored as an (nframes,nwave) float32 `.npy` in the
+cache directory.  It's memory-mapped back in, and cached by its inputs, so
+the animation function just picks out row i, and remaking the animation (or
+making it at another frame rate) doesn't redo the IGM.  The code of
+playground/igm_absorption.py is part of the cache key too, so changing the
+IGM prescription makes new frames instead of reusing the old ones.
+
+	>>> z = redshifts(fps=60,seconds=8,z_max=12)
+	>>> frames = RedshiftFrames(wave,sed,z,xlim=(0.1,2))
+	>>> line.set_data(frames.observed(i),frames.flux[i])
+
+Wavelengths are in microns (as in the Cloudy models).
+'''
+
+import os
+import hashlib
+import numpy as np
+from playground import data as _data
+from playground import igm_absorption as igm
+
+cache_dir = os.path.join(_data.cache_dir,'zstacks')
+
+
+def redshifts(fps=60,seconds=8,z_min=0,z_max=12,n_frames=None):
+	'''Evenly spaced redshifts for an animation of `seconds` at `fps`.'''
+	n_frames = n_frames or int(round(fps*seconds))
+	return np.linspace(z_min,z_max,n_frames)
+
+
+def in_view(wave,z,xlim):
+	'''
+	Which (rest-frame) wavelengths ever land inside the observed xlim, plus
+	one point on either side so the line still runs off the edges.
+	'''
+	z = np.asarray(z)
+	lo,hi = xlim[0]/(1+z.max()),xlim[1]/(1+z.min())
+	keep = (wave >= lo) & (wave <= hi)
+	keep[1:] |= keep[:-1].copy() # neighbors on either side
+	keep[:-1] |= keep[1:].copy()
+	return keep
+
+
+def flux_stack(wave,sed,z,dim=0.3,block=64,filename=None):
+	'''
+	The (nframes,nwave) float32 stack of the spectrum at each redshift:
+	sed * IGM absorption / (1 + z*dim).  Written to `filename` (a `.npy`)
+	if given, in which case the memory-mapped copy is returned.
+	'''
+	wave = np.asarray(wave,dtype=np.float64)
+	sed = np.asarray(sed,dtype=np.float64)
+	z = np.asarray(z,dtype=np.float64)
+	shape = (len(z),len(wave))
+
+	if filename is None:
+		stack = np.empty(shape,dtype=np.float32)
+	else:
+		tmp = f'{filename}.{os.getpid()}.tmp'
+		stack = np.lib.format.open_memmap(tmp,mode='w+',dtype=np.float32,shape=shape)
+
+	for start in range(0,len(z),block):
+		zz = z[start:start+block,None]
+		observed = wave * 1e4 * (1+zz) # angstroms, for the IGM
+		stack[start:start+block] = sed * igm.igm_absorption(observed,zz) / (1+zz*dim)
+
+	if filename is None:
+		return stack
+	stack.flush()
+	del stack
+	os.replace(tmp,filename) # so another process never reads half a stack
+	return np.load(filename,mmap_mode='r')
+
+
+def _key(*arrays):
+	sha = hashlib.sha1(b'zstack-v1')
+	sha.update(igm.version().encode()) # (the IGM code, too)
+	for a in arrays:
+		a = np.ascontiguousarray(a,dtype=np.float64)
+		sha.update(str(a.shape).encode())
+		sha.update(a.data)
+	return sha.hexdigest()
+
+
+class RedshiftFrames:
+	'''
+	The precomputed frames of a redshifting spectrum.
+
+	wave, sed	the rest-frame spectrum (microns, & whatever flux units)
+	z		the redshift of each frame
+	xlim		(optional) the observed wavelength range shown -- only the
+			part of the spectrum that ever makes it in is kept
+	dim		how much it's dimmed with redshift, flux / (1 + z*dim)
+
+	flux is the (nframes,nwave) stack, memory-mapped from the cache.
+	'''
+	def __init__(self,wave,sed,z,xlim=None,dim=0.3):
+		wave,sed = np.asarray(wave),np.asarray(sed)
+		if xlim is not None:
+			keep = in_view(wave,z,xlim)
+			wave,sed = wave[keep],sed[keep]
+		self.wave = wave
+		self.z = np.asarray(z,dtype=np.float64)
+
+		os.makedirs(cache_dir,exist_ok=True)
+		filename = os.path.join(cache_dir,_key(wave,sed,self.z,[dim])+'.npy')
+		if os.path.exists(filename):
+			self.flux = np.load(filename,mmap_mode='r')
+		else:
+			self.flux = flux_stack(wave,sed,self.z,dim,filename=filename)
+
+	def __len__(self):
+		return len(self.z)
+
+	def observed(self,i):
+		'''The observed wavelengths of frame i.'''
+		return self.wave * (1+self.z[i])
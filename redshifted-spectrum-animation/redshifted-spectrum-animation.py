@@ -5,7 +5,9 @@ is a model of mine from a Cloudy simulation (v17, Ferland et al. 2017).
 --->  It takes a minute or two so be patient! (it's the animation package) 
 
 Additionally, I have included a module that applies IGM attentuation to the
-spectrum as it shifts to larger redshifts.
+spectrum as it shifts to larger redshifts.  The spectrum at every redshift
+(IGM & all) is worked out before the animation starts, by playground/zstack.py,
+so the frame rate and the number of frames are cheap to change below.
 
 Using the animation package requires a learning curve, so be sure to google
 any time you encounter a problem or want to add something and you don't
@@ -23,6 +25,8 @@ Credit: 	Taylor Hutchison
 
 _author_ = 'Taylor Hutchison'
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime as dt # timing how long it takes
@@ -31,8 +35,15 @@ from matplotlib import collections
 import matplotlib.animation as animation
 import matplotlib.cm as cm
 import matplotlib.gridspec as gridspec
-import igm_absorption as igm # 	another script written by Taylor Hutchison
-			     #	which adds in IGM absorption for the higher redshifts
+
+# the Cloudy models & IGM module are shared by all of the figures
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import data
+from playground import zstack # the redshifted frames, using playground/igm_absorption.py --
+			      # another script written by Taylor Hutchison, which adds in
+			      # IGM absorption for the higher redshifts
+from playground import encode, scene # for rendering in chunks, in parallel
+from playground import layout
 
 # adding a timer to this to see how long it takes
 start_it = dt.now()
@@ -47,7 +58,7 @@ ax = plt.axes(xlim=(0.1,2),ylim=(4e-16,1e-13))
 # binary stellar population from BPASS with age=10Myr & IMF that goes to 300 Msolar, 
 # Z(stellar)=Z(nebular)=0.1 Zsolar, ionization parameter log_10(U)=-1.5, n_H=300 cm^(-3)
 # (note: this is a very low Z and high ionization model)
-con = np.loadtxt('age7z0.1zneb0.1u-1.5_300.con',usecols=[0,6])
+con = data.load('age7z0.1zneb0.1u-1.5_300.con',usecols=[0,6])
 wave,vfv = con[:,0],con[:,1]
 nu = 2.998e+14 / wave
 sed_0 = vfv / nu
@@ -81,24 +92,29 @@ ax.text(0.05,0.08,'UV',fontsize=25,transform=ax.transAxes)
 ax.text(0.17,0.08,'Visual',fontsize=25,transform=ax.transAxes)
 ax.text(0.44,0.08,'Near-Infrared',fontsize=25,transform=ax.transAxes)
 
-redshift = np.arange(0,10,0.2)
-line, = ax.plot(wave,sed_0,lw=3.,color='k')
+# a smooth 60 fps version from z=0 to 12 -- the IGM absorption (& dimming) for
+# every frame is done here, all at once, and cached, so each frame of the
+# animation just picks out its row of the stack
+fps,seconds = 60,8 # (it used to be 50 frames at 10 fps, going to z=10)
+redshift = zstack.redshifts(fps=fps,seconds=seconds,z_min=0,z_max=12)
+frames = zstack.RedshiftFrames(wave,sed_0,redshift,xlim=(0.1,2),dim=0.3)
+
+line, = ax.plot(frames.observed(0),frames.flux[0],lw=3.,color='k')
 tex = ax.text(0.95,0.88,'',ha='right',transform=ax.transAxes,fontsize=28)
 
 # need an initial setup function so the animation function can
 # anchor off of it -- this is essential!
 def init():
 	global tex
-	line.set_data(wave,sed_0)
+	line.set_data(frames.observed(0),frames.flux[0])
 	tex.set_text('$z$: 0')
 	return line,tex,
 
 # the function that will actually be changing things in the animation
 def shift(r):
-	# applies IGM absorption depending upon the redshift
-	sed = sed_0 * igm.igm_absorption(wave*1e4*(1+redshift[r]),redshift[r])
-	line.set_data(wave*(1+redshift[r]),sed/(1+(redshift[r]*0.3)))
-	tex.set_text('$z$: %s'%(round(redshift[r],3)))
+	# the IGM absorption was already applied for this redshift
+	line.set_data(frames.observed(r),frames.flux[r])
+	tex.set_text('$z$: %.2f'%(redshift[r]))
 	
 	# if you want the "Epoch of Reionization" to pop up at z>6.4, uncomment below
 	#if redshift[r] > 6.4:
@@ -110,17 +126,37 @@ def shift(r):
 
 # all the build up lead to this! Running the animation function...
 anim = animation.FuncAnimation(fig,shift,init_func=init,\
-	frames=np.arange(len(redshift)),interval=100,blit=True)
+	frames=np.arange(len(frames)),interval=1000/fps,blit=True)
 
 plt.yscale('log')
 ax.set_yticklabels([])
 ax.tick_params(labelsize=18)
 ax.set_xlabel('wavelength [microns]',fontsize=19)
 
-plt.tight_layout()
-anim.save('figure.gif', fps=10, writer='imagemagick',dpi=150) # this will take a while to make
-#plt.show() # WON'T WORK WITH JUPYTER LAB
-plt.close('all')
-
-
-print(f'That took: {dt.now()-start_it}')
+layout.tight(fig,'redshifted-spectrum-animation') # (tight_layout, solved once & reused)
+
+# for long animations, the frames can be rendered & encoded in chunks, each
+# chunk in its own process (with its own copy of the figure), and then the
+# chunks get stitched together -- set workers to the number of cores you have
+workers = 1
+
+def render_frames(start,stop):
+	# only the spectrum & the redshift change, so only they get redrawn
+	fig.set_dpi(150)
+	frame = scene.Scene(fig)
+	frame.add('line',line)
+	frame.add('z',tex)
+	for r in range(start,stop):
+		shift(r)
+		yield frame.render()
+
+if __name__ == '__main__':
+	if workers > 1: # (also writes .mp4 files, if ffmpeg is around)
+		encode.save(render_frames,len(frames),'figure.gif',fps=fps,workers=workers)
+	else:
+		anim.save('figure.gif', fps=fps, writer='imagemagick',dpi=150) # this will take a while to make
+	# (for a display, an mp4 holds 60 fps better: anim.save('figure.mp4',fps=fps,writer='ffmpeg',dpi=150))
+	#plt.show() # WON'T WORK WITH JUPYTER LAB
+	plt.close('all')
+
+	print(f'That took: {dt.now()-start_it}')
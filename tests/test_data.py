@@ -0,0 +1,87 @@
+'''
+The shared datasets: found by name (or path), loaded through a binary copy
+that's rebuilt when the text file changes, and handed out read-only -- as
+float32 unless asked otherwise.
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import data
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path,monkeypatch):
+	monkeypatch.setattr(data,'cache_dir',str(tmp_path/'cache'))
+	monkeypatch.setattr(data,'_loaded',{})
+	return tmp_path/'cache'
+
+
+def test_resolve(tmp_path):
+	assert data.resolve('Spitzer_IRAC.I1.dat') == os.path.join(data.root,'filters','Spitzer_IRAC.I1.dat')
+	assert 'age7z0.2zneb0.2u-2.1_100.con' in data.available()
+	with pytest.raises(FileNotFoundError):
+		data.resolve('no_such_filter.dat')
+	table = tmp_path/'table.txt'
+	table.write_text('1 2\n3 4\n')
+	assert data.resolve(str(table)) == str(table)
+
+
+def test_load(cache):
+	curve = data.load('Spitzer_IRAC.I1.dat')
+	np.testing.assert_allclose(curve,np.loadtxt(data.resolve('Spitzer_IRAC.I1.dat')),rtol=1e-6)
+	assert curve.dtype == np.float32 and not curve.flags.writeable
+	assert data.load('Spitzer_IRAC.I1.dat') is curve # (kept for the process)
+	assert os.listdir(cache) == ['Spitzer_IRAC.I1.float32.npy']
+
+	con = data.load('age7z0.2zneb0.2u-2.1_100.con',usecols=[0,6],dtype=np.float64)
+	assert con.shape[1] == 2 and con.dtype == np.float64
+	mapped = data.load('Spitzer_IRAC.I1.dat',mmap=True)
+	assert isinstance(mapped,np.memmap) and not mapped.flags.writeable
+	np.testing.assert_array_equal(mapped,curve)
+
+
+def test_binary_copy_follows_the_text(tmp_path):
+	table = tmp_path/'table.txt'
+	table.write_text('1 2\n3 4\n')
+	np.testing.assert_array_equal(data.load(str(table)),[[1,2],[3,4]])
+
+	table.write_text('5 6\n7 8\n')
+	os.utime(table,(os.path.getmtime(table)+10,)*2) # (newer than the binary copy)
+	data.clear()
+	np.testing.assert_array_equal(data.load(str(table)),[[5,6],[7,8]])
+
+
+def test_set_dtype(monkeypatch):
+	monkeypatch.setattr(data,'default_dtype',data.default_dtype)
+	data.set_dtype('float64')
+	assert data.load('gaussian1D_sig2_kernel7.txt').dtype == np.float64
+
+
+def test_dtype_policy(cache):
+	single = data.load('Spitzer_IRAC.I2.dat')
+	double = data.load('Spitzer_IRAC.I2.dat',dtype='float64')
+	assert single.dtype == np.float32 and double.dtype == np.float64
+	assert sorted(os.listdir(cache)) == ['Spitzer_IRAC.I2.float32.npy','Spitzer_IRAC.I2.float64.npy']
+	np.testing.assert_allclose(single,double,rtol=1e-6)
+
+
+def test_same_name_elsewhere(tmp_path):
+	# (files outside the package get their own binary copies, even with one name)
+	for folder,value in [('a',1),('b',2)]:
+		os.makedirs(tmp_path/folder)
+		(tmp_path/folder/'colors.txt').write_text(f'{value} {value}\n0 0\n')
+	assert data.load(str(tmp_path/'a'/'colors.txt'))[0,0] == 1
+	assert data.load(str(tmp_path/'b'/'colors.txt'))[0,0] == 2
+
+
+def test_igm_in_float64():
+	# float32 spectra are fine, the optical depths are still worked out in float64
+	from playground.igm_absorption import igm_absorption
+	lam = np.linspace(3000,12000,500)
+	single = igm_absorption(lam.astype(np.float32),np.float32(6.5))
+	assert single.dtype == np.float64
+	np.testing.assert_allclose(single,igm_absorption(lam.astype(np.float32).astype(np.float64),6.5))
@@ -0,0 +1,79 @@
+'''
+Density grids: the same counts as np.histogram2d, however the points are
+chunked or streamed from disk, with classes counted in their own channels.
+'''
+
+import os
+import sys
+import numpy as np
+import astropy.io.fits as fits
+import pytest
+from matplotlib.figure import Figure
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import density
+
+
+@pytest.fixture
+def catalog():
+	rng = np.random.default_rng(4)
+	z = rng.uniform(-1,13,20000)
+	color = rng.normal(0,0.6,20000)
+	kind = rng.integers(0,3,20000)
+	z[:10] = np.nan # (missing values are left out)
+	return z,color,kind
+
+
+def test_matches_histogram2d(catalog):
+	z,color,_ = catalog
+	grid = density.DensityGrid((0,12),(-1,1.5),(40,60))
+	for start in range(0,len(z),3000):
+		grid.add(z[start:start+3000],color[start:start+3000])
+	expected,_,_ = np.histogram2d(color,z,bins=(40,60),range=((-1,1.5),(0,12)))
+	np.testing.assert_array_equal(grid.total,expected)
+	assert grid.outside == len(z) - expected.sum()
+
+
+def test_classes(catalog):
+	z,color,kind = catalog
+	grid = density.DensityGrid((0,12),(-1,1.5),(40,60),classes=3)
+	grid.add(z,color,kind)
+	for k in range(3):
+		expected,_,_ = np.histogram2d(color[kind == k],z[kind == k],bins=(40,60),range=((-1,1.5),(0,12)))
+		np.testing.assert_array_equal(grid.counts[k],expected)
+	with pytest.raises(ValueError):
+		grid.add([1],[0],[3])
+
+	rgba = grid.image(colors=['r','g','b'])
+	assert rgba.shape == (40,60,4)
+	assert np.all(rgba[grid.total == 0,3] == 0) and np.all(rgba[grid.total > 0,3] >= 0.2)
+	only_red = (grid.counts[0] > 0) & (grid.total == grid.counts[0])
+	np.testing.assert_allclose(rgba[only_red,:3],[[1,0,0]]*only_red.sum())
+
+
+def test_streamed(catalog,tmp_path):
+	z,color,kind = catalog
+	table = np.column_stack([z,color,kind])
+	np.save(tmp_path/'catalog.npy',table)
+	fits.BinTableHDU.from_columns([fits.Column(name='Z',format='D',array=z),
+								   fits.Column(name='COLOR',format='D',array=color)]).writeto(tmp_path/'catalog.fits')
+
+	whole = density.DensityGrid((0,12),(-1,1.5),(40,60),classes=3)
+	whole.add(z,color,kind)
+	streamed = density.density(density.stream_table(str(tmp_path/'catalog.npy'),[0,1,2],block_size=8*3*1000),
+							   (0,12),(-1,1.5),(40,60),classes=3)
+	np.testing.assert_array_equal(streamed.counts,whole.counts)
+	from_fits = density.density(density.stream_table(str(tmp_path/'catalog.fits'),['Z','COLOR'],block_size=16*999),
+								(0,12),(-1,1.5),(40,60))
+	np.testing.assert_array_equal(from_fits.total,whole.total)
+
+
+def test_for_axes():
+	fig = Figure(figsize=(4,3))
+	ax = fig.add_axes([0.1,0.1,0.5,0.8],xlim=(0,10),ylim=(-1,2))
+	grid = density.for_axes(ax,dpi=100)
+	assert grid.shape == (240,200) and grid.extent == (0,10,-1,2)
+	grid.add([5],[0])
+	ax.set_xlim(2,8)
+	image = grid.draw(ax)
+	assert ax.get_xlim() == (2,8) and image.get_zorder() == 0 and len(ax.images) == 1
@@ -0,0 +1,62 @@
+'''
+The dither geometry (for named & custom patterns, and many setups at once),
+and the storyboard of the original MOSFIRE frames made from it.
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import dither
+
+
+def test_abab():
+	setup = dither.geometry(13.5,1.5,'ABAB',position=0.75)
+	np.testing.assert_array_equal(setup['offsets'],[1.5,-1.5,1.5,-1.5])
+	np.testing.assert_array_equal(setup['objects'],[2.25,-0.75,2.25,-0.75])
+	np.testing.assert_array_equal(setup['fills'][:2],[[-3.75,6.75],[-6.75,3.75]])
+	np.testing.assert_array_equal(setup['safe'],[-3.75,3.75])
+	assert setup['stack'] == 0.75 and setup['ok']
+
+
+def test_patterns():
+	np.testing.assert_array_equal(dither.pattern_offsets('abba',2.),[2,-2,-2,2])
+	setup = dither.geometry(10.,0.,[-2.,0.,2.]) # (custom offsets, the amplitude isn't used)
+	np.testing.assert_array_equal(setup['safe'],[-1.,1.])
+	assert not dither.geometry(10.,1.5,'AB',position=4.)['ok'] # (nods off the safe region)
+
+
+def test_many_setups():
+	lengths,amplitudes = np.meshgrid([7.,13.5],[1.,1.25,1.5],indexing='ij')
+	setups = dither.geometry(lengths,amplitudes,'ABBA',margin=0.5)
+	assert setups['objects'].shape == (2,3,4) and setups['safe'].shape == (2,3,2)
+	for i,j in np.ndindex(lengths.shape):
+		one = dither.geometry(lengths[i,j],amplitudes[i,j],'ABBA',margin=0.5)
+		np.testing.assert_array_equal(setups['safe'][i,j],one['safe'])
+
+
+def test_storyboard():
+	# the positions the hand-placed frames had (in plot units)
+	setup = dither.geometry(13.5,1.5,'ABAB',position=0.75)
+	specs = dither.frames(setup)
+	assert len(specs) == 10
+	fig = dither.DitherFigure(13.5)
+	stars = []
+	for spec in specs:
+		fig.show(spec)
+		stars.append([round(s.center[1],3) for s in fig.stars if s.get_visible()])
+	assert stars == [[0.6],[0.6],[0.6],[0.3],[0.6],[0.3],[0.3,0.6],[0.3,0.6,0.45],
+					 [0.3,0.6,0.45],[0.75]]
+	assert [t.get_text() for t in fig.span_text if t.get_visible()] == []
+	fig.show(specs[8])
+	labels = [t.get_text() for t in fig.span_text if t.get_visible()]
+	assert labels == ['3.0" dither\nspace']*2 + ['$-$1.5" dither','+1.5" dither']
+
+
+def test_render(tmp_path):
+	setup = dither.geometry(7.,1.25,'ABBA')
+	names = dither.render(setup,str(tmp_path/'frame_{i}.png'),dpi=20)
+	assert names == [str(tmp_path/f'frame_{i}.png') for i in range(len(dither.frames(setup)))]
+	assert all(os.path.getsize(name) > 0 for name in names)
@@ -0,0 +1,64 @@
+'''
+Chunked encoding: an animation rendered & encoded in segments (in one
+process or several) and stitched together is the one encoded in one go.
+'''
+
+import os
+import sys
+import shutil
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import encode
+
+
+def moving_square(start,stop):
+	# (at the top level, so the workers can unpickle it)
+	for i in range(start,stop):
+		frame = np.zeros((40,60,4),dtype=np.uint8)
+		frame[...,3] = 255
+		frame[...,2] = 40 + i*9 # (a different palette for every frame)
+		frame[10:20,i*2:i*2+10,:3] = (240,200,30)
+		yield frame
+
+
+def decoded(filename):
+	from PIL import Image, ImageSequence
+	with Image.open(filename) as gif:
+		frames = [np.asarray(frame.convert('RGB')) for frame in ImageSequence.Iterator(gif)]
+		return frames,gif.info.get('loop')
+
+
+def test_segments():
+	assert encode.segments(10,3) == [(0,4),(4,8),(8,10)]
+	assert encode.segments(10,1,chunk=6) == [(0,6),(6,10)]
+
+
+@pytest.mark.parametrize('workers,chunk',[(1,4),(3,None)])
+def test_chunked_gif(tmp_path,workers,chunk):
+	whole = encode.save(moving_square,20,str(tmp_path/'whole.gif'),fps=20)
+	joined = encode.save(moving_square,20,str(tmp_path/'joined.gif'),fps=20,workers=workers,chunk=chunk)
+	assert sorted(os.listdir(tmp_path)) == ['joined.gif','whole.gif'] # (segments cleaned up)
+
+	expected,loop = decoded(whole)
+	frames,joined_loop = decoded(joined)
+	assert len(frames) == 20 and joined_loop == loop
+	for a,b in zip(frames,expected):
+		np.testing.assert_array_equal(a,b)
+
+
+def test_join_different_sizes(tmp_path):
+	small = [np.zeros((10,10,4),dtype=np.uint8)]
+	encode.write_gif(small,str(tmp_path/'a.gif'))
+	encode.write_gif([np.zeros((12,10,4),dtype=np.uint8)],str(tmp_path/'b.gif'))
+	with pytest.raises(ValueError,match='not the same size'):
+		encode.join_gifs([str(tmp_path/'a.gif'),str(tmp_path/'b.gif')],str(tmp_path/'ab.gif'))
+	with pytest.raises(ValueError):
+		encode.save(moving_square,2,str(tmp_path/'frames.avi'))
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None,reason='needs ffmpeg')
+def test_chunked_mp4(tmp_path):
+	filename = encode.save(moving_square,20,str(tmp_path/'joined.mp4'),fps=20,workers=1,chunk=8)
+	assert os.path.getsize(filename) > 0
@@ -0,0 +1,65 @@
+'''
+export.save writes every format from one layout and one Agg draw, and the
+same rasters savefig would, framed the same way.
+'''
+
+import os
+import sys
+import numpy as np
+import matplotlib
+import pytest
+from PIL import Image
+from matplotlib.figure import Figure
+
+repository = os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir)
+sys.path.insert(0,repository)
+from playground import export
+
+
+@pytest.fixture
+def fig():
+	fig = Figure(figsize=(6,4))
+	ax = fig.add_subplot()
+	ax.plot([1,2,3],[3,1,2])
+	ax.set_xlabel('observed wavelength [microns]')
+	ax.set_ylabel(r'F$_{\lambda}$')
+	return fig
+
+
+@pytest.mark.parametrize('bbox',['tight','standard'])
+def test_save_matches_savefig(fig,tmp_path,bbox):
+	# (the repository's own matplotlibrc, which has savefig.bbox: tight)
+	with matplotlib.rc_context(fname=os.path.join(repository,'matplotlibrc'),rc={'savefig.bbox':bbox}):
+		export.save(fig,str(tmp_path/'shared'),['png'],dpi=[100,50])
+		for dpi in [100,50]:
+			fig.savefig(tmp_path/f'savefig_{dpi}.png',dpi=dpi)
+			shared = Image.open(tmp_path/f'shared_{dpi}dpi.png')
+			assert shared.size == Image.open(tmp_path/f'savefig_{dpi}.png').size
+		np.testing.assert_array_equal(np.asarray(Image.open(tmp_path/'shared_100dpi.png')),
+									  np.asarray(Image.open(tmp_path/'savefig_100.png')))
+
+
+def test_transparent(fig,tmp_path):
+	export.save(fig,str(tmp_path/'figure'),['png'],dpi=50,transparent=True,bbox_inches='tight')
+	assert np.asarray(Image.open(tmp_path/'figure.png'))[0,0,3] == 0
+
+
+def test_every_format(fig,tmp_path):
+	fig.set_layout_engine('tight')
+	engine = fig.get_layout_engine()
+	stem = str(tmp_path/'figure')
+	timings = export.save(fig,stem,['pdf','PNG','.jpg','svg'],dpi={'png':[150,60],'jpg':100})
+	assert sorted(os.listdir(tmp_path)) == ['figure.jpg','figure.pdf','figure.svg',
+											'figure_150dpi.png','figure_60dpi.png']
+	assert [step for step in timings if step.startswith('agg')] == ['agg (150 dpi)'] # (one draw for all the rasters)
+	assert fig.get_layout_engine() is engine
+	with open(stem + '.pdf','rb') as f:
+		assert f.read(5) == b'%PDF-'
+	assert Image.open(stem + '.jpg').mode == 'RGB'
+
+	timings = export.save(fig,stem,['png'],dpi=[150,60],resample=False)
+	assert [step for step in timings if step.startswith('agg')] == ['agg (150 dpi)','agg (60 dpi)']
+	timings = export.save(fig,stem,['png'],dpi=60,metadata={'Title':'spectra'}) # (savefig's own)
+	assert not any(step.startswith('agg') for step in timings)
+	with pytest.raises(ValueError,match="can't export 'gif'"):
+		export.save(fig,stem,['png','gif'])
@@ -0,0 +1,36 @@
+'''
+The figure builders: each makes its own Figure without pyplot, and renders
+from a thread pool come out the same as renders one at a time.
+'''
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import dither, figures
+
+calls = {'zlines':(7.5,),'irac_color':(),'emission_lines':(),'big_picture':(),'imshow_hist':(),
+		 'dither_frame':(dither.geometry(13.5,1.5,'ABAB',position=0.75),8)}
+
+
+@pytest.mark.filterwarnings('ignore:set_ticklabels') # (emission_lines labels the ticks it gets, as the script always has)
+@pytest.mark.parametrize('name',sorted(calls))
+def test_builders(name):
+	import matplotlib.pyplot as plt
+	before = plt.get_fignums()
+	fig = figures.builders[name](*calls[name])
+	assert isinstance(fig,Figure) and isinstance(fig.canvas,FigureCanvasAgg)
+	assert plt.get_fignums() == before # (pyplot never heard of it)
+
+
+def test_threads_match_serial():
+	jobs = [('zlines',z) for z in [2.1,5.5,7.5]] + [('dither_frame',calls['dither_frame'][0],i) for i in range(4)]
+	serial = [figures.render(*job,dpi=30) for job in jobs]
+	with ThreadPoolExecutor(4) as pool:
+		for _ in range(2):
+			threaded = list(pool.map(lambda job: figures.render(*job,dpi=30),jobs))
+			assert threaded == serial
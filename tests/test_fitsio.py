@@ -0,0 +1,70 @@
+'''
+FITS cutouts: only the window is read, cached by (file, slice, HDU) until the
+file changes, least recently used ones dropped first -- and the wavelengths
+of a cutout from the header.
+'''
+
+import os
+import sys
+import numpy as np
+import astropy.io.fits as fits
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import fitsio
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+	monkeypatch.setattr(fitsio,'max_bytes',2**20)
+	fitsio.clear_cache()
+	yield
+	fitsio.clear_cache()
+
+
+@pytest.fixture
+def spectrum(tmp_path):
+	'''A 2D spectrum (64 rows x 2048 wavelengths) in a 'SCI' extension.'''
+	data = np.arange(64*2048,dtype=np.float32).reshape(64,2048)
+	sci = fits.ImageHDU(data,name='SCI')
+	sci.header.update(CRVAL1=9.5e3,CDELT1=1.0855,CRPIX1=1)
+	filename = str(tmp_path/'mosfire_Y.fits')
+	fits.HDUList([fits.PrimaryHDU(),sci]).writeto(filename)
+	return filename,data
+
+
+def test_cutout(spectrum):
+	filename,data = spectrum
+	spec2d = fitsio.cutout(filename,np.s_[28:42,1075:1175],hdu='SCI')
+	np.testing.assert_array_equal(spec2d,data[28:42,1075:1175])
+	assert not spec2d.flags.writeable
+	assert fitsio.cutout(filename,(slice(28,42),slice(1075,1175)),hdu=1) is not spec2d # (another key)
+	assert fitsio.cutout(filename,np.s_[28:42,1075:1175],hdu='SCI') is spec2d
+	np.testing.assert_array_equal(fitsio.cutout(filename,np.s_[5],hdu='SCI'),data[5])
+
+	hdr = fitsio.header(filename,'SCI')
+	np.testing.assert_allclose(fitsio.wavelengths(hdr,np.s_[28:42,1075:1175]),9.5e3 + np.arange(1075,1175)*1.0855)
+
+
+def test_file_changed(spectrum):
+	filename,data = spectrum
+	before = fitsio.cutout(filename,np.s_[:4,:4],hdu='SCI')
+	with fits.open(filename,mode='update') as hdul:
+		hdul['SCI'].data[:4,:4] = -1
+	after = fitsio.cutout(filename,np.s_[:4,:4],hdu='SCI')
+	np.testing.assert_array_equal(after,-1)
+	np.testing.assert_array_equal(before,data[:4,:4])
+
+
+def test_eviction(spectrum):
+	filename,_ = spectrum
+	fitsio.set_cache_size(3*16*2048*4) # (room for three 16-row cutouts)
+	rows = [fitsio.cutout(filename,np.s_[i*16:(i+1)*16],hdu='SCI') for i in range(3)]
+	assert fitsio.cutout(filename,np.s_[0:16],hdu='SCI') is rows[0] # (now the most recent)
+	fitsio.cutout(filename,np.s_[48:64],hdu='SCI') # --> rows 16:32 dropped
+	assert fitsio.cutout(filename,np.s_[0:16],hdu='SCI') is rows[0]
+	assert fitsio.cutout(filename,np.s_[16:32],hdu='SCI') is not rows[1]
+
+	fitsio.set_cache_size(0)
+	assert fitsio.cutout(filename,np.s_[0:16],hdu='SCI') is not rows[0]
+	assert fitsio._nbytes == 0
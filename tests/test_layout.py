@@ -0,0 +1,79 @@
+'''
+Cached tight_layout: solved once per template, reused after that, and solved
+again when a label grows -- and insets (placed by a locator) left out of it
+without a warning.
+'''
+
+import os
+import sys
+import warnings
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import layout
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path,monkeypatch):
+	monkeypatch.setattr(layout,'cache_dir',str(tmp_path/'layouts'))
+	monkeypatch.setattr(layout,'_layouts',{})
+
+
+def test_insets_dont_warn():
+	from mpl_toolkits.axes_grid1.inset_locator import inset_axes
+	fig = Figure(figsize=(8,4))
+	ax = fig.add_subplot()
+	ax.set_ylabel('flux')
+	inset = inset_axes(ax,width='20%',height=1.,loc=3)
+	inset.set_xlabel('medium res')
+	with warnings.catch_warnings():
+		warnings.simplefilter('error')
+		assert layout.tight(fig,'inset')
+
+	# an axes that's just put somewhere is still worth a warning
+	fig.add_axes([0.1,0.1,0.2,0.2])
+	with pytest.warns(UserWarning,match='not compatible with tight_layout'):
+		layout.tight(fig,'loose')
+
+
+def _figure(ylabel='flux'):
+	fig = Figure(figsize=(6,4))
+	ax = fig.add_subplot(2,1,1)
+	ax.set_ylabel(ylabel)
+	fig.add_subplot(2,1,2).set_xlabel('wavelength')
+	return fig
+
+
+def test_solved_once():
+	fig = _figure()
+	assert layout.tight(fig,'spectra')
+	solved = dict(vars(fig.subplotpars))
+
+	again = _figure()
+	assert not layout.tight(again,'spectra') # (reused)
+	assert dict(vars(again.subplotpars)) == solved
+
+	fig.tight_layout() # (and it's what tight_layout would have done)
+	np.testing.assert_allclose([getattr(again.subplotpars,k) for k in ['left','right','top','bottom']],
+							   [getattr(fig.subplotpars,k) for k in ['left','right','top','bottom']])
+
+
+def test_solved_again():
+	layout.tight(_figure(),'spectra')
+	assert layout.tight(_figure('a much, much longer y label'),'spectra') # (a label grew)
+	assert not layout.tight(_figure('flux'),'spectra') # (smaller labels still fit)
+	fig = _figure()
+	fig.add_subplot(4,1,4)
+	assert layout.tight(fig,'spectra') # (another axes)
+	assert layout.tight(_figure(),'other template')
+
+
+def test_kept_on_disk(tmp_path,monkeypatch):
+	layout.tight(_figure(),'spectra')
+	assert len(os.listdir(tmp_path/'layouts')) == 1
+	monkeypatch.setattr(layout,'_layouts',{}) # (a new process)
+	assert not layout.tight(_figure(),'spectra')
+	layout.forget()
+	assert os.listdir(tmp_path/'layouts') == [] and layout.tight(_figure(),'spectra')
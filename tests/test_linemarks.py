@@ -0,0 +1,50 @@
+'''
+Line markers from a catalog: one collection & one label layer for every line,
+moved to another redshift in one call, with labels only for the lines in view.
+'''
+
+import os
+import sys
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import linemarks
+
+
+def test_catalog():
+	catalog = linemarks.line_catalog([('b',5007,'[OIII]'),('a',1215.67,r'Ly$\alpha$')])
+	assert list(catalog['key']) == ['a','b']
+	assert list(linemarks.select(linemarks.nebular,['hbeta','lya'])['key']) == ['lya','hbeta']
+	# 1-2 microns at z=1 is 5000-10000 angstroms in the rest frame
+	assert list(linemarks.between(linemarks.nebular,1,2,z=1)['key']) == ['[oiii]2','hei']
+
+
+def test_markers():
+	fig = Figure()
+	FigureCanvasAgg(fig)
+	ax = fig.add_subplot(xlim=(0.5,2.5),ylim=(0,1))
+	marks = linemarks.LineMarkers(ax,linemarks.nebular,z=3,y=0.5)
+	assert [type(a) for a in ax.collections] == [LineCollection] and len(ax.texts) == 0
+
+	x = np.array([s[0,0] for s in marks.lines.get_segments()])
+	np.testing.assert_allclose(x,linemarks.nebular['wave']/1e4*4)
+	shown = [t.get_visible() for t in marks.labels.texts]
+	assert shown == list((x >= 0.5) & (x <= 2.5) & (linemarks.nebular['label'] != ''))
+
+	marks.set_redshift(1)
+	np.testing.assert_allclose(marks.lines.get_segments()[0][:,0],1215.67/1e4*2)
+	assert not marks.labels.texts[0].get_visible() # (Lya at 0.24 microns)
+	ax.set_xlim(0.2,2.5)
+	assert marks.labels.texts[0].get_visible()
+
+
+def test_fixed_shifts():
+	fig = Figure()
+	ax = fig.add_subplot(xlim=(0.1,1),ylim=(0,1))
+	catalog = linemarks.select(linemarks.nebular,['civ','heii1'])
+	marks = linemarks.LineMarkers(ax,catalog,z=0,shift=[-10,5],y=0.2)
+	np.testing.assert_allclose([t.get_position() for t in marks.labels.texts],
+							   [[1538/1e4,0.2],[1645.4/1e4,0.2]])
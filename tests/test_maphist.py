@@ -0,0 +1,63 @@
+'''
+MapHistogram on maps with only one value, or none at all; redrawing one
+for another map (the same artists, updated); and render_maps.
+'''
+
+import os
+import re
+import sys
+import numpy as np
+import matplotlib as mpl
+import pytest
+from matplotlib.figure import Figure
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import maphist
+
+
+def test_bar_colors_single_bin():
+	colors = maphist.bar_colors(np.array([0.,1.]),mpl.colormaps['viridis'])
+	assert np.isfinite(colors).all()
+
+
+def test_finite_range():
+	data = np.array([[np.nan,2.],[np.inf,-1.]])
+	assert maphist.finite_range(data) == [-1.,2.]
+
+
+@pytest.mark.parametrize('data',[np.full((3,3),np.nan),np.zeros((0,4))])
+def test_draw_without_finite_values(data):
+	fig = Figure()
+	mh = maphist.MapHistogram(fig,fig.add_gridspec(1,1)[0])
+	with pytest.raises(ValueError,match='no finite values'):
+		mh.draw(data)
+
+
+def test_redraw_reuses_artists():
+	fig = Figure()
+	mh = maphist.MapHistogram(fig,fig.add_gridspec(1,1)[0],ticks=[10,20,30])
+	rng = np.random.default_rng(0)
+	mh.draw(rng.normal(size=(30,30)),title='first')
+	labels = list(mh.tick_labels)
+	texts = len(mh.ax_hist.texts)
+	assert [t.get_text() for t in labels] == ['10','20','30']
+
+	mh.ticks = [5,50]
+	mh.draw(rng.normal(size=(30,30)),title='second')
+	assert mh.tick_labels == labels and len(mh.ax_hist.texts) == texts
+	assert [t.get_text() for t in labels if t.get_visible()] == ['5','50']
+	assert labels[0].get_position()[0] > 5 # (just to the right of its tick)
+
+
+def test_render_maps(tmp_path):
+	from PIL import Image
+	rng = np.random.default_rng(0)
+	maps = [rng.normal(size=(20,30)),rng.normal(size=(20,30))+5]
+	maphist.render_maps(maps,['a','b'],str(tmp_path/'map_{title}.png'))
+	assert sorted(os.listdir(tmp_path)) == ['map_a.png','map_b.png']
+	with Image.open(tmp_path/'map_b.png') as image:
+		assert image.mode == 'RGBA' and min(image.size) > 100
+
+	maphist.render_maps(iter(maps),['a','b'],str(tmp_path/'maps.pdf'))
+	with open(tmp_path/'maps.pdf','rb') as f:
+		assert len(re.findall(rb'/Type\s*/Page\b(?!s)',f.read())) == 2 # (a page a map)
@@ -0,0 +1,53 @@
+'''
+Mock spectra & stamps: reproducible from a seed, with the lines where they
+were asked for (one place for all, or one per realization).
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import mocks
+
+
+def test_seeded():
+	a = mocks.mock_2d(3,shape=(40,20),lines=[[20,10,35]],seed=3)
+	b = mocks.mock_2d(3,shape=(40,20),lines=[[20,10,35]],seed=3)
+	assert a.shape == (3,40,20)
+	np.testing.assert_array_equal(a,b)
+	assert not np.array_equal(a[0],a[1]) # (each realization its own noise)
+
+
+def test_lines():
+	kernel1d,kernel2d = mocks.kernels()
+	rows = np.array([10,20,30])
+	with_lines = mocks.mock_1d(3,length=50,lines=[[rows,15]],seed=1)
+	without = mocks.mock_1d(3,length=50,seed=1)
+	for i,row in enumerate(rows):
+		expected = np.zeros(50)
+		expected[row-3:row+4] = 15 * kernel1d
+		np.testing.assert_allclose(with_lines[i] - without[i],expected,atol=1e-12)
+
+	stamps = mocks.mock_stamps(2,seed=2,dtype=np.float32)
+	noise = mocks.noise(2,(50,35),seed=2,dtype=np.float32)
+	assert stamps.dtype == np.float32
+	# the two default blobs overlap, and add up
+	np.testing.assert_allclose((stamps - noise)[:,26,17],25*(kernel2d[4,4] + kernel2d[2,1]),rtol=1e-5)
+
+
+def test_off_the_edge():
+	spectra = np.zeros((2,10))
+	mocks.inject_lines(spectra,([0,9],),1.,np.ones(7))
+	np.testing.assert_array_equal(spectra.sum(axis=1),[4,4])
+	with pytest.raises(ValueError):
+		mocks.inject_lines(spectra,(0,0),1.,np.ones((3,3)))
+
+
+def test_parallel_mocks():
+	a = mocks.parallel_mocks('1d',10,seed=5,workers=3,length=30,lines=[[15,20]])
+	b = mocks.parallel_mocks('1d',10,seed=5,workers=3,length=30,lines=[[15,20]])
+	assert a.shape == (10,30)
+	np.testing.assert_array_equal(a,b)
+	assert len({row.tobytes() for row in a}) == 10 # (independent streams)
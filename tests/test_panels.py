@@ -0,0 +1,66 @@
+'''
+The panel engine: one template's artists reused for every object, coming out
+the same as a fresh template -- and render_survey on more than one process,
+without pypdf to join the chunks.
+'''
+
+import io
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+
+def fake_object(seed):
+	rng = np.random.default_rng(seed)
+	wave = np.linspace(1.0,1.1,100)
+	line = lambda band: {'band':band,'spec2d':rng.normal(size=(14,100)),'wave':wave,
+						 'flux':rng.normal(size=100),'error':np.full(100,0.3)}
+	return {'name':f'object {seed}','stamp':rng.normal(size=(60,60)),'stamp_clim':(-1,2),
+			'slits':[[np.array([[10,10],[50,15],[48,20],[8,15]]),'#CF6060','2016']],
+			'lines':[line('Y'),line('H')]}
+
+
+def png(template):
+	buffer = io.BytesIO()
+	template.fig.savefig(buffer,format='png',dpi=30)
+	return buffer.getvalue()
+
+
+def test_template_reused():
+	from playground import panels
+	template = panels.PanelTemplate()
+	artists = [len(ax.get_children()) for ax in template.fig.axes]
+	first,second = fake_object(1),fake_object(2)
+	second['slits'] = []
+	second['lines'][0]['spec2d'] = second['lines'][0]['spec2d'][:,:80] # (another shape)
+
+	template.render(first)
+	assert [s.get_visible() for s in template.slits] == [True,False,False]
+	template.render(second)
+	assert not any(s.get_visible() or t.get_visible() for s,t in zip(template.slits,template.slit_labels))
+	assert template.lines[0]['ax2d'].get_xlim() == (-0.5,79.5)
+	assert template.name.get_text() == 'object 2'
+
+	fresh = panels.PanelTemplate()
+	fresh.render(second)
+	assert png(template) == png(fresh)
+	assert [len(ax.get_children()) for ax in template.fig.axes] == artists # (nothing added along the way)
+
+	first['slits'] *= 4
+	with pytest.raises(ValueError,match='room for 3'):
+		template.render(first)
+
+
+def test_render_survey_without_pypdf(tmp_path,monkeypatch):
+	from playground import panels
+	monkeypatch.setitem(sys.modules,'pypdf',None) # (import pypdf --> ImportError)
+	filename = str(tmp_path/'survey.pdf')
+	with pytest.warns(UserWarning,match='pypdf'):
+		written = panels.render_survey([fake_object(i) for i in range(3)],filename,workers=2)
+	assert written == [filename]
+	assert os.listdir(tmp_path) == ['survey.pdf'] # (no chunks left behind)
+	with open(filename,'rb') as f:
+		assert b'/Count 3' in f.read()
@@ -0,0 +1,73 @@
+'''
+Photometric redshifts: the cached model grid (and what goes into its key),
+and fits that find the redshifts of objects made from the grid itself.
+'''
+
+import os
+import sys
+import shutil
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+
+@pytest.fixture
+def photoz(tmp_path,monkeypatch):
+	from playground import data, photoz
+	monkeypatch.setattr(photoz,'cache_dir',str(tmp_path/'photoz'))
+	monkeypatch.setattr(data,'cache_dir',str(tmp_path/'data')) # (the copied filter's binary copies)
+	return photoz
+
+
+def _grids(tmp_path):
+	return sorted(os.listdir(tmp_path/'photoz'))
+
+
+def test_model_grid_cache(photoz,tmp_path,monkeypatch):
+	from playground import data
+	# a filter curve of our own, by path, so it can be touched
+	curve = str(tmp_path/'F160W.dat')
+	shutil.copy(data.resolve('HST-WFC3_IR.F160W.dat'),curve)
+	kwargs = {'models':photoz.models[:1],'filters':[curve,'Spitzer_IRAC.I1.dat'],
+		  'z':np.linspace(0,8,41),'resolution':500}
+
+	grid = photoz.model_grid(**kwargs)
+	assert grid.shape == (1,41,2)
+	first = _grids(tmp_path)
+	assert len(first) == 1
+	np.testing.assert_array_equal(photoz.model_grid(**kwargs).fluxes,grid.fluxes)
+	assert _grids(tmp_path) == first # (read back, not redone)
+
+	# a changed filter curve is a different grid
+	stat = os.stat(curve)
+	os.utime(curve,ns=(stat.st_atime_ns,stat.st_mtime_ns + 10**9))
+	photoz.model_grid(**kwargs)
+	assert len(_grids(tmp_path)) == 2
+
+	# and so is a changed IGM prescription
+	monkeypatch.setattr(photoz.igm,'version',lambda: 'edited')
+	photoz.model_grid(**kwargs)
+	assert len(_grids(tmp_path)) == 3
+
+
+def test_fit_finds_the_grid(photoz):
+	grid = photoz.model_grid(filters=photoz.filters + ['Spitzer_IRAC.I3.dat'],
+				 z=np.linspace(0,10,201),ebv=[0,0.2],resolution=500)
+	rng = np.random.default_rng(1)
+	picks = [(0,40),(1,100),(3,160),(2,190)] # (model, iz), over 2 models x 2 E(B-V)
+	flux = np.array([grid.fluxes[m,iz] for m,iz in picks]) * 3.
+	error = flux * 0.01
+	flux += error * rng.standard_normal(flux.shape)
+	flux[1,0] = np.nan # (a missing filter is left out)
+
+	result = photoz.fit(grid,flux,error)
+	np.testing.assert_allclose(result.z_best,[grid.z[iz] for m,iz in picks],atol=0.1)
+	np.testing.assert_allclose(photoz._trapezoid(result.pdf,grid.z),1,rtol=1e-5)
+	assert np.all(np.abs(result.z_mean - result.z_best) < 0.2)
+	np.testing.assert_allclose(result.model_prob.sum(axis=1),1,rtol=1e-5)
+
+	# and split over processes, the same
+	split = photoz.fit(grid,flux,error,workers=2)
+	np.testing.assert_array_equal(split.z_best,result.z_best)
+	np.testing.assert_allclose(split.pdf,result.pdf)
@@ -0,0 +1,70 @@
+'''
+An error while rendering isn't replaced by one from the writer, loading
+doesn't get more than `prefetch` items ahead, and snapshots are framed the
+way savefig frames the figure.
+'''
+
+import os
+import sys
+import time
+import threading
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import pipeline
+
+
+def test_render_error_wins(tmp_path):
+	missing = str(tmp_path/'missing'/'frame.png') # (the writer can't write this)
+	def render(i):
+		if i == 1:
+			raise ValueError('render failed')
+		return [(missing,b'...')]
+	with pytest.raises(ValueError,match='render failed'):
+		pipeline.run(range(3),render)
+
+
+def test_writer_error(tmp_path):
+	missing = str(tmp_path/'missing'/'frame.png')
+	with pytest.raises(FileNotFoundError):
+		pipeline.run(range(1),lambda i: [(missing,b'...')])
+
+
+def test_run(tmp_path):
+	stats = pipeline.run(range(3),lambda i: [(str(tmp_path/f'{i}.txt'),b'%d'%i)])
+	assert sorted(os.listdir(tmp_path)) == ['0.txt','1.txt','2.txt']
+	assert stats['items'] == 3
+
+
+def test_prefetch_bound(tmp_path):
+	lock = threading.Lock()
+	started,ahead = [],[]
+	def load(i):
+		with lock:
+			started.append(i)
+		return i
+	def render(i):
+		time.sleep(0.05) # (plenty of time for the loads to run ahead)
+		with lock:
+			ahead.append(len(started) - (i+1)) # (started, less the ones drawn or drawing)
+		return []
+	pipeline.run(range(8),render,load=load,prefetch=2,loaders=4)
+	assert max(ahead) == 2
+
+
+def test_snapshot_matches_savefig(tmp_path):
+	# snapshots take the frame from the rc (the repo's is savefig.bbox: tight)
+	import matplotlib
+	from PIL import Image
+	from matplotlib.figure import Figure
+	rc = os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir,'matplotlibrc')
+	with matplotlib.rc_context(fname=rc):
+		fig = Figure(figsize=(6,4))
+		ax = fig.add_subplot()
+		ax.plot([0,1],[0,1])
+		ax.set_title('a title')
+		fig.savefig(str(tmp_path/'savefig.png'),dpi=100)
+		pipeline.write(str(tmp_path/'snapshot.png'),pipeline.snapshot(fig,'png',dpi=100))
+	with Image.open(tmp_path/'savefig.png') as a,Image.open(tmp_path/'snapshot.png') as b:
+		assert a.size == b.size
+		assert a.size[0] < 600 # (cropped)
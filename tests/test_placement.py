@@ -0,0 +1,57 @@
+'''
+Automatic label placement: packed rows never overlap, only move right, and
+stay in bounds; labels are measured the way matplotlib lays them out; and
+placed line labels on a drawn figure don't overlap.
+'''
+
+import os
+import sys
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import linemarks, placement
+
+
+def test_pack():
+	rng = np.random.default_rng(0)
+	x = np.sort(rng.uniform(0,100,30))
+	widths = rng.uniform(1,4,30)
+	left = placement.pack(x,widths,0,200)
+	assert np.all(left >= x - 1e-9) # (never left of where it wants to be)
+	assert np.all(left[1:] >= left[:-1] + widths[:-1] - 1e-9) # (no overlaps)
+	assert left[-1] + widths[-1] <= 200
+
+	# against the right edge, they're pushed back in
+	left = placement.pack([95,96],[4,4],0,100)
+	np.testing.assert_allclose(left,[92,96])
+	# & with no room at all, squeezed evenly
+	np.testing.assert_allclose(placement.pack([0,0,0],[5,5,5],0,9),[0,3,6])
+	assert len(placement.pack([],[])) == 0
+
+
+def test_text_size():
+	fig = Figure(dpi=72)
+	renderer = FigureCanvasAgg(fig).get_renderer()
+	label = 'CIII] $\\lambda$1907\n  & $\\lambda$1909'
+	box = fig.text(0,0,label,fontsize=15).get_window_extent(renderer)
+	np.testing.assert_allclose(placement.text_size(label,fontsize=15),(box.width,box.height),rtol=1e-6)
+	assert placement.text_size(label,fontsize=15) is placement.text_size(label,fontsize=15)
+	width,height = placement.text_sizes(['a','abc',''],fontsize=[10,10,10])
+	assert width[0] < width[1] and (width[2],height[2]) == (0,0)
+
+
+def test_placed_labels_dont_overlap():
+	fig = Figure(figsize=(8,4))
+	canvas = FigureCanvasAgg(fig)
+	ax = fig.add_subplot(xlim=(1,5),ylim=(0,1))
+	marks = linemarks.LineMarkers(ax,linemarks.nebular,z=7.5,y=0.1,fontsize=12)
+	canvas.draw()
+	renderer = canvas.get_renderer()
+	boxes = [t.get_window_extent(renderer) for t in marks.labels.texts if t.get_visible()]
+	assert len(boxes) > 5
+	for a,b in zip(boxes[:-1],boxes[1:]):
+		assert a.x1 <= b.x0 + 0.5
+	assert all(ax.bbox.x0 <= box.x0 and box.x1 <= ax.bbox.x1 + 0.5 for box in boxes)
+	assert all(box.y1 <= ax.bbox.y1 + 0.5 for box in boxes)
@@ -0,0 +1,76 @@
+'''
+Image pyramids: NaN-aware block averages that keep the edges, levels cached
+on disk & memory-mapped back, and imshow sending only the level that fits
+the axes -- in the full image's pixel coordinates.
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import pyramid
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path,monkeypatch):
+	monkeypatch.setattr(pyramid,'cache_dir',str(tmp_path/'pyramids'))
+
+
+def test_block_average():
+	image = np.arange(5*7,dtype=float).reshape(5,7)
+	image[0,0] = np.nan
+	image[4,:2] = np.nan
+	average = pyramid.block_average(image,rows=1)
+	assert average.shape == (3,4) and average.dtype == np.float32
+	assert average[0,0] == np.float32(16/3) # (the NaN is left out)
+	assert average[0,3] == np.mean([6,13]) # (a smaller block at the edge)
+	assert np.isnan(average[2,0]) # (all NaN stays NaN)
+	assert average[2,3] == 34
+	np.testing.assert_array_equal(average,pyramid.block_average(image))
+
+
+def test_levels_cached(tmp_path):
+	image = np.random.default_rng(1).normal(size=(300,520)).astype(np.float32)
+	pyr = pyramid.Pyramid.from_array(image,min_size=64)
+	assert [level.shape for level in pyr.levels] == [(300,520),(150,260),(75,130),(38,65)]
+	assert all(isinstance(level,np.memmap) for level in pyr.levels)
+	np.testing.assert_array_equal(pyr.levels[0],image)
+	np.testing.assert_array_equal(pyr.levels[2],pyramid.block_average(pyramid.block_average(image)))
+
+	(folder,) = os.listdir(tmp_path/'pyramids')
+	built = os.path.getmtime(tmp_path/'pyramids'/folder/'level1.npy')
+	again = pyramid.Pyramid.from_array(image.copy(),min_size=64)
+	assert len(again.levels) == 4 and os.path.getmtime(tmp_path/'pyramids'/folder/'level1.npy') == built
+	pyramid.Pyramid.from_array(image[::-1],min_size=64)
+	assert len(os.listdir(tmp_path/'pyramids')) == 2 # (other contents, other key)
+
+
+def test_level_for_and_cutout():
+	pyr = pyramid.Pyramid.from_array(np.ones((256,512)),min_size=32)
+	assert [pyr.level_for(*n) for n in [(256,512),(100,200),(200,100),(64,128),(20,40),(10,10),(300,10)]] == [0,1,0,2,3,4,0]
+	image,extent = pyr.cutout(2,(10,50,100,300))
+	assert image.shape == (11,50) and extent == (99.5,299.5,7.5,51.5) # (whole level-2 pixels around it)
+	image,extent = pyr.cutout(0)
+	assert image.shape == (256,512) and extent == (-0.5,511.5,-0.5,255.5)
+
+
+def test_imshow():
+	image = np.random.default_rng(3).normal(size=(400,1000))
+	pyr = pyramid.Pyramid.from_array(image,min_size=32)
+	fig = Figure(figsize=(5,2),dpi=50)
+	ax = fig.add_axes([0,0,1,1])
+	shown = pyramid.imshow(ax,pyr)
+	assert shown.get_array().shape == (100,250) # (250 x 100 pixels of axes, level 2)
+	assert shown.get_extent() == [-0.5,999.5,-0.5,399.5] and shown.origin == 'lower'
+
+	# a smaller window of the image needs a finer level, and at a higher dpi too
+	assert pyramid.imshow(ax,pyr,window=(0,200,0,500)).get_array().shape == (100,250)
+	assert pyramid.imshow(ax,pyr,dpi=200).get_array().shape == (400,1000)
+
+	# wavelength along the rows, shown along x
+	ax = Figure(figsize=(2,5),dpi=50).add_axes([0,0,1,1])
+	flipped = pyramid.imshow(ax,pyr,transpose=True,origin='upper')
+	assert flipped.get_array().shape == (250,100) and flipped.get_extent() == [-0.5,399.5,999.5,-0.5]
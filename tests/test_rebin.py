@@ -0,0 +1,48 @@
+'''
+Flux-conserving rebinning: the integral is kept, narrow lines aren't lost,
+either order of grid works, and the matrices are cached per pair of grids.
+'''
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import rebin
+
+
+def integral(wave,flux):
+	return np.sum(flux * np.diff(rebin.edges(wave)),axis=-1)
+
+
+def test_conserves_flux():
+	wave = np.linspace(1,2,1001)
+	flux = np.exp(-0.5*((wave-1.51)/0.002)**2) # a narrow line, between two pixels
+	pixels = np.linspace(1.1,1.9,37)
+	new = rebin.rebin(wave,flux,pixels)
+	np.testing.assert_allclose(integral(pixels,new),integral(wave,flux),rtol=1e-9)
+	assert new.max() > 0 and np.interp(pixels,wave,flux).max() < 0.01 # (interp skips it)
+
+
+def test_orders_and_stacks():
+	wave = np.geomspace(0.1,3,500)
+	fluxes = np.random.default_rng(0).random((2,3,500)).astype(np.float32)
+	pixels = np.linspace(0.5,2,80)
+	forward = rebin.rebin(wave,fluxes,pixels)
+	assert forward.shape == (2,3,80) and forward.dtype == np.float32
+	# a long-to-short grid (like the Cloudy models), onto a reversed one
+	backward = rebin.rebin(wave[::-1],fluxes[...,::-1],pixels[::-1])
+	np.testing.assert_allclose(backward[...,::-1],forward,rtol=1e-5)
+
+
+def test_fill():
+	wave = np.linspace(1,2,101)
+	new = rebin.rebin(wave,np.ones(101),np.linspace(0.5,1.5,11),fill=np.nan)
+	assert np.isnan(new[:5]).all() and np.allclose(new[6:],1)
+	np.testing.assert_allclose(rebin.rebin(wave,np.ones(101),[1.2,1.4]),1)
+
+
+def test_cached():
+	wave,pixels = np.linspace(1,2,50),np.linspace(1.2,1.8,10)
+	assert rebin.rebinning(wave,pixels) is rebin.rebinning(wave.copy(),pixels.copy())
+	assert rebin.rebinning(wave,pixels) is not rebin.rebinning(wave,pixels+0.01)
@@ -0,0 +1,52 @@
+'''
+Broadening to a disperser's resolution: lines come out lambda/R wide with
+their flux kept, stacks broaden like single spectra, and the cache tells big
+R(lambda) tables apart.
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import resolution
+
+
+def test_broadening_key_big_tables():
+	wave = np.linspace(1,2,3000)
+	table = (np.linspace(1,2,2000),np.full(2000,1000.))
+	changed = (table[0],table[1].copy())
+	changed[1][1000] = 2000 # (the same repr -- numpy cuts the middle out)
+	same = (table[0].copy(),table[1].copy())
+	first = resolution.broadening(wave,'G140M',R=table)
+	assert resolution.broadening(wave,'G140M',R=changed) is not first
+	assert resolution.broadening(wave,'G140M',R=same) is first
+
+
+def _fwhm(wave,flux):
+	above = wave[flux >= flux.max()/2]
+	return above.max() - above.min()
+
+
+@pytest.mark.parametrize('R',[None,2000.])
+def test_line_width(R):
+	# a line much narrower than the resolution comes out lambda/R wide
+	wave = np.linspace(0.9,1.9,200001)
+	flux = np.exp(-0.5*((wave-1.4)/2e-5)**2)
+	kwargs = {} if R is None else {'R':R}
+	out_wave,smooth = resolution.broaden(wave,flux,'G140M','F100LP',**kwargs)
+	expected = 1.4 / (1000 if R is None else R) # (R0=1000 at the grating's 1.40 microns)
+	np.testing.assert_allclose(_fwhm(out_wave,smooth),expected,rtol=0.02)
+	np.testing.assert_allclose(np.trapezoid(smooth,out_wave),np.trapezoid(flux,wave),rtol=1e-3)
+
+
+def test_stacks():
+	wave = np.linspace(0.9,1.9,5000)
+	fluxes = np.random.default_rng(0).random((2,3,5000)).astype(np.float32)
+	engine = resolution.broadening(wave,'G140M','F100LP')
+	assert resolution.broadening(wave.copy(),'g140m','f100lp') is engine
+	smooth = engine(fluxes)
+	assert smooth.shape == (2,3,len(engine.wave)) and smooth.dtype == np.float32
+	np.testing.assert_allclose(smooth[1,2],engine(fluxes[1,2]),rtol=1e-6)
+	assert np.all((engine.wave >= 0.97) & (engine.wave <= 1.89))
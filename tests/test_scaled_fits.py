@@ -0,0 +1,50 @@
+'''
+Scaled (BSCALE/BZERO) FITS images, which astropy won't memory-map -- the
+readers in playground have to get the scaled values out of them anyway.
+'''
+
+import os
+import sys
+import numpy as np
+import astropy.io.fits as fits
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+
+@pytest.fixture
+def scaled(tmp_path):
+	'''An int16 image stored with BSCALE=0.5 & BZERO=10, and its true values.'''
+	raw = (np.arange(200*300).reshape(200,300) % 3000).astype(np.int16)
+	hdu = fits.PrimaryHDU(raw)
+	hdu.header['BSCALE'] = 0.5
+	hdu.header['BZERO'] = 10.
+	filename = str(tmp_path/'scaled.fits')
+	hdu.writeto(filename)
+	with fits.open(filename,do_not_scale_image_data=True) as hdul:
+		assert hdul[0].data.dtype.kind == 'i' # (really stored scaled)
+	return filename,raw*0.5 + 10
+
+
+def test_cutout(scaled):
+	from playground import fitsio
+	filename,values = scaled
+	fitsio.clear_cache()
+	np.testing.assert_array_equal(fitsio.cutout(filename,np.s_[20:40,100:150]),values[20:40,100:150])
+
+
+def test_stream_fits(scaled):
+	from playground import streamhist
+	filename,values = scaled
+	hist = streamhist.stream_fits(filename,bins=20,clims=(0,1600),block_size=300*2*16)
+	np.testing.assert_array_equal(hist.counts,np.histogram(values,20,(0,1600))[0])
+	assert (hist.count,hist.min,hist.max) == (values.size,values.min(),values.max())
+
+
+def test_pyramid(scaled,tmp_path,monkeypatch):
+	from playground import pyramid
+	monkeypatch.setattr(pyramid,'cache_dir',str(tmp_path/'pyramids'))
+	filename,values = scaled
+	pyr = pyramid.Pyramid.from_fits(filename,min_size=64)
+	np.testing.assert_array_equal(pyr.levels[0],values)
+	np.testing.assert_allclose(pyr.levels[1],pyramid.block_average(values.astype(np.float32)))
@@ -0,0 +1,87 @@
+'''
+Blitted frames of a Scene are the frames a full draw makes, only what changed
+is redrawn, and tweens mix & fade between snapshots.
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle, Rectangle
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import dither
+
+
+def dither_frames(blit,dpi=60,**kwargs):
+	fig = dither.DitherFigure(13.5)
+	fig.fig.dpi = dpi
+	return list(dither.frame_range(dither.geometry(13.5,1.5,'ABAB'),fig=fig,blit=blit,
+								   hold=0.1,**kwargs))
+
+
+def assert_same_frame(a,b):
+	# (where a region's edge cuts through an antialiased edge, Agg's
+	# coverage can come out one level apart -- nothing more)
+	assert a.shape == b.shape
+	assert np.abs(a.astype(int) - b).max() <= 1
+
+
+@pytest.mark.parametrize('max_dirty',[0.6,1.]) # (blitted when it pays off, & every frame)
+def test_blit_matches_full_draw(max_dirty,monkeypatch):
+	from playground import scene
+	init = scene.Scene.__init__
+	monkeypatch.setattr(scene.Scene,'__init__',
+						lambda self,fig,pad=6,max_dirty=max_dirty: init(self,fig,pad,max_dirty))
+	for blitted,full in zip(dither_frames(True),dither_frames(False)):
+		assert_same_frame(blitted,full)
+
+
+def test_keyframes_after_tweens():
+	# each keyframe looks the same however it was reached -- the snapshots
+	# of the keyframes aren't retaken from a half-faded scene
+	setup = dither.geometry(13.5,1.5,'ABAB')
+	frames = dither_frames(True)
+	steps = dither.timeline(len(dither.frames(setup)),10,3) # (hold=0.1 at 30 fps)
+	for k,spec in enumerate(dither.frames(setup)):
+		fig = dither.DitherFigure(13.5)
+		fig.fig.dpi = 60
+		fig.scale = 1.35 / 13.5
+		fig.show(spec)
+		alone = fig.scene().render(blit=False)
+		assert_same_frame(frames[steps.index((k,1.))],alone)
+
+
+def test_only_changes_redrawn():
+	from playground import scene
+	fig = Figure(figsize=(3,2),dpi=50)
+	ax = fig.add_axes([0,0,1,1],xlim=(0,3),ylim=(0,2))
+	s = scene.Scene(fig)
+	s.add('slit',ax.add_patch(Rectangle((1,0),0.5,2,color='0.8',zorder=1)),static=True)
+	star = s.add('star',ax.add_patch(Circle((0.5,1),0.2,color='r',zorder=2)))
+	mask = s.add('mask',ax.add_patch(Rectangle((1.5,0),0.1,2,color='k',zorder=3)),static=True)
+	first = s.render()
+	assert s.render().tolist() == first.tolist()
+	assert s._dirty({name:s._extents[name] for name in s.dynamic},s.snapshot()) == [] # (nothing to redraw)
+
+	frame = s.render({'star':{'center':(1.55,1)}})
+	fig.canvas.draw() # (a full draw, with the star drawn as well)
+	star.draw(fig.canvas.get_renderer())
+	mask.draw(fig.canvas.get_renderer())
+	assert_same_frame(frame,np.asarray(fig.canvas.buffer_rgba()))
+	assert tuple(frame[50,77,:3]) == (0,0,0) # (the mask stays on top of the star)
+
+
+def test_tween():
+	from playground import scene
+	start = {'star':{'center':(0.,1.),'color':'r','visible':True,'alpha':None},
+			 'label':{'text':'A','visible':False,'alpha':None}}
+	end = {'star':{'center':(1.,3.),'color':'b','visible':True,'alpha':None},
+		   'label':{'text':'B','visible':True,'alpha':None}}
+	deltas = scene.tween(start,end,0.25)
+	np.testing.assert_allclose(deltas['star']['center'],(0.25,1.5))
+	np.testing.assert_allclose(deltas['star']['color'],(0.75,0,0.25,1))
+	assert deltas['star']['alpha'] is None
+	assert deltas['label'] == {'text':'B','visible':True,'alpha':0.25} # (fading in, as it ends up)
+	assert scene.tween(end,start,0.25)['label'] == {'text':'B','visible':True,'alpha':0.75}
@@ -0,0 +1,68 @@
+'''
+RenderSession finds figures left behind without patching matplotlib, and
+closes what pyplot left open; recycled retires workers and brings their
+errors back.
+'''
+
+import os
+import sys
+import pytest
+from matplotlib.figure import Figure
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import session
+
+init = Figure.__init__
+
+
+def test_no_patching():
+	from playground import placement
+	assert Figure.__init__ is init
+
+
+def test_leaks():
+	kept = []
+	with session.RenderSession('clean') as clean:
+		Figure().add_subplot().plot([1,2])
+	with session.RenderSession('leaky') as leaky:
+		kept.append(Figure(label='kept'))
+		kept.append(session.ignore(Figure()))
+	assert clean.report.leaks == []
+	assert [label for label,artists in leaky.report.figures] == ['kept']
+
+
+def test_pyplot_closed():
+	import matplotlib.pyplot as plt
+	found = []
+	with session.RenderSession('pyplot',on_leak=found.append) as closed:
+		plt.figure()
+	assert closed.report.leaks == [] and found == []
+	with session.RenderSession('left open',close=False,on_leak=found.append) as left:
+		num = plt.figure().number
+	plt.close(num)
+	assert left.report.pyplot_open == [num] and found == [left.report]
+	assert f'pyplot figure {num} still open' in str(left.report)
+
+
+def test_traced():
+	with session.RenderSession('traced',trace=True,top=2) as traced:
+		kept = bytearray(8*2**20)
+	assert traced.report.traced > 7 and traced.report.traced_peak >= traced.report.traced
+	assert 0 < len(traced.report.allocations) <= 2 and 'traced' in str(traced.report)
+
+
+def render(item):
+	if item == 'bad':
+		raise ValueError('no such object')
+	return item * 2
+
+
+def test_recycled():
+	retired = []
+	values,reports = session.recycled(render,range(6),workers=2,max_tasks=2,context='fork',
+									 on_retire=lambda pid,mb: retired.append(pid))
+	assert values == [0,2,4,6,8,10] and [r.name for r in reports] == [str(i) for i in range(6)]
+	assert len(retired) >= 2 and len(set(retired)) == len(retired) # (both first workers, at least)
+
+	with pytest.raises(RuntimeError,match='no such object'):
+		session.recycled(render,[1,'bad',2],workers=2,context='fork')
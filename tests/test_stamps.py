@@ -0,0 +1,70 @@
+'''
+Stamps cut out of a mosaic, with the slits on them from their sky positions,
+and the cached ones safe to share.
+'''
+
+import os
+import sys
+import numpy as np
+import astropy.io.fits as fits
+from astropy.wcs import WCS
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import fitsio, stamps
+
+scale = 0.06 # arcsec per pixel
+
+
+@pytest.fixture
+def mosaic(tmp_path):
+	'''A 200x300 mosaic (north up, east left) centered on (189.15,62.25).'''
+	wcs = WCS(naxis=2)
+	wcs.wcs.ctype = ['RA---TAN','DEC--TAN']
+	wcs.wcs.crval = [189.15,62.25]
+	wcs.wcs.crpix = [151,101]
+	wcs.wcs.cdelt = [-scale/3600,scale/3600]
+	data = np.arange(200*300,dtype=np.float32).reshape(200,300)
+	filename = str(tmp_path/'mosaic.fits')
+	fits.PrimaryHDU(data,header=wcs.to_header()).writeto(filename)
+	fitsio.clear_cache()
+	stamps._cached_stamp.cache_clear()
+	return filename,data
+
+
+def test_stamp(mosaic):
+	filename,data = mosaic
+	slit = {'pa':0.,'width':0.6,'length':1.2,'color':'r','label':'2016'}
+	obj = stamps.stamp(filename,189.15,62.25,size=(21,31),slits=[slit])
+	np.testing.assert_array_equal(obj['stamp'],data[100-10:100+11,150-15:150+16])
+
+	vertices,color,label = obj['slits'][0]
+	assert (color,label) == ('r','2016')
+	# a north-south slit, centered on the target (the middle of the stamp)
+	np.testing.assert_allclose(vertices.mean(axis=0),(15,10),atol=1e-3)
+	np.testing.assert_allclose(np.ptp(vertices,axis=0),(0.6/scale,1.2/scale),rtol=1e-3)
+
+
+def test_off_the_edge(mosaic):
+	filename,data = mosaic
+	ra = 189.15 + 150*scale/3600/np.cos(np.radians(62.25)) # 150 pixels east: x = 0
+	obj = stamps.stamps(filename,[(ra,62.25)],size=11)[0]
+	assert obj['stamp'].shape == (11,11)
+	assert np.isnan(obj['stamp'][:,:5]).all()
+	np.testing.assert_array_equal(obj['stamp'][:,5:],data[95:106,0:6])
+
+
+def test_cached_stamps_are_safe(mosaic):
+	filename,_ = mosaic
+	slit = {'pa':30.,'width':0.7,'length':7.}
+	obj = stamps.stamp(filename,189.15,62.25,slits=[slit])
+	with pytest.raises(ValueError):
+		obj['stamp'][0,0] = -1
+	with pytest.raises(ValueError):
+		obj['slits'][0][0][0] = 0
+	obj['slits'].clear()
+	obj['stamp'] = None
+
+	again = stamps.stamp(filename,189.15,62.25,slits=[slit])
+	assert again['stamp'] is not None and len(again['slits']) == 1
+	assert stamps._cached_stamp.cache_info().hits == 1
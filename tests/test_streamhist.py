@@ -0,0 +1,60 @@
+'''
+Streaming histograms: the same counts as np.histogram however the map is cut
+into blocks, NaNs left out, and quantiles to within one fine bin.
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import streamhist
+
+
+@pytest.fixture
+def cube():
+	rng = np.random.default_rng(2)
+	values = rng.normal(-2.5,0.4,(30,50,40))
+	values[:,:5] = np.nan # (the edges of an IFU map)
+	return values
+
+
+@pytest.mark.parametrize('block_size',[8,8*50*40*7,2**26])
+def test_matches_histogram(cube,block_size):
+	stats = streamhist.stream_array(cube,bins=25,block_size=block_size)
+	finite = cube[np.isfinite(cube)]
+	assert stats.count == finite.size and stats.clims == [finite.min(),finite.max()]
+	counts,edges = np.histogram(finite,25,(finite.min(),finite.max()))
+	np.testing.assert_allclose(stats.edges,edges)
+	assert np.abs(stats.counts - counts).sum() <= 2 # (give or take a value on an edge)
+	assert stats.counts.sum() == finite.size
+
+
+def test_quantiles(cube):
+	stats = streamhist.stream_array(cube,bins=20,resolution=64)
+	finite = np.sort(cube[np.isfinite(cube)])
+	width = (stats.hi - stats.lo) / (20*64)
+	for q in [0.05,0.25,0.5,0.9]:
+		assert abs(stats.quantile(q) - np.quantile(finite,q)) <= width
+	assert stats.median == stats.quantile(0.5)
+	assert stats.quantile(0) == stats.lo
+	np.testing.assert_allclose(stats.quantile(1),stats.max)
+
+
+def test_clims_given(cube):
+	# values outside the clims aren't in the histogram, but still in the quantiles
+	stats = streamhist.stream_array(cube,bins=10,clims=(-3,-2))
+	finite = cube[np.isfinite(cube)]
+	assert stats.below == np.count_nonzero(finite < -3) and stats.above == np.count_nonzero(finite > -2)
+	assert stats.counts.sum() + stats.below + stats.above == finite.size
+	assert abs(stats.median - np.median(finite)) <= 1/(10*256)
+	assert stats.quantile(0) == finite.min()
+
+
+def test_flat_and_empty():
+	stats = streamhist.stream_array(np.full((10,10),3.))
+	assert stats.lo < 3 < stats.hi and stats.counts.sum() == 100
+	assert abs(stats.median - 3) <= 1/(40*256)
+	with pytest.raises(ValueError):
+		streamhist.stream_array(np.full((10,10),np.nan))
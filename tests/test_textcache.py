@@ -0,0 +1,95 @@
+'''
+playground.textcache only swaps matplotlib's text methods while asked to,
+draws the same text as matplotlib does, and keeps the caches bounded.
+'''
+
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import matplotlib.patheffects as PathEffects
+from matplotlib.figure import Figure
+from matplotlib.mathtext import MathTextParser
+from matplotlib.textpath import TextToPath
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import textcache
+
+originals = (MathTextParser._parse_cached,TextToPath.get_text_path)
+
+
+@pytest.fixture(autouse=True)
+def restored():
+	yield
+	textcache.uninstall()
+	assert (MathTextParser._parse_cached,TextToPath.get_text_path) == originals
+
+
+def draw(text):
+	fig = Figure()
+	fig.text(0.5,0.5,text)
+	fig.savefig(io.BytesIO(),format='png')
+
+
+def test_no_import_side_effect():
+	from playground import dither, figures, panels, scene
+	assert (MathTextParser._parse_cached,TextToPath.get_text_path) == originals
+	assert textcache.active() == []
+
+
+def test_installed():
+	with textcache.installed() as caches:
+		assert caches == ['mathtext','text paths']
+		with textcache.installed(): # (nested)
+			draw(r'Ly$\alpha$')
+		assert MathTextParser._parse_cached is not originals[0] # (still the outer one's)
+		draw(r'Ly$\alpha$')
+	assert (MathTextParser._parse_cached,TextToPath.get_text_path) == originals
+	assert textcache.stats()['mathtext']['hits'] >= 1
+
+
+def test_install_outlasts_installed():
+	textcache.install()
+	with textcache.installed():
+		pass
+	assert textcache.active() == ['mathtext','text paths']
+
+
+def test_missing_private_method(monkeypatch):
+	monkeypatch.delattr(MathTextParser,'_parse_cached')
+	with textcache.installed() as caches:
+		assert caches == ['text paths']
+		assert not hasattr(MathTextParser,'_parse_cached')
+	assert textcache.active() == []
+
+
+def outlined(labels):
+	fig = Figure(figsize=(3,2),dpi=50)
+	for i,label in enumerate(labels):
+		txt = fig.text(0.1,0.1+0.2*i,label,size=14,color='w')
+		txt.set_path_effects([PathEffects.withStroke(linewidth=3,foreground='k')])
+	buffer = io.BytesIO()
+	fig.savefig(buffer,format='png')
+	return buffer.getvalue()
+
+
+def test_same_pixels():
+	labels = [r'Ly$\alpha$','$z$: 7.50','A','[OIII]']
+	expected = outlined(labels)
+	textcache.clear()
+	with textcache.installed():
+		assert outlined(labels) == expected
+		assert outlined(labels) == expected # (from the cache this time)
+	stats = textcache.stats()
+	assert stats['text paths']['hits'] >= len(labels) and stats['mathtext']['hits'] >= 2
+
+
+def test_bounded_and_threads():
+	textcache.clear()
+	with textcache.installed(mathtext=5):
+		with ThreadPoolExecutor(4) as pool:
+			frames = list(pool.map(lambda z: outlined([f'$z$: {z:.2f}']),[7.5,7.6,7.7,7.8]*3))
+	assert frames[:4] == frames[4:8] == frames[8:]
+	assert textcache.stats()['mathtext']['entries'] <= 5
+	assert textcache.mathtext_layouts.maxsize == 5
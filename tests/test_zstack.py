@@ -0,0 +1,57 @@
+'''
+The precomputed redshift frames: the same fluxes as working out each frame
+on its own, cached by their inputs (and by the IGM code).
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+from playground import zstack
+from playground.igm_absorption import igm_absorption
+
+
+@pytest.fixture
+def spectrum():
+	wave = np.geomspace(0.05,3,2000) # microns
+	return wave,1 + np.sin(wave*40)**2
+
+
+def test_flux_stack(spectrum):
+	wave,sed = spectrum
+	z = zstack.redshifts(n_frames=50,z_max=10)
+	stack = zstack.flux_stack(wave,sed,z,dim=0.3,block=7) # (blocks that don't divide evenly)
+	assert stack.shape == (50,len(wave)) and stack.dtype == np.float32
+	for i in [0,13,49]:
+		observed = wave*1e4 * (1+z[i]) # (in Angstroms)
+		expected = sed * igm_absorption(observed,z[i]) / (1 + z[i]*0.3)
+		np.testing.assert_allclose(stack[i],expected,rtol=1e-6,atol=1e-30)
+
+
+def test_in_view(spectrum):
+	wave,_ = spectrum
+	keep = zstack.in_view(wave,[1,3],(0.5,2))
+	inside = np.flatnonzero(keep)
+	assert wave[inside[1]] >= 0.5/4 and wave[inside[-2]] <= 2/2
+	assert wave[inside[0]] < 0.5/4 and wave[inside[-1]] > 2/2 # (one past either end)
+	assert np.all(np.diff(inside) == 1)
+
+
+def test_cached_frames(spectrum,tmp_path,monkeypatch):
+	monkeypatch.setattr(zstack,'cache_dir',str(tmp_path))
+	wave,sed = spectrum
+	z = zstack.redshifts(fps=10,seconds=2)
+	frames = zstack.RedshiftFrames(wave,sed,z,xlim=(0.1,2))
+	assert len(frames) == 20 and frames.flux.shape == (20,len(frames.wave))
+	np.testing.assert_allclose(frames.observed(5),frames.wave*(1+z[5]))
+
+	again = zstack.RedshiftFrames(wave,sed,z,xlim=(0.1,2))
+	assert isinstance(again.flux,np.memmap) and len(os.listdir(tmp_path)) == 1
+	np.testing.assert_array_equal(again.flux,frames.flux)
+
+	zstack.RedshiftFrames(wave,sed,z,xlim=(0.1,2),dim=0.5)
+	monkeypatch.setattr(zstack.igm,'version',lambda: 'edited')
+	zstack.RedshiftFrames(wave,sed,z,xlim=(0.1,2))
+	assert len(os.listdir(tmp_path)) == 3